@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
 import datetime
-import re
-import base64
-import io
-import plotly.express as px
-from nselib import derivatives
-import pandas_market_calendars as mcal
+from core.bhavcopy_store import BhavcopyStore
+from core.instruments import master_for
+from core.lazy import lazy_import
+from core.perf_panel import apply_session_settings, plotly_chart, sidebar_panel
+from core.token_sweep import TokenSweep
+from core.tokens import generate_tokens, token_counts, token_file_name, tokens_csv, tokens_txt
+from core.trading_calendar import get_calendar
+
+px = lazy_import('plotly.express')
+apply_session_settings()
 
 st.title("STOCK CR TOKEN")
 st.write("This app generates stock cr token.")
@@ -18,123 +22,32 @@ page = st.sidebar.radio("Select Page", "Stock CR Token")
 if 'm2m' not in st.session_state:
     st.session_state.m2m = None
 
+# Bhavcopies are fetched once per day and then served from the local store
+bhavcopy_store = BhavcopyStore()
+
 #########################
 # NSE DERIVATIVES PAGE
 #########################
 
 # Functions for NSE derivatives analysis
 def is_trading_day(date):
-    # Get NSE calendar
-    nse = mcal.get_calendar('NSE')
-    
-    # Check if the date is a trading day
-    schedule = nse.schedule(start_date=date, end_date=date)
-    return not schedule.empty
+    # Binary search over the NSE sessions precomputed once per process
+    try:
+        return get_calendar().is_trading_day(date)
+    except ValueError:
+        # Outside the precomputed window; let the fetch decide
+        return True
 
 def run_analysis(date_str, month, oi_threshold, atm_percentage):
     try:
-        # Convert date to required format ('DD-MM-YYYY')
+        # Parse the selected date ('YYYY-MM-DD')
         date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-        formatted_date = date_obj.strftime('%d-%m-%Y')
-        
-        # Load the derivatives data
-        data = derivatives.fno_bhav_copy(formatted_date)
-        
-        # Check if data is empty
-        if data.empty:
-            return None, "No data available for the selected date."
-        
-        # Filter data for rows containing the specified month in 'FinInstrmNm'
-        data = data[data['FinInstrmNm'].str.contains(month)].copy()
-        
-        if data.empty:
-            return None, f"No contracts found for {month}."
-        
-        # Calculate 'open_int' column
-        data['open_int'] = data['OpnIntrst'] / data['NewBrdLotQty']
-        
-        # Filter data for futures contracts containing the specified month followed by 'FUT'
-        fut = data[data['FinInstrmNm'].str.contains(f'{month}FUT')].copy()
-        FUT = fut['FinInstrmNm'].copy()
-        
-        # Create a mask for specific conditions
-        mask = (
-            ((data['StrkPric'] >= data['UndrlygPric']) & (data['OptnTp'] == 'PE')) |
-            ((data['StrkPric'] <= data['UndrlygPric']) & (data['OptnTp'] == 'CE'))
-        )
-        
-        # Apply the mask to filter data
-        df = data[mask].copy()
-        
-        if df.empty:
-            return None, "No matching data after applying filters."
-        
-        # Use the user-provided ATM percentage
-        atm_decimal = atm_percentage / 100
-        
-        # Iterate over the DataFrame rows and set 'atm_con' based on conditions with user-defined percentage
-        df['atm_con'] = df.apply(
-            lambda row: 'True' if (
-                row['StrkPric'] <= row['UndrlygPric'] - (atm_decimal * row['UndrlygPric']) or
-                row['StrkPric'] >= row['UndrlygPric'] + (atm_decimal * row['UndrlygPric'])
-            ) else 'False',
-            axis=1
-        )
-        
-        # Filter data based on 'atm_con' and 'open_int'
-        mask01 = df[df['atm_con'] == "True"]
-        mask01 = mask01[mask01['open_int'] > oi_threshold]
-        mask02 = df[df['atm_con'] == "False"]
         
-        # Merge the filtered data
-        df1 = pd.merge(mask01, mask02, how='outer')
+        # The day's parsed contracts (read and parsed once per stored bhavcopy)
+        master = master_for(bhavcopy_store, date_obj)
         
-        if df1.empty:
-            return None, "No data after applying OI threshold filter."
-        
-        # Create a DataFrame with 'FinInstrmNm' column
-        df2 = pd.DataFrame(df1['FinInstrmNm'])
-        
-        # Create 'copy_fin' column with modified values
-        df2['copy_fin'] = df2['FinInstrmNm'].str[:-2] + 'PE'
-        df2['FinInstrmNm'] = df2['FinInstrmNm'].str[:-2] + 'CE'
-        
-        # Add 'NRML|' prefix to 'FinInstrmNm' and 'copy_fin'
-        df2['FinInstrmNm'] = 'NRML|' + df2['FinInstrmNm']
-        df2['copy_fin'] = 'NRML|' + df2['copy_fin']
-        
-        # FIX FOR FUTURES - Create a DataFrame for futures and rename the column
-        if not FUT.empty:
-            FUT_df = pd.DataFrame({'fut': 'NRML|' + FUT})
-        else:
-            FUT_df = pd.DataFrame({'fut': []})
-
-        # Prepare final dataframes - First create separate dataframes
-        ce_df = pd.DataFrame({'All Columns': df2['FinInstrmNm']})
-        pe_df = pd.DataFrame({'All Columns': df2['copy_fin']})
-        fut_df = pd.DataFrame({'All Columns': FUT_df['fut']})
-        
-        # Concatenate all into one dataframe
-        df_combined = pd.concat([ce_df, pe_df, fut_df], ignore_index=True)
-        
-        # Filter out rows containing 'NIFTY'
-        df_filtered = df_combined[~df_combined['All Columns'].str.contains('NIFTY', na=False)].copy()
-        
-        # Initialize a mask with False values
-        mask = pd.Series(False, index=df_filtered.index)
-        
-        # Update the mask if '.' is found in any object type column
-        for col in df_filtered.columns:
-            if df_filtered[col].dtype == object:
-                mask |= df_filtered[col].str.contains('\.', na=False)
-        
-        # Filter the DataFrame using the inverted mask
-        df5 = df_filtered[~mask]
-        
-        # Sort the dataframe alphabetically by 'All Columns'
-        df5 = df5.sort_values(by='All Columns')
-        
-        return df5, None
+        # Look up the month's expiries, then filter by ITM side, ATM band and OI
+        return generate_tokens(master, month, oi_threshold, atm_percentage)
     
     except Exception as e:
         return None, f"Error: {str(e)}"
@@ -189,9 +102,7 @@ if st.button("Generate Token"):
         st.success("Token Generated successfully!")
         
         # Count each type using regex pattern to match at the end of string
-        futures_count = result_df['All Columns'].str.contains('FUT$', regex=True).sum()
-        ce_count = result_df['All Columns'].str.contains('CE$', regex=True).sum()
-        pe_count = result_df['All Columns'].str.contains('PE$', regex=True).sum()
+        futures_count, ce_count, pe_count = token_counts(result_df)
         
         # Display the results
         st.subheader("Show Token")
@@ -204,24 +115,20 @@ if st.button("Generate Token"):
         
         # CSV download in column 1
         with col1:
-            csv = result_df.to_csv(index=False).encode('utf-8')
             st.download_button(
                 label="Download CSV",
-                data=csv,
-                file_name=f"stock_crtoken_{date_str}_{selected_month}.csv",
+                data=tokens_csv(result_df),
+                file_name=token_file_name(date_str, selected_month, 'csv'),
                 mime="text/csv"
             )
         
         # Text file download in column 2
         with col2:
-            # Convert DataFrame to plain text without index
-            text_content = "\n".join(result_df['All Columns'].tolist())
-            text_bytes = text_content.encode('utf-8')
-            
+            # Plain text without index, one token per line
             st.download_button(
                 label="Download TXT",
-                data=text_bytes,
-                file_name=f"stock_crtoken_{date_str}_{selected_month}.txt",
+                data=tokens_txt(result_df),
+                file_name=token_file_name(date_str, selected_month, 'txt'),
                 mime="text/plain"
             )
         
@@ -242,6 +149,42 @@ if st.button("Generate Token"):
         })
         st.bar_chart(chart_data.set_index('Type'))
 
+# Parameter sweep: token counts for a whole grid of OI thresholds and ATM %
+with st.expander("Parameter Sweep"):
+    sweep_col1, sweep_col2 = st.columns(2)
+    with sweep_col1:
+        oi_range = st.slider("OI Threshold Range", min_value=0, max_value=5000, value=(0, 1000), step=50)
+        oi_step = st.number_input("OI Step", min_value=1, value=50)
+    with sweep_col2:
+        atm_range = st.slider("ATM Range Percentage Range", min_value=1, max_value=20, value=(1, 20))
+
+    if st.button("Run Sweep"):
+        with st.spinner("Sweeping parameters..."):
+            try:
+                sweep = TokenSweep(master_for(bhavcopy_store, date), selected_month)
+                oi_values = list(range(oi_range[0], oi_range[1] + 1, int(oi_step)))
+                atm_values = list(range(atm_range[0], atm_range[1] + 1))
+                sweep_df = sweep.grid(oi_values, atm_values)
+            except Exception as e:
+                sweep_df = None
+                st.error(f"Error: {str(e)}")
+
+        if sweep_df is not None:
+            if sweep.error:
+                st.error(sweep.error)
+            else:
+                surface = sweep_df.pivot(index='oi_threshold', columns='atm_percentage', values='tokens')
+                fig_sweep = px.imshow(
+                    surface,
+                    aspect='auto',
+                    origin='lower',
+                    labels=dict(x="ATM Range Percentage", y="OI Threshold", color="Tokens"),
+                    title=f"Total tokens for {selected_month} on {date}"
+                )
+                plotly_chart(fig_sweep, use_container_width=True)
+                st.dataframe(sweep_df)
+                st.caption("Set the chosen OI threshold and ATM percentage in the sidebar and generate the token files.")
+
 # Add explanatory information
 with st.expander("About Stock CR Token "):
     st.info(f"""
@@ -269,4 +212,6 @@ with st.expander("About Stock CR Token "):
 
 # Add Footer
 st.markdown("---")
-st.markdown("Trading Analysis Dashboard | Created with Streamlit")
\ No newline at end of file
+st.markdown("Trading Analysis Dashboard | Created with Streamlit")
+
+sidebar_panel()
@@ -0,0 +1,75 @@
+"""Benchmark and equivalence check for ATM detection on a POS file.
+
+``legacy_find_atm`` is the ``iterrows`` loop ``parse_pos_contents`` in
+``pages/Atm_position.py`` used before ``core.atm.find_atm_positions``. It is
+O(options x futures), so it is only run on a smaller slice for the parity
+check; the vectorized version is timed on the full 50k rows.
+"""
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_atm_pos
+from core.atm import ATM_COLUMNS, POS_FIELDS, find_atm_positions
+from core.pos_schema import normalize_frame
+
+N_ROWS = 50000
+LEGACY_ROWS = 3000
+ATM_RANGES = [1, 5, 20]
+
+
+def legacy_find_atm(data, atm_range_value):
+    # Separate Futures and Options
+    fut = data[data['Call/Put'] == 'FF']
+    opt = data[data['Call/Put'] != 'FF']
+
+    # Create an empty DataFrame for ATM options
+    ATM = pd.DataFrame(columns=opt.columns)
+
+    # Iterate through options data
+    for index, row in opt.iterrows():
+        # Find matching Future contract
+        matching_fut = fut[fut['Scrip'] == row['Scrip']]
+        if not matching_fut.empty:
+            ltp_value = matching_fut['LTP'].values[0]  # Get the first matching LTP value
+
+            # Check if option is At The Money (using the user-selected range)
+            if abs(row['STK'] - ltp_value) < atm_range_value:
+                if row['STK'] < ltp_value and row['Call/Put']=='CE' or row['STK'] > ltp_value and row['Call/Put']=='PE':
+                    ATM = pd.concat([ATM, pd.DataFrame([row.values], columns=ATM.columns)], ignore_index=True)
+
+    return ATM[ATM_COLUMNS]
+
+
+def same_rows(old, new):
+    # The legacy frame is object dtype because rows were rebuilt from .values
+    return old.astype(str).values.tolist() == new.astype(str).values.tolist()
+
+
+def main():
+    data = normalize_frame(make_atm_pos(N_ROWS), POS_FIELDS)
+    data = data[data['qty'] != 0]
+    raw_sample = make_atm_pos(LEGACY_ROWS, seed=1)
+    raw_sample = raw_sample[raw_sample['Net Qty'] != 0]
+    sample = normalize_frame(raw_sample, POS_FIELDS)
+
+    ok = True
+    for atm_range in ATM_RANGES:
+        start = time.perf_counter()
+        old = legacy_find_atm(raw_sample, atm_range)
+        old_time = time.perf_counter() - start
+        match = same_rows(old, find_atm_positions(sample, atm_range))
+        ok &= match
+
+        start = time.perf_counter()
+        result = find_atm_positions(data, atm_range)
+        new_time = time.perf_counter() - start
+        print(f'range ±{atm_range}: legacy {old_time:.2f}s on {len(sample)} rows '
+              f'({"match" if match else "MISMATCH"}), vectorized {new_time:.3f}s on '
+              f'{len(data)} rows -> {len(result)} ATM legs')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Warm-cache trend over 60 trading days served from the local bhavcopy store.
+
+The fetcher is swapped for the synthetic fixture, so this runs offline. The
+trend loop mirrors tab2 of the Bhavcopy dashboard and reads only the columns
+it uses, from the row groups of one symbol.
+"""
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import fixture_fetcher
+from core.bhavcopy_store import BhavcopyStore
+
+TREND_DAYS = 60
+BUDGET_SECONDS = 0.75
+TREND_COLUMNS = ['FinInstrmNm', 'ClsPric', 'StrkPric', 'OptnTp', 'TtlTradgVol', 'NewBrdLotQty', 'SttlmPric']
+
+
+def trend(store, dates, symbol, expiry):
+    collected = []
+    for date in dates:
+        d = store.read(date, symbol=symbol, expiry=expiry, columns=TREND_COLUMNS)
+        daily_cls = d[d['FinInstrmNm'].str.contains('FUT')]['ClsPric'].iloc[0]
+        d = d.dropna(subset=['StrkPric', 'OptnTp'])
+        value = (d['TtlTradgVol'] * d['NewBrdLotQty'] * d['SttlmPric']).sum()
+        collected.append((date, value, daily_cls))
+    return pd.DataFrame(collected, columns=['date', 'total_traded_value', 'daily_close'])
+
+
+def main():
+    dates = pd.bdate_range(end='2025-08-22', periods=TREND_DAYS)
+    with tempfile.TemporaryDirectory() as root:
+        store = BhavcopyStore(root, fetcher=fixture_fetcher())
+
+        start = time.perf_counter()
+        for date in dates:
+            store.fetch(date)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = trend(store, dates, 'STK010', '2025-08-28')
+        warm = time.perf_counter() - start
+
+    print(f'cold fill ({TREND_DAYS} days): {cold:.2f}s')
+    print(f'warm trend ({len(result)} days): {warm:.3f}s (budget {BUDGET_SECONDS:.2f}s)')
+    return 0 if warm < BUDGET_SECONDS and len(result) == TREND_DAYS else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Peak memory and time of the box-log parser and summary against the old ones.
+
+``legacy_parse_data`` is ``parse_data`` from ``pages/box_performance.py``
+before the streaming parser, minus the Streamlit error call. Each parser runs
+in a forked child so its peak RSS can be measured on its own.
+"""
+import io
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_box_log
+from core.box_log import SUMMARY_COLUMNS, BoxSummary, parse_box_log
+from core.lot_sizes import DEFAULT_LOT_SIZES, LotSizeRegistry
+
+PARITY_LINES = 50_000
+LARGE_LINES = 1_000_000
+
+
+def get_lot_size_from_expiry(expiry_str):
+    try:
+        instrument = re.findall(r'[A-Z]+', expiry_str)[0]
+    except IndexError:
+        return None
+    return DEFAULT_LOT_SIZES.get(instrument)
+
+
+def legacy_parse_data(file):
+    content = file.read()
+    decoded = io.StringIO(content.decode('utf-8'))
+    data = pd.read_csv(decoded, on_bad_lines='skip')
+    data.columns = ['date', 'status', 'type', 'message']
+    df = data[data['type'] == 'ALGOTRADE'].copy()
+
+    pattern = (
+        r"BOX\s+(\w+\d*)-(\d+)-(\d+)(CE|PE)\s+Strategy\s+Trade\s+Confirmed\s+Qty\s+([-+]?\d+)\s+@\s+([-+]?\d*\.\d+|\d+)\s+\[Parity\s+Was\s+([-+]?\d*\.\d+|\d+)"
+    )
+    df_extracted = df['message'].str.extract(pattern)
+    df_extracted.columns = ['expiry', 'itm_stk', 'counter', 'option_type', 'open_cls', 'traded_parity', 'asked_parity']
+    df = pd.concat([df, df_extracted], axis=1)
+
+    for col in ['open_cls', 'itm_stk', 'counter']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in ['traded_parity', 'asked_parity']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df.dropna(subset=['expiry', 'open_cls', 'itm_stk', 'counter', 'traded_parity', 'asked_parity'])
+    df = df[df['asked_parity'] < 5000]
+
+    expiry_value = df['expiry'].iloc[0]
+    lot_size = get_lot_size_from_expiry(expiry_value)
+
+    df['box_size'] = abs(df['itm_stk'] - df['counter'])
+    df['parity_diff'] = (df['traded_parity'] - df['asked_parity'])*abs(df['open_cls'])
+    df['pnl'] = df['parity_diff'] * lot_size
+    df['wrong_right'] = df['traded_parity'] > df['asked_parity']
+    df['wrong_right'] = df['wrong_right'].map({True: 'right', False: 'wrong'})
+    df['gross_flow'] = df['traded_parity'] * abs(df['open_cls']) * lot_size
+
+    summary = []
+    for i in sorted(df['box_size'].unique()):
+        df1 = df[df['box_size'] == i]
+        total = df1['open_cls'].abs().sum()
+        correct = df1[df1['wrong_right'] == 'right']['open_cls'].abs().sum()
+        wrong = df1[df1['wrong_right'] == 'wrong']['open_cls'].abs().sum()
+        pos_alpha = df1[df1['wrong_right'] == 'right']['parity_diff'].sum() * lot_size
+        neg_alpha = df1[df1['wrong_right'] == 'wrong']['parity_diff'].sum() * lot_size
+        net_alpha = pos_alpha + neg_alpha
+        gross_flow = df1['gross_flow'].sum()
+        summary.append((i, total, correct, wrong, pos_alpha, neg_alpha, net_alpha, gross_flow))
+
+    df_summary = pd.DataFrame(summary, columns=[
+        'box_size', 'total_trades', 'correct_trades', 'wrong_trades',
+        'positive_alpha', 'negative_alpha', 'net_alpha', 'gross_flow'
+    ])
+    return df, df_summary
+
+
+def streaming_parse(file):
+    trades, summary, _ = parse_box_log(file, LotSizeRegistry.default())
+    return trades, summary
+
+
+def legacy_summary(df, lot_size):
+    summary = []
+    for i in sorted(df['box_size'].unique()):
+        df1 = df[df['box_size'] == i]
+        total = df1['open_cls'].abs().sum()
+        correct = df1[df1['wrong_right'] == 'right']['open_cls'].abs().sum()
+        wrong = df1[df1['wrong_right'] == 'wrong']['open_cls'].abs().sum()
+        pos_alpha = df1[df1['wrong_right'] == 'right']['parity_diff'].sum() * lot_size
+        neg_alpha = df1[df1['wrong_right'] == 'wrong']['parity_diff'].sum() * lot_size
+        net_alpha = pos_alpha + neg_alpha
+        gross_flow = df1['gross_flow'].sum()
+        summary.append((i, total, correct, wrong, pos_alpha, neg_alpha, net_alpha, gross_flow))
+    return pd.DataFrame(summary, columns=[
+        'box_size', 'total_trades', 'correct_trades', 'wrong_trades',
+        'positive_alpha', 'negative_alpha', 'net_alpha', 'gross_flow'
+    ])
+
+
+def same_summary(old, new):
+    return (
+        list(old.columns) == list(new.columns)
+        and np.allclose(old.to_numpy(dtype=float), new.to_numpy(dtype=float))
+    )
+
+
+def summary_timings(path):
+    """Legacy per-box-size loop vs one grouped pass on the same trades."""
+    trades, _, _ = parse_box_log(path, LotSizeRegistry.default())
+    lot_size = get_lot_size_from_expiry(trades['expiry'].iloc[0])
+
+    start = time.perf_counter()
+    old = legacy_summary(trades, lot_size)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summary = BoxSummary()
+    summary.update(trades)
+    new = summary.result().drop(columns='instrument')
+    hourly = summary.breakdown(by=['hour', 'box_size'])
+    new_time = time.perf_counter() - start
+
+    # Every roll-up of the cube must add back up to the per-box-size table
+    rolled = hourly.groupby('box_size', as_index=False)[SUMMARY_COLUMNS[1:]].sum()
+    match = same_summary(old, new) and same_summary(new, rolled)
+    return old_time, new_time, len(trades), match
+
+
+def _measure(fn, path, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        trades, summary = fn(f)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (peak - before) / 1024, len(trades)))
+
+
+def measure(fn, path):
+    """Return ``(seconds, peak MB above baseline, trades)`` from a forked child."""
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(fn, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def same_output(path):
+    with open(path, 'rb') as f:
+        old_trades, old_summary = legacy_parse_data(f)
+    new_trades, new_summary, _ = parse_box_log(path, LotSizeRegistry.default(), chunksize=7_000)
+    # The legacy parser had no per-row instrument / lot size columns
+    new_trades = new_trades[old_trades.columns]
+    new_summary = new_summary.drop(columns='instrument')
+    same_trades = (
+        list(old_trades.columns) == list(new_trades.columns)
+        and old_trades.astype(str).values.tolist() == new_trades.astype(str).values.tolist()
+    )
+    return same_trades and same_summary(old_summary, new_summary)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        small = write_box_log(os.path.join(tmp, 'small.txt'), PARITY_LINES)
+        match = same_output(small)
+        print(f'parity on {PARITY_LINES} lines: {"match" if match else "MISMATCH"}')
+
+        large = write_box_log(os.path.join(tmp, 'large.txt'), LARGE_LINES)
+        old_time, new_time, n_trades, summary_match = summary_timings(large)
+        match &= summary_match
+        print(f'summary of {n_trades} trades: loop {old_time:.3f}s, grouped {new_time:.3f}s, '
+              f'{"match" if summary_match else "MISMATCH"}')
+
+        size_mb = os.path.getsize(large) / 2 ** 20
+        for name, fn in [('legacy', legacy_parse_data), ('streaming', streaming_parse)]:
+            elapsed, peak_mb, n_trades = measure(fn, large)
+            print(f'{name}: {size_mb:.0f} MB log, {n_trades} trades, {elapsed:.2f}s, peak +{peak_mb:.0f} MB')
+    return 0 if match else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Trend-tab strike animation and M2M bar: full figures versus ``core.charts``.
+
+The legacy animation plots every strike of every day; the clipped one
+keeps ``MAX_STRIKES`` strikes around ATM on at most ``MAX_FRAMES`` days,
+which must include the ATM strike and the last day. Build time and JSON
+payload are printed for both, then for a rerun served by ``cached_figure``,
+which must return the cached figure. The M2M bar must keep the lowest and
+highest rows of the sorted positions.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+from core import charts
+from core.charts import MAX_BARS, MAX_FRAMES, MAX_STRIKES, cached_figure, clip_strikes, day_labels, extremes, sample_frames
+
+N_DAYS = 120
+N_STRIKES = 200
+N_POSITIONS = 500
+ATM = 24000.0
+
+# The clipped payload must be at most this fraction of the full one
+PAYLOAD_BUDGET = 0.2
+# Seconds for a rerun served from the figure cache
+CACHED_BUDGET = 0.05
+
+
+def make_strike_df(n_days=N_DAYS, n_strikes=N_STRIKES, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-08-22', periods=n_days).strftime('%Y-%m-%d')
+    strikes = ATM - 50.0 * (n_strikes // 2) + 50.0 * np.arange(n_strikes)
+    rows = pd.MultiIndex.from_product([dates, strikes, ['CE', 'PE']], names=['TradDt', 'StrkPric', 'OptnTp'])
+    data = rows.to_frame(index=False)
+    data['total_traded_value'] = rng.gamma(2.0, 1e6, len(data))
+    return data
+
+
+def animation(frame):
+    return px.bar(frame, x='StrkPric', y='total_traded_value', color='OptnTp',
+                  animation_frame='TradDt', barmode='group',
+                  labels={'StrkPric': 'Strike', 'total_traded_value': '₹ Cr'})
+
+
+def legacy_frame(strike_df):
+    return strike_df.assign(total_traded_value=strike_df['total_traded_value'] / 1e7,
+                            TradDt=pd.to_datetime(strike_df['TradDt']).dt.strftime('%d-%m-%Y'))
+
+
+def clipped_frame(strike_df, atm):
+    frame = sample_frames(clip_strikes(strike_df, center=atm), 'TradDt')
+    return frame.assign(total_traded_value=(frame['total_traded_value'] / 1e7).round(2),
+                        TradDt=day_labels(frame['TradDt']))
+
+
+def render(fig):
+    # What ``st.plotly_chart`` does with a figure
+    start = time.perf_counter()
+    payload = pio.to_json(fig.to_dict(), validate=False)
+    return len(payload), time.perf_counter() - start
+
+
+def check_m2m():
+    rng = np.random.default_rng(1)
+    positions = pd.DataFrame({'Stock': [f'S{i:03d}' for i in range(N_POSITIONS)],
+                              'M2M': rng.normal(0, 1e5, N_POSITIONS)})
+    ordered = positions.sort_values('M2M')
+    kept = extremes(positions, 'M2M')
+    expected = pd.concat([ordered.head(MAX_BARS // 2), ordered.tail(MAX_BARS // 2)])
+    return kept['Stock'].tolist() == expected['Stock'].tolist()
+
+
+def main():
+    strike_df = make_strike_df()
+
+    start = time.perf_counter()
+    full = animation(legacy_frame(strike_df))
+    full_build = time.perf_counter() - start
+    full_bytes, full_render = render(full)
+
+    charts.clear_cache()
+    frame = clipped_frame(strike_df, ATM)
+    start = time.perf_counter()
+    clipped = cached_figure(('strike_animation',), frame, animation)
+    clipped_build = time.perf_counter() - start
+    clipped_bytes, clipped_render = render(clipped)
+
+    # A rerun with unchanged inputs: the frame is rebuilt, the figure is not
+    start = time.perf_counter()
+    rerun = cached_figure(('strike_animation',), clipped_frame(strike_df, ATM), animation)
+    cached_build = time.perf_counter() - start
+
+    strikes = frame['StrkPric'].unique()
+    days = frame['TradDt'].unique()
+    window_ok = (len(strikes) == MAX_STRIKES and ATM in strikes and len(days) <= MAX_FRAMES
+                 and days[-1] == pd.Timestamp(strike_df['TradDt'].max()).strftime('%d-%m-%Y'))
+    payload_ok = clipped_bytes <= full_bytes * PAYLOAD_BUDGET
+    cached_ok = rerun is clipped and cached_build <= CACHED_BUDGET
+    m2m_ok = check_m2m()
+
+    print(f'full animation ({N_DAYS} days x {N_STRIKES} strikes): build {full_build:.2f}s, '
+          f'serialize {full_render:.3f}s, {full_bytes / 2 ** 20:.1f} MiB')
+    print(f'clipped ({len(days)} days x {len(strikes)} strikes): build {clipped_build:.2f}s, '
+          f'serialize {clipped_render:.3f}s, {clipped_bytes / 2 ** 20:.2f} MiB '
+          f'({"ok" if window_ok and payload_ok else "WRONG"})')
+    print(f'rerun from figure cache: {cached_build * 1000:.1f} ms ({"ok" if cached_ok else "WRONG"})')
+    print(f'M2M bar keeps the {MAX_BARS} extremes: {"ok" if m2m_ok else "WRONG"}')
+    return 0 if window_ok and payload_ok and cached_ok and m2m_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Trend analysis from per-day aggregates versus rescanning bhavcopies.
+
+``legacy_trend`` is the tab2 loop of the Bhavcopy dashboard before
+``core.daily_aggregates``: it reads and re-derives every day for every
+symbol / metric switch. The aggregate path is timed when the day files are
+first built, from disk in a fresh process, and from memory on a rerun.
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import fixture_fetcher
+from core.bhavcopy_store import BhavcopyStore
+from core.daily_aggregates import VALUE_COLUMNS, DailyAggregates, calculate_traded_value, strike_values, trend
+
+TREND_DAYS = 60
+SYMBOLS = ['STK010', 'NIFTY', 'STK123']
+EXPIRY = '2025-08-28'
+
+
+def legacy_trend(store, dates, symbol, expiry, method):
+    collected_data = []
+    oi_change_data = []
+    for date in dates:
+        d = store.read(date, symbol=symbol, expiry=expiry)
+        fut_close = d[d['FinInstrmNm'].str.contains('FUT')]['ClsPric']
+        if fut_close.empty:
+            continue
+        daily_cls = fut_close.iloc[0]
+        d = d.dropna(subset=['StrkPric', 'OptnTp']).copy()
+        d['total_traded_value'] = calculate_traded_value(d, method)
+        collected_data.append((date.strftime('%Y-%m-%d'), d['total_traded_value'].sum(), daily_cls))
+        d = d[['StrkPric', 'OptnTp', 'total_traded_value']].copy()
+        d['date'] = date.strftime('%Y-%m-%d')
+        oi_change_data.append(d)
+    trend_df = pd.DataFrame(collected_data, columns=['date', 'total_traded_value', 'daily_close'])
+    return trend_df, pd.concat(oi_change_data)
+
+
+def same_result(legacy, trend_df, strikes):
+    old_trend, old_strikes = legacy
+    old_strikes = old_strikes.sort_values(['date', 'StrkPric', 'OptnTp'])
+    strikes = strikes.sort_values(['TradDt', 'StrkPric', 'OptnTp'])
+    return (
+        old_trend['date'].tolist() == trend_df['date'].tolist()
+        and np.allclose(old_trend['total_traded_value'], trend_df['total_traded_value'])
+        and np.allclose(old_trend['daily_close'], trend_df['daily_close'])
+        and np.allclose(old_strikes['total_traded_value'], strikes['total_traded_value'])
+    )
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    dates = [d.date() for d in pd.bdate_range(end='2025-08-22', periods=TREND_DAYS)]
+    with tempfile.TemporaryDirectory() as root:
+        store = BhavcopyStore(f'{root}/bhavcopy', fetcher=fixture_fetcher())
+        for date in dates:
+            store.fetch(date)
+
+        def legacy_all():
+            return {(s, m): legacy_trend(store, dates, s, EXPIRY, m) for s in SYMBOLS for m in VALUE_COLUMNS}
+
+        legacy, legacy_time = timed(legacy_all)
+
+        def aggregated_all(agg):
+            results = {}
+            for symbol in SYMBOLS:
+                data = agg.read(dates, symbol, EXPIRY)
+                for method in VALUE_COLUMNS:
+                    results[(symbol, method)] = (trend(data, method), strike_values(data, method))
+            return results
+
+        aggregates = DailyAggregates(store, root=f'{root}/aggregates')
+        _, build_time = timed(lambda: aggregated_all(aggregates))
+        _, disk_time = timed(lambda: aggregated_all(DailyAggregates(store, root=f'{root}/aggregates')))
+        results, memory_time = timed(lambda: aggregated_all(aggregates))
+
+    ok = all(same_result(legacy[key], *results[key]) for key in legacy)
+    switches = len(SYMBOLS) * len(VALUE_COLUMNS)
+    print(f'legacy rescan: {legacy_time:.2f}s for {switches} symbol/metric views')
+    print(f'aggregates: first run {build_time:.2f}s (builds {TREND_DAYS} day files once), '
+          f'from disk {disk_time:.2f}s, from memory {memory_time:.3f}s '
+          f'({"match" if ok else "MISMATCH"})')
+    return 0 if ok and disk_time < legacy_time else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
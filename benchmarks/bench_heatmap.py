@@ -0,0 +1,95 @@
+"""Strike heatmaps from a ``StrikeCube`` versus the per-render pivot.
+
+``legacy_heatmaps`` is the tab2 code of the Bhavcopy dashboard before
+``core.heatmap``: ``pivot_table`` over (StrkPric, OptnTp), ``pct_change``
+and ``xs`` for calls and puts on every rerun. The cube is checked against it
+with no clipping, then timed on a rerun with one new day and for the
+clipped matrix the page plots. A cached cube must also pick up a day
+inside its range that arrives later, as after a retried backfill.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.heatmap import MAX_STRIKES, StrikeCube, get_cube
+
+N_DAYS = 250
+N_STRIKES = 400
+
+
+def make_strike_values(n_days=N_DAYS, n_strikes=N_STRIKES, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-08-22', periods=n_days).strftime('%Y-%m-%d')
+    strikes = 20000 + 50.0 * np.arange(n_strikes)
+    rows = pd.MultiIndex.from_product([dates, strikes, ['CE', 'PE']], names=['date', 'StrkPric', 'OptnTp'])
+    data = rows.to_frame(index=False)
+    data['total_traded_value'] = rng.gamma(2.0, 1e6, len(data))
+    # Strikes are listed over time, so the early days are sparse
+    listed = rng.random(len(data)) > 0.2
+    return data[listed].reset_index(drop=True)
+
+
+def legacy_heatmaps(oi_df):
+    pivoted_oi = oi_df.pivot_table(index='date', columns=['StrkPric', 'OptnTp'], values='total_traded_value')
+    pivoted_oi = pivoted_oi.sort_index()
+    oi_pct_change = pivoted_oi.pct_change() * 100
+    oi_pct_change = oi_pct_change.round(2)
+    out = []
+    for option_type in ('CE', 'PE'):
+        change = oi_pct_change.xs(option_type, axis=1, level=1, drop_level=False).T
+        change.index = change.index.get_level_values(0)
+        out.append(change)
+    return out
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def check_late_day(data):
+    days = sorted(data['date'].unique())[:3]
+    get_cube('late', data[data['date'].isin([days[0], days[2]])], date='date')
+    late = get_cube('late', data[data['date'].isin(days)], date='date')
+    expected = StrikeCube.from_frame(data[data['date'].isin(days)], date='date')
+    return list(late.dates) == days and np.allclose(late.pct, expected.pct, equal_nan=True)
+
+
+def main():
+    data = make_strike_values()
+    last_day = data['date'].max()
+    history = data[data['date'] < last_day]
+
+    legacy, legacy_time = timed(lambda: legacy_heatmaps(data))
+    cube, build_time = timed(lambda: StrikeCube.from_frame(data, date='date'))
+    ok = True
+    for option_type, old in zip(('CE', 'PE'), legacy):
+        new = cube.heatmap(option_type, max_strikes=N_STRIKES, max_dates=N_DAYS)
+        ok &= np.array_equal(old.index.to_numpy(), new.index.to_numpy())
+        ok &= np.allclose(old.to_numpy(), new.to_numpy(), equal_nan=True)
+
+    get_cube('bench', history, date='date')
+    _, rerun_time = timed(lambda: get_cube('bench', data, date='date'))
+    center = 20000 + 50.0 * N_STRIKES / 2
+    heatmaps, clip_time = timed(lambda: [cube.heatmap(t, center=center) for t in ('CE', 'PE')])
+    ok &= all(h.shape[0] <= MAX_STRIKES for h in heatmaps)
+    ok &= np.allclose(get_cube('bench', data, date='date').pct, cube.pct, equal_nan=True)
+
+    late_ok = check_late_day(data)
+    ok &= late_ok
+
+    legacy_cells = sum(h.size for h in legacy)
+    cells = sum(h.size for h in heatmaps)
+    print(f'legacy pivot + pct_change: {legacy_time:.3f}s, {legacy_cells} cells sent')
+    print(f'cube: build {build_time:.3f}s ({"match" if ok else "MISMATCH"}), '
+          f'rerun with one new day {rerun_time * 1000:.1f} ms, clipped heatmaps '
+          f'{clip_time * 1000:.1f} ms, {cells} cells sent')
+    print(f'late day inside the cached range: {"ok" if late_ok else "WRONG"}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Import time of ``app.py`` and each page, with per-module cost.
+
+The top-level imports and ``lazy_import`` calls of every page (found with
+``ast``, so the page itself is not run) are executed in a fresh interpreter
+under ``python -X importtime``.
+Streamlit and pandas are imported first and not counted: the server has
+Streamlit loaded before any page runs, and every page needs pandas, so
+neither can be deferred. Each page is timed best of ``REPEAT`` with deferred
+imports (the default) and once with ``EAGER_IMPORTS=1`` for comparison;
+the run fails when a page's deferred import time is over ``BUDGET``.
+
+    python -m benchmarks.bench_imports
+"""
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ['app.py'] + sorted(os.path.join('pages', name) for name in os.listdir(os.path.join(ROOT, 'pages'))
+                            if name.endswith('.py'))
+PRELOADED = 'import streamlit\nimport pandas'
+MARKER = '-- page imports --'
+REPEAT = 3
+BUDGET = 0.05
+TOP_MODULES = 5
+
+
+def is_import(node):
+    # ``import``/``from`` statements and ``name = lazy_import(...)``
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return True
+    return (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+            and getattr(node.value.func, 'id', None) == 'lazy_import')
+
+
+def page_imports(path):
+    with open(os.path.join(ROOT, path), encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    return '\n'.join(ast.unparse(node) for node in tree.body if is_import(node))
+
+
+def import_times(code, eager=False):
+    """``{module: cumulative seconds}`` for the modules ``code`` imports itself."""
+    script = f'{PRELOADED}\nimport sys\nprint({MARKER!r}, file=sys.stderr)\n{code}'
+    env = dict(os.environ, EAGER_IMPORTS='1' if eager else '0')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    lines = result.stderr.splitlines()
+    times = {}
+    for line in lines[lines.index(MARKER) + 1:]:
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  ') or not cumulative.strip().isdigit():
+            continue  # imported by another module, already in its parent's time
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def best_of(code, eager=False, repeat=REPEAT):
+    runs = [import_times(code, eager) for _ in range(repeat)]
+    return min(runs, key=lambda times: sum(times.values()))
+
+
+def main():
+    ok = True
+    for page in PAGES:
+        code = page_imports(page)
+        deferred = best_of(code)
+        eager = best_of(code, eager=True, repeat=1)
+        total = sum(deferred.values())
+        within = total <= BUDGET
+        ok &= within
+        print(f'{page:<32} {total * 1000:6.0f} ms deferred, {sum(eager.values()) * 1000:6.0f} ms eager '
+              f'({"ok" if within else f"OVER {BUDGET * 1000:.0f} ms BUDGET"})')
+        for name, seconds in sorted(deferred.items(), key=lambda item: -item[1])[:TOP_MODULES]:
+            print(f'    {name:<30} {seconds * 1000:6.0f} ms')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Live-refresh ticks against a full rescan of the universe.
+
+The source's chains change for ``CHANGE_RATE`` of the symbols between
+market ticks. After enough refresher ticks to cover the universe the
+board's top-10 call and put rankings must equal those of a one-shot scan
+(concat of every chain and a groupby), and the most active symbols must
+be polled on every tick. Tick time is printed next to the full scan's.
+The background poller must stop once nobody watches it. A refresher built
+on the process-wide source must reach the source on every tick even when
+``SharedSource`` holds the chains.
+"""
+import math
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from benchmarks.synthetic import SyntheticSource, make_option_chain_payload
+from core.data_sources import SharedSource, set_source
+from core.live_scan import LiveRefresher, SIDES, trade_values
+from core.scanner import OptionChainScanner
+from core.shared_cache import SingleFlightCache
+
+N_SYMBOLS = 200
+LATENCY = 0.01
+CHANGE_RATE = 0.1
+BATCH_SIZE = 40
+HOT_SYMBOLS = 10
+MARKET_TICKS = 5
+
+
+class MarketSource(SyntheticSource):
+    """Synthetic chains whose quotes move when a symbol's version is bumped."""
+
+    def __init__(self, n_symbols=N_SYMBOLS, latency=LATENCY):
+        super().__init__(n_symbols)
+        self.latency = latency
+        self.versions = {}
+        self.polls = {}
+        self.lock = threading.Lock()
+
+    def move(self, rng):
+        symbols = self.equity_list()
+        for symbol in rng.choice(symbols, int(len(symbols) * CHANGE_RATE), replace=False):
+            self.versions[symbol] = self.versions.get(symbol, 0) + 1
+
+    def option_chain(self, symbol, expiry=None):
+        with self.lock:
+            self.polls[symbol] = self.polls.get(symbol, 0) + 1
+        time.sleep(self.latency)
+        version = self.versions.get(symbol, 0)
+        return make_option_chain_payload(symbol, seed=zlib.crc32(symbol.encode()) * 1000 + version)
+
+
+def one_shot_top(scanner, symbols):
+    scan = scanner.scan(symbols)
+    top = {}
+    for side, frame in (('CALLS', scan.calls), ('PUTS', scan.puts)):
+        column = SIDES[side]
+        frame = frame.assign(**{column: trade_values(frame, side)})
+        top[side] = frame.groupby('Symbol')[column].sum().sort_values(ascending=False).head(10).reset_index()
+    return top
+
+
+def same_top(board_top, expected):
+    for side, column in SIDES.items():
+        left, right = board_top[side], expected[side]
+        if left['Symbol'].tolist() != right['Symbol'].tolist():
+            return False
+        if not np.allclose(left[column], right[column], rtol=1e-9):
+            return False
+    return True
+
+
+def check_idle_stop():
+    source = MarketSource(n_symbols=20, latency=0)
+    refresher = LiveRefresher(OptionChainScanner(source), interval=0.05, idle_timeout=0.3)
+    refresher.configure(source.equity_list())
+    refresher.watch()
+    time.sleep(1.0)
+    thread = refresher.thread
+    return refresher.board.ticks > 0 and (thread is None or not thread.is_alive())
+
+
+def check_bypasses_shared_cache():
+    source = MarketSource(n_symbols=20, latency=0)
+    previous = set_source(SharedSource(source, cache=SingleFlightCache()))
+    try:
+        refresher = LiveRefresher(batch_size=20, hot_symbols=5)
+        refresher.configure(source.equity_list())
+        for _ in range(2):
+            refresher.tick()
+    finally:
+        set_source(previous)
+    return all(source.polls.get(s, 0) == 2 for s in source.equity_list())
+
+
+def main():
+    rng = np.random.default_rng(0)
+    source = MarketSource()
+    symbols = source.equity_list()
+    full_scanner = OptionChainScanner(source)
+    refresher = LiveRefresher(OptionChainScanner(source), batch_size=BATCH_SIZE, hot_symbols=HOT_SYMBOLS)
+    refresher.configure(symbols)
+    # Ticks for the non-hot slots to reach every symbol once
+    cycle = math.ceil((len(symbols) - HOT_SYMBOLS) / (BATCH_SIZE - HOT_SYMBOLS))
+
+    ok = True
+    tick_times, changed = [], []
+    for market_tick in range(MARKET_TICKS):
+        source.move(rng)
+        for _ in range(cycle):
+            # The symbols most active before a tick are polled by that tick
+            before = {s: source.polls.get(s, 0) for s in refresher.board.most_active(HOT_SYMBOLS)}
+            start = time.perf_counter()
+            changed.append(refresher.tick())
+            tick_times.append(time.perf_counter() - start)
+            ok &= all(source.polls[s] == polls + 1 for s, polls in before.items())
+
+        start = time.perf_counter()
+        expected = one_shot_top(full_scanner, symbols)
+        full_time = time.perf_counter() - start
+        match = same_top(refresher.board.snapshot().top, expected)
+        ok &= match
+        print(f'market tick {market_tick}: {cycle} refresher ticks, {sum(changed[-cycle:])} rows changed, '
+              f'median tick {np.median(tick_times[-cycle:]) * 1000:.0f} ms vs full scan {full_time * 1000:.0f} ms '
+              f'({"match" if match else "MISMATCH"})')
+
+    idle_ok = check_idle_stop()
+    print(f'poller stops when unwatched: {"ok" if idle_ok else "WRONG"}')
+    fresh_ok = check_bypasses_shared_cache()
+    print(f'chains bypass the shared cache: {"ok" if fresh_ok else "WRONG"}')
+    return 0 if ok and idle_ok and fresh_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
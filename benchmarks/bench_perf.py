@@ -0,0 +1,108 @@
+"""Cost of the ``core.perf`` instrumentation, off and on.
+
+With recording off, a decorated function and a ``timed`` block must add
+under a microsecond per call, and the instrumented token generation
+must run as fast as the undecorated function. With recording on, the spans
+of a run are checked against the JSON lines and Prometheus exports. A
+context with its own recorder, as a Streamlit session has, must keep its
+spans out of the process-wide one.
+"""
+import contextvars
+import json
+import sys
+import time
+
+from benchmarks.synthetic import make_bhavcopy
+from core import perf
+from core.bhavcopy_store import compact_dtypes
+from core.tokens import generate_tokens
+
+CALLS = 200_000
+RUNS = 20
+# Added cost per call with recording off, in seconds
+OFF_BUDGET = 1e-6
+
+
+def noop():
+    return None
+
+
+@perf.timed('bench.noop')
+def timed_noop():
+    return None
+
+
+def per_call(fn):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        fn()
+    return (time.perf_counter() - start) / CALLS
+
+
+def block():
+    with perf.timed('bench.block'):
+        pass
+
+
+def best_of(fn, runs=RUNS):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_context_recorder():
+    own = perf.Recorder()
+
+    def session_run():
+        perf.enable_in_context(True)
+        perf.record_in_context(own)
+        timed_noop()
+        block()
+
+    contextvars.copy_context().run(session_run)
+    return set(own.totals) == {'bench.noop', 'bench.block'} and not perf.recorder.totals
+
+
+def main():
+    ok = True
+    perf.enable(False)
+    base = per_call(noop)
+    decorated = per_call(timed_noop) - base
+    context = per_call(block) - base
+    print(f'off: decorator +{decorated * 1e9:.0f} ns/call, context manager +{context * 1e9:.0f} ns/call')
+    ok &= decorated < OFF_BUDGET and context < OFF_BUDGET
+    ok &= not perf.recorder.totals
+    context_ok = check_context_recorder()
+    print(f'spans of a context with its own recorder stay in it: {"ok" if context_ok else "WRONG"}')
+    ok &= context_ok
+
+    data = compact_dtypes(make_bhavcopy('2025-08-01', n_symbols=200))
+    raw = generate_tokens.__wrapped__
+    plain = best_of(lambda: raw(data, 'AUG', 200, 8))
+    off = best_of(lambda: generate_tokens(data, 'AUG', 200, 8))
+    perf.enable(True)
+    on = best_of(lambda: generate_tokens(data, 'AUG', 200, 8))
+    print(f'generate_tokens on {len(data)} rows: undecorated {plain * 1000:.2f} ms, '
+          f'off {off * 1000:.2f} ms, on {on * 1000:.2f} ms')
+
+    totals = perf.recorder.totals['tokens.generate']
+    spans = [json.loads(line) for line in perf.recorder.to_jsonl().splitlines()]
+    prometheus = perf.recorder.to_prometheus()
+    ok &= totals['calls'] == RUNS and totals['rows_in'] == RUNS * len(data)
+    ok &= sum(s['name'] == 'tokens.generate' for s in spans) == RUNS
+    ok &= f'trading_dashboard_calls_total{{span="tokens.generate"}} {RUNS}' in prometheus
+    print(f'exports: {len(spans)} JSON lines, {len(prometheus.splitlines())} Prometheus lines '
+          f'({"match" if ok else "MISMATCH"})')
+
+    enabled = per_call(timed_noop) - base
+    print(f'on: decorator +{enabled * 1e9:.0f} ns/call')
+    perf.enable(False)
+    perf.recorder.reset()
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
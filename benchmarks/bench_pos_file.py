@@ -0,0 +1,77 @@
+"""POS file reading: ``pd.read_excel`` against ``core.pos_file.read_pos``.
+
+Both POS layouts are written as xlsx and as csv (read back from bytes, so
+the format has to be sniffed). The cold ``read_pos`` must return the same
+positions as ``pd.read_excel`` / ``pd.read_csv`` followed by the schema
+mapping, and a repeated read of the same upload (a widget change on the
+page) must come from the parse cache. Memory is the raw frame's against
+the typed one's.
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_atm_pos_excel, write_position_pos_excel
+from core.atm import POS_FIELDS as ATM_POS_FIELDS
+from core.pos_file import clear_cache, read_pos, sniff_format
+from core.pos_schema import normalize_frame
+from core.position_matching import POS_FIELDS
+
+N_ROWS = 20000
+CACHED_BUDGET = 0.05
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def check(name, content, legacy, kwargs, fields):
+    raw, legacy_time = timed(lambda: legacy(io.BytesIO(content), **kwargs))
+    expected = normalize_frame(raw, fields)
+    clear_cache()
+    cold, cold_time = timed(lambda: read_pos(io.BytesIO(content), fields))
+    warm, warm_time = timed(lambda: read_pos(io.BytesIO(content), fields))
+    try:
+        pd.testing.assert_frame_equal(expected, cold)
+        pd.testing.assert_frame_equal(expected, warm)
+        match = True
+    except AssertionError:
+        match = False
+    raw_mb = raw.memory_usage(deep=True).sum() / 2 ** 20
+    typed_mb = cold.memory_usage(deep=True).sum() / 2 ** 20
+    print(f'{name:<14} {sniff_format(content):<5} legacy {legacy_time:6.2f}s, cold {cold_time:6.2f}s, '
+          f'cached {warm_time * 1000:6.1f} ms, {raw_mb:5.1f} MB raw -> {typed_mb:4.1f} MB typed '
+          f'({"match" if match else "MISMATCH"})')
+    return match and warm_time < CACHED_BUDGET
+
+
+def main():
+    ok = True
+    with tempfile.TemporaryDirectory() as root:
+        atm_path = write_atm_pos_excel(os.path.join(root, 'atm.xlsx'), n_rows=N_ROWS)
+        position_path = write_position_pos_excel(os.path.join(root, 'position.xlsx'), n_rows=N_ROWS)
+        with open(atm_path, 'rb') as f:
+            atm_xlsx = f.read()
+        with open(position_path, 'rb') as f:
+            position_xlsx = f.read()
+
+    atm_kwargs = {'header': 1, 'index_col': 0}
+    ok &= check('atm', atm_xlsx, pd.read_excel, atm_kwargs, ATM_POS_FIELDS)
+    ok &= check('position', position_xlsx, pd.read_excel, {}, POS_FIELDS)
+
+    # The same sheets saved as csv, title row included
+    atm_csv = ('NET POSITION REPORT\n' + pd.read_excel(io.BytesIO(atm_xlsx), **atm_kwargs).to_csv()).encode()
+    position_csv = pd.read_excel(io.BytesIO(position_xlsx)).to_csv(index=False).encode()
+    ok &= check('atm', atm_csv, pd.read_csv, atm_kwargs, ATM_POS_FIELDS)
+    ok &= check('position', position_csv, pd.read_csv, {}, POS_FIELDS)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
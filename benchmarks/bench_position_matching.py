@@ -0,0 +1,124 @@
+"""Benchmark and equivalence check for POS position matching.
+
+The ``legacy_*`` functions are the loops ``pages/01position_matching.py``
+ran before ``core.position_matching``. The old FX table repeated a stock once
+per balanced strike; the engine lists each stock once, so the legacy table is
+de-duplicated before comparing.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_position_pos
+from core.pos_schema import normalize_frame
+from core.position_matching import POS_FIELDS, find_mismatches, select_position_rows, summarize_positions
+
+N_ROWS = 50000
+LEGACY_ROWS = 5000
+# The raw sheet's columns for each of POS_FIELDS
+LEGACY_COLUMNS = ['Unnamed: 0', 'COMBINED NET POSITION', 'Unnamed: 7', 'Unnamed: 9', 'Unnamed: 15', 'Unnamed: 17']
+
+
+def legacy_select(df):
+    new_data = []
+    for index, row in df.iterrows():
+        if any(keyword in row.values for keyword in ['CE', 'PE', 'FX']):
+            new_data.append(row)
+    new_data = pd.DataFrame(new_data)
+    new_data.dropna(axis=1, inplace=True)
+    new_data.reset_index(drop=True, inplace=True)
+    return new_data
+
+
+def legacy_summary(new_data):
+    exp = new_data[new_data['Unnamed: 7'] == 'FX']['Unnamed: 15'].sum()
+    exp = exp/100000
+    exp = round(exp)
+    exposure = f'{exp} Lac'
+    fx_sum = new_data[new_data['Unnamed: 7'] == 'FX']['Unnamed: 9'].sum()
+    ce_sum = new_data[new_data['Unnamed: 7'] == 'CE']['Unnamed: 9'].sum()
+    pe_sum = new_data[new_data['Unnamed: 7'] == 'PE']['Unnamed: 9'].sum()
+    if abs(fx_sum) == abs(ce_sum) == abs(pe_sum):
+        position = 'Matched'
+    else:
+        position = 'Not Matched'
+    return exposure, fx_sum, ce_sum, pe_sum, position
+
+
+def legacy_mismatches(data):
+    stock_list = data['Unnamed: 0'].unique()
+    mismatch_strikes = []
+    Future_mismatch =[]
+    data_ce_pe = data[data['Unnamed: 7'].isin(['CE', 'PE'])]
+    data_fx = data[data['Unnamed: 7'] == 'FX']
+    for stock in stock_list:
+        stock_data = data_ce_pe[data_ce_pe['Unnamed: 0'] == stock]
+        stock_data_fx = data_fx[data_fx['Unnamed: 0'] == stock]
+        fx_quantity = stock_data_fx['Unnamed: 9'].sum() if not stock_data_fx.empty else 0
+        ce_sum = stock_data[stock_data['Unnamed: 7'] == 'CE']['Unnamed: 9'].sum()
+        for strike, group in stock_data.groupby('COMBINED NET POSITION'):
+            ce_quantity = group[group['Unnamed: 7'] == 'CE']['Unnamed: 9'].sum()
+            pe_quantity = group[group['Unnamed: 7'] == 'PE']['Unnamed: 9'].sum()
+            if ce_quantity + pe_quantity != 0:
+                mismatch_strikes.append((stock, strike, ce_quantity, pe_quantity, fx_quantity))
+            else:
+                if ce_sum + fx_quantity != 0:
+                    Future_mismatch.append((stock, fx_quantity,ce_sum))
+    mismatch_strikes_df = pd.DataFrame(mismatch_strikes, columns=['Stock', 'Strike', 'CE Quantity', 'PE Quantity', 'FX Quantity'])
+    Future_mismatch_df = pd.DataFrame(Future_mismatch,columns=['stock','net fx quantity', 'net ce quantity'])
+    return mismatch_strikes_df, Future_mismatch_df
+
+
+def same_frame(old, new):
+    return old.astype(str).values.tolist() == new.astype(str).values.tolist()
+
+
+def same_positions(old, new):
+    # Exposure and M2M are float32 in the typed frame, so compare them with
+    # float32 precision and everything else exactly
+    if len(old) != len(new):
+        return False
+    for (_, a), (_, b) in zip(old.items(), new.items()):
+        if b.dtype == 'float32':
+            if not np.allclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol=1e-6):
+                return False
+        elif a.astype(str).tolist() != b.astype(str).tolist():
+            return False
+    return True
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    ok = True
+
+    raw = make_position_pos(LEGACY_ROWS)
+    t_old_sel, old_data = timed(legacy_select, raw)
+    t_new_sel, new_data = timed(lambda raw: select_position_rows(normalize_frame(raw, POS_FIELDS)), raw)
+    ok &= same_positions(old_data[LEGACY_COLUMNS], new_data)
+    ok &= [str(v) for v in legacy_summary(old_data)] == [str(v) for v in summarize_positions(new_data)]
+    t_old_mm, (old_strikes, old_futures) = timed(legacy_mismatches, old_data)
+    t_new_mm, (new_strikes, new_futures) = timed(find_mismatches, new_data)
+    ok &= same_frame(old_strikes, new_strikes)
+    ok &= same_frame(old_futures.drop_duplicates('stock').reset_index(drop=True), new_futures)
+    print(f'{len(raw)} rows: legacy select {t_old_sel:.2f}s + mismatch {t_old_mm:.2f}s, '
+          f'engine select {t_new_sel:.3f}s + mismatch {t_new_mm:.3f}s, '
+          f'{"match" if ok else "MISMATCH"}')
+
+    raw = make_position_pos(N_ROWS)
+    t_sel, data = timed(lambda raw: select_position_rows(normalize_frame(raw, POS_FIELDS)), raw)
+    t_sum, summary = timed(summarize_positions, data)
+    t_mm, (strikes, futures) = timed(find_mismatches, data)
+    print(f'{len(raw)} rows: engine select {t_sel:.3f}s, summary {t_sum:.3f}s, mismatch {t_mm:.3f}s '
+          f'-> {summary[4]}, {len(strikes)} strike and {len(futures)} FX mismatches')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
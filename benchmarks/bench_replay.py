@@ -0,0 +1,80 @@
+"""Cold and warm trend-range loads replayed from recorded fixtures.
+
+The synthetic source is recorded once; the replay then stands in for NSE
+with a fixed per-call latency. A cold backfill pays that latency for every
+day, a warm one is served from the local store, and the ``store`` backend
+must answer the same reads with no source at all.
+"""
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import SyntheticSource
+from core.backfill import backfill
+from core.bhavcopy_store import BhavcopyStore
+from core.data_sources import RecordingSource, ReplaySource, StoreSource
+
+N_DAYS = 30
+LATENCY = 0.2
+SYMBOL = 'STK010'
+EXPIRY = '2025-08-28'
+
+
+def same_frame(left, right):
+    # Parquet reads object columns of strings back as the str dtype, with
+    # NaN rather than None for missing values
+    left, right = (f.astype(object).where(f.notna(), None) for f in (left, right))
+    try:
+        pd.testing.assert_frame_equal(left, right)
+        return True
+    except AssertionError:
+        return False
+
+
+def main():
+    dates = [d.date() for d in pd.bdate_range(end='2025-08-22', periods=N_DAYS)]
+    source = SyntheticSource()
+    with tempfile.TemporaryDirectory() as root:
+        recorder = RecordingSource(source, f'{root}/fixtures')
+        for date in dates:
+            recorder.bhavcopy(date)
+        recorder.equity_list()
+
+        replay = ReplaySource(f'{root}/fixtures', latency=LATENCY, jitter=LATENCY / 4)
+        store = BhavcopyStore(f'{root}/bhavcopy', fetcher=replay.bhavcopy)
+
+        start = time.perf_counter()
+        cold = backfill(store, dates, rate=None)
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = backfill(store, dates, rate=None)
+        warm_time = time.perf_counter() - start
+
+        offline = StoreSource(BhavcopyStore(f'{root}/bhavcopy'))
+        offline.store.fetcher = offline.bhavcopy
+        start = time.perf_counter()
+        frames = [offline.store.read(date, symbol=SYMBOL, expiry=EXPIRY) for date in dates]
+        offline_time = time.perf_counter() - start
+
+        missing = backfill(offline.store, [dates[-1] + pd.Timedelta(days=3)], rate=None)
+        replayed = replay.bhavcopy(dates[0])
+        ok = (
+            all(r.status == 'fetched' for r in cold)
+            and all(r.status == 'cached' for r in warm)
+            and all(not f.empty for f in frames)
+            and missing[0].status == 'failed' and missing[0].attempts == 1
+            and same_frame(replayed, source.bhavcopy(dates[0]))
+            and replay.equity_list() == source.equity_list()
+        )
+
+    print(f'cold backfill, replayed at {LATENCY * 1000:.0f} ms/call: {cold_time:.2f}s for {N_DAYS} days')
+    print(f'warm backfill: {warm_time:.3f}s')
+    print(f'offline reads of {SYMBOL}: {offline_time:.3f}s ({"ok" if ok else "FAILED"})')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
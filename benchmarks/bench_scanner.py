@@ -0,0 +1,125 @@
+"""Full-universe option-chain scan against a local stub of the NSE API.
+
+The stub adds a fixed latency per request and fails a few symbols. The
+"legacy" path mirrors the old tab3 code: a fresh session and cookie fetch
+for every chain (as nselib does), a separate LTP request per symbol, and a
+10-thread pool. The scanner is timed cold and then warm, its chains served
+by a ``SharedSource`` as in the app; the warm scan must not reach the stub.
+"""
+import concurrent.futures
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from benchmarks.synthetic import make_option_chain_payload, symbols
+from core.data_sources import NselibSource, SharedSource
+from core.scanner import NseChainClient, OptionChainScanner, parse_chain, split_chain
+from core.shared_cache import SingleFlightCache
+
+N_SYMBOLS = 200
+LATENCY = 0.05
+FAILING = {'STK007', 'STK042'}
+
+
+class StubNseHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/option-chain':
+            self._send(200, {}, [('Set-Cookie', 'nsit=stub; Path=/')])
+        elif url.path == '/api/option-chain-v3':
+            if 'nsit=stub' not in (self.headers.get('Cookie') or ''):
+                self._send(401, {'error': 'no cookie'})
+                return
+            symbol = query['symbol'][0]
+            if symbol in FAILING:
+                self._send(500, {'error': 'stub failure'})
+                return
+            self._send(200, make_option_chain_payload(symbol))
+        elif url.path == '/ltp':
+            symbol = query['symbol'][0]
+            self._send(200, {'currentPrice': make_option_chain_payload(symbol)['records']['underlyingValue']})
+        else:
+            self._send(404, {})
+
+
+def legacy_scan(base_url, universe):
+    def process_stock(stock):
+        try:
+            ltp = requests.get(f'{base_url}/ltp', params={'symbol': stock}, timeout=10).json()['currentPrice']
+            session = requests.session()
+            session.get(f'{base_url}/option-chain', timeout=10)
+            response = session.get(f'{base_url}/api/option-chain-v3',
+                                   params={'type': 'Equity', 'symbol': stock}, timeout=10)
+            response.raise_for_status()
+            chain, _ = parse_chain(stock, response.json())
+            return split_chain(chain, ltp)
+        except Exception:
+            return None, None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        return list(executor.map(process_stock, universe))
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubNseHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    universe = symbols(N_SYMBOLS)
+
+    try:
+        start = time.perf_counter()
+        legacy = legacy_scan(base_url, universe)
+        legacy_time = time.perf_counter() - start
+        legacy_ok = sum(calls is not None for calls, _ in legacy)
+
+        cache = SingleFlightCache()
+        source = SharedSource(NselibSource(NseChainClient(base_url, rate=None)), cache=cache)
+        scanner = OptionChainScanner(source, max_workers=32)
+        start = time.perf_counter()
+        cold = scanner.scan(universe)
+        cold_time = time.perf_counter() - start
+        misses = cache.stats()['misses'].sum()
+        start = time.perf_counter()
+        warm = scanner.scan(universe)
+        warm_time = time.perf_counter() - start
+        warm_fetches = cache.stats()['misses'].sum() - misses
+    finally:
+        server.shutdown()
+
+    errors = cold.metrics[cold.metrics['status'] == 'error']
+    print(f'legacy: {legacy_time:.2f}s, {legacy_ok}/{len(universe)} symbols')
+    print(f'scanner cold: {cold_time:.2f}s, {len(universe) - len(errors)}/{len(universe)} symbols, '
+          f'p95 latency {cold.metrics["latency"].quantile(0.95) * 1000:.0f} ms, '
+          f'errors: {", ".join(errors["symbol"])}')
+    # Failed fetches are not cached, so only the failing symbols are fetched again
+    print(f'scanner warm: {warm_time:.3f}s, {warm_fetches} chains fetched again')
+    ok = (set(errors['symbol']) == FAILING and len(cold.calls) > 0 and cold_time < legacy_time
+          and warm_fetches == len(FAILING) and len(warm.calls) == len(cold.calls))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Sessions opening the dashboard at once, with and without the shared cache.
+
+``N_SESSIONS`` threads start together and each loads the day's bhavcopy,
+the F&O list and ``N_CHAINS`` option chains from a source with a fixed
+per-call latency. Without the cache the source sees every call; through
+``SharedSource`` it must see each key once, the concurrent callers waiting
+on that fetch, and every session must get the same data. A failing fetch
+is raised in all of its waiters and is not cached.
+"""
+import collections
+import concurrent.futures
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import SyntheticSource
+from core.data_sources import DataSource, SharedSource
+from core.shared_cache import SingleFlightCache
+
+N_SESSIONS = 12
+N_CHAINS = 20
+LATENCY = 0.05
+DATE = '2025-08-01'
+
+
+class CountingSource(DataSource):
+    """``inner`` behind a fixed latency, counting calls per key."""
+
+    def __init__(self, inner, latency=LATENCY):
+        self.inner = inner
+        self.latency = latency
+        self.calls = collections.Counter()
+        self.lock = threading.Lock()
+
+    def _call(self, key, fetch):
+        with self.lock:
+            self.calls[key] += 1
+        time.sleep(self.latency)
+        return fetch()
+
+    def bhavcopy(self, date):
+        return self._call(('bhavcopy', date), lambda: self.inner.bhavcopy(date))
+
+    def equity_list(self):
+        return self._call(('equity_list',), self.inner.equity_list)
+
+    def option_chain(self, symbol, expiry=None):
+        return self._call(('option_chain', symbol), lambda: self.inner.option_chain(symbol, expiry))
+
+
+def open_sessions(source, symbols):
+    barrier = threading.Barrier(N_SESSIONS)
+
+    def session(_):
+        barrier.wait()
+        data = source.bhavcopy(DATE)
+        equities = source.equity_list()
+        chains = [source.option_chain(symbol)['records']['underlyingValue'] for symbol in symbols]
+        return len(data), tuple(equities), tuple(chains)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=N_SESSIONS) as executor:
+        results = list(executor.map(session, range(N_SESSIONS)))
+    return results, time.perf_counter() - start
+
+
+def check_errors(cache):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(LATENCY)
+        raise ConnectionError('throttled')
+
+    def attempt(_):
+        try:
+            cache.get(('bhavcopy', 'failing'), failing)
+        except ConnectionError:
+            return True
+        return False
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        raised = list(executor.map(attempt, range(4)))
+    first_calls = len(calls)
+    attempt(None)
+    return all(raised) and first_calls == 1 and len(calls) == 2
+
+
+def main():
+    inner = SyntheticSource()
+    symbols = inner.equity_list()[:N_CHAINS]
+    keys = 2 + len(symbols)
+
+    direct = CountingSource(inner)
+    direct_results, direct_time = open_sessions(direct, symbols)
+
+    counted = CountingSource(inner)
+    cache = SingleFlightCache()
+    shared = SharedSource(counted, cache=cache)
+    shared_results, shared_time = open_sessions(shared, symbols)
+    cold_calls = sum(counted.calls.values())
+    _, warm_time = open_sessions(shared, symbols)
+
+    same = shared_results == direct_results
+    once = cold_calls == keys and max(counted.calls.values()) == 1
+    print(f'{N_SESSIONS} sessions x {keys} requests: direct {sum(direct.calls.values())} source calls '
+          f'in {direct_time:.2f}s, shared {cold_calls} calls in {shared_time:.2f}s, '
+          f'warm burst {warm_time * 1000:.0f} ms ({"match" if same and once else "MISMATCH"})')
+    with pd.option_context('display.width', 120):
+        print(cache.stats().round(3).to_string(index=False))
+
+    errors_ok = check_errors(SingleFlightCache())
+    print(f'failed fetch shared by its waiters and not cached: {"ok" if errors_ok else "WRONG"}')
+    return 0 if same and once and errors_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Batch CR token generation versus one UI click per parameter set.
+
+The "clicks" path repeats what ``run_analysis`` and the download buttons do
+for every (date, month, OI threshold, ATM %): read the day from the store,
+generate tokens and write the CSV / TXT. ``run_batch`` must write the same
+files while reading each day once, in parallel across processes.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import fixture_fetcher
+from core.bhavcopy_store import BhavcopyStore
+from core.token_batch import output_name, parameter_grid, run_batch
+from core.tokens import generate_tokens, tokens_csv, tokens_txt
+
+N_DAYS = 6
+N_SYMBOLS = 420
+GRID = parameter_grid(['AUG', 'SEP', 'OCT'], [0, 200, 400], [3, 8, 15])
+
+
+def click_through(store, dates, grid, out_dir):
+    for date in dates:
+        date_str = f'{date:%Y-%m-%d}'
+        for month, oi_threshold, atm_percentage in grid:
+            data = store.read(date)
+            result_df, error = generate_tokens(data, month, oi_threshold, atm_percentage)
+            if error:
+                continue
+            result_df = result_df.sort_values(by='All Columns', ascending=True)
+            for extension, render in (('csv', tokens_csv), ('txt', tokens_txt)):
+                name = output_name(date_str, month, oi_threshold, atm_percentage, extension, True)
+                with open(os.path.join(out_dir, name), 'wb') as f:
+                    f.write(render(result_df))
+
+
+def same_files(left, right):
+    names = sorted(os.listdir(left))
+    if names != sorted(os.listdir(right)):
+        return False
+    for name in names:
+        with open(os.path.join(left, name), 'rb') as a, open(os.path.join(right, name), 'rb') as b:
+            if a.read() != b.read():
+                return False
+    return True
+
+
+def main():
+    dates = [d.date() for d in pd.bdate_range(end='2025-08-22', periods=N_DAYS)]
+    with tempfile.TemporaryDirectory() as root:
+        store = BhavcopyStore(f'{root}/bhavcopy', fetcher=fixture_fetcher(N_SYMBOLS))
+        for date in dates:
+            store.fetch(date)
+        clicks_dir, batch_dir = f'{root}/clicks', f'{root}/batch'
+        os.makedirs(clicks_dir)
+
+        start = time.perf_counter()
+        click_through(store, dates, GRID, clicks_dir)
+        clicks_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = run_batch(store, dates, GRID, batch_dir)
+        batch_time = time.perf_counter() - start
+
+        ok = same_files(clicks_dir, batch_dir)
+        written = sum(len(r.files) for r in results)
+
+    print(f'{N_DAYS} days x {len(GRID)} parameter sets, {written} files')
+    print(f'one click per set: {clicks_time:.2f}s')
+    print(f'batch ({os.cpu_count()} cores): {batch_time:.2f}s ({"match" if ok else "MISMATCH"})')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Parameter sweep versus one ``generate_tokens`` call per grid point.
+
+Every grid point's FUT / CE / PE counts and error message from
+``TokenSweep.grid`` must equal what ``generate_tokens`` returns there.
+"""
+import sys
+import time
+
+from benchmarks.synthetic import make_bhavcopy
+from core.token_sweep import TokenSweep
+from core.tokens import generate_tokens, token_counts
+
+# ~100k option rows, the size of a full bhavcopy
+N_SYMBOLS = 420
+MONTHS = ['AUG', 'OCT', 'DEC']
+OI_THRESHOLDS = list(range(0, 1001, 50))
+ATM_PERCENTAGES = list(range(1, 21))
+
+
+def per_point(data, month):
+    counts = {}
+    for oi_threshold in OI_THRESHOLDS:
+        for atm_percentage in ATM_PERCENTAGES:
+            tokens_df, error = generate_tokens(data, month, oi_threshold, atm_percentage)
+            counts[(oi_threshold, atm_percentage)] = ((0, 0, 0) if error else token_counts(tokens_df), error)
+    return counts
+
+
+def main():
+    data = make_bhavcopy('2025-08-01', n_symbols=N_SYMBOLS)
+    points = len(OI_THRESHOLDS) * len(ATM_PERCENTAGES)
+    ok = True
+    for month in MONTHS:
+        start = time.perf_counter()
+        expected = per_point(data, month)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        grid = TokenSweep(data, month).grid(OI_THRESHOLDS, ATM_PERCENTAGES)
+        sweep_time = time.perf_counter() - start
+
+        match = all(
+            expected[(row.oi_threshold, row.atm_percentage)] == ((row.futures, row.calls, row.puts), row.error)
+            for row in grid.itertuples()
+        )
+        ok &= match and len(grid) == points
+        print(f'{month}: {points} grid points, per-point loop {loop_time:.2f}s, '
+              f'sweep {sweep_time * 1000:.1f} ms ({"match" if match else "MISMATCH"})')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Page-startup cost of the F&O symbol universe.
+
+The fetcher stands in for ``capital_market.fno_equity_list()`` with a fixed
+network delay. A cold start pays it once; the in-memory path and a fresh
+process reading the disk file (the page rerun / restart cases) must not.
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import fixture_fetcher, symbols
+from core.bhavcopy_store import BhavcopyStore
+from core.universe import INDEX_SYMBOLS, SymbolUniverse
+
+N_SYMBOLS = 200
+NETWORK_DELAY = 0.5
+STARTUP_BUDGET = 0.01
+
+
+def slow_equity_fetcher():
+    time.sleep(NETWORK_DELAY)
+    return symbols(N_SYMBOLS)
+
+
+def failing_fetcher():
+    raise RuntimeError('fetcher should not be called')
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    today = datetime.date(2025, 8, 1)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'fno_universe.json')
+        store = BhavcopyStore(os.path.join(root, 'bhavcopy'), fetcher=fixture_fetcher(N_SYMBOLS))
+        store.fetch(today)
+
+        universe = SymbolUniverse(path, fetcher=slow_equity_fetcher, store=store)
+        cold, cold_time = timed(lambda: universe.symbols(today))
+        _, memory_time = timed(lambda: universe.symbols(today))
+
+        restarted = SymbolUniverse(path, fetcher=failing_fetcher, store=store)
+        disk, disk_time = timed(lambda: restarted.symbols(today))
+
+        _, contracts_time = timed(lambda: restarted.lot_size('STK000'))
+        _, lookup_time = timed(lambda: [(restarted.lot_size(s), restarted.expiries(s)) for s in disk])
+        known = sum(restarted.lot_size(s) is not None for s in disk)
+
+    print(f'cold start: {cold_time:.3f}s ({len(cold)} symbols)')
+    print(f'warm, in memory: {memory_time * 1000:.2f} ms')
+    print(f'warm, from disk: {disk_time * 1000:.2f} ms')
+    print(f'contract table load: {contracts_time * 1000:.1f} ms, '
+          f'{len(disk)} lot size + expiry lookups: {lookup_time * 1000:.2f} ms ({known} known)')
+    ok = (
+        disk == cold
+        and cold[-len(INDEX_SYMBOLS):] == INDEX_SYMBOLS
+        and memory_time < STARTUP_BUDGET
+        and disk_time < STARTUP_BUDGET
+        and known == N_SYMBOLS
+    )
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
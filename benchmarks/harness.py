@@ -0,0 +1,245 @@
+"""Time and peak memory of the app's hot paths at several input scales.
+
+Each case builds a synthetic input at ``scale`` times its base size, then
+runs the code path a page runs on it: CR token generation, both POS
+parsers (including the Excel read), the box-log parser, and the tab1 / tab2
+aggregations of the Bhavcopy dashboard. Time is measured over ``--repeat``
+runs; peak memory is traced in one extra run with ``tracemalloc``, so it
+covers Python and NumPy allocations but not Arrow buffers.
+
+Results are written as JSON. Passing an earlier file to ``--compare``
+prints the change per case and exits non-zero when any case got slower by
+more than ``--tolerance``.
+
+    python -m benchmarks.harness --scales 1 10 100 --output results.json
+    python -m benchmarks.harness --compare results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import (
+    fixture_fetcher, make_bhavcopy, write_atm_pos_excel, write_box_log, write_position_pos_excel,
+)
+from core.atm import POS_FIELDS as ATM_POS_FIELDS
+from core.atm import find_atm_positions
+from core.bhavcopy_store import BhavcopyStore, compact_dtypes
+from core.box_log import parse_box_log
+from core.daily_aggregates import DailyAggregates, calculate_traded_value, strike_values, trend
+from core.heatmap import StrikeCube
+from core.lot_sizes import LotSizeRegistry
+from core.pos_file import clear_cache, read_pos
+from core.position_matching import POS_FIELDS, find_mismatches, select_position_rows, summarize_positions
+from core.tokens import generate_tokens
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_SCALES = [1, 10, 100]
+EXPIRY = '2025-08-28'
+TREND_DAYS = 20
+
+# ``setup(scale, workdir)`` returns ``(inputs, size)`` and is not timed;
+# ``run(inputs)`` is the measured code path. ``size`` is the input's rows
+# (log lines for box_log, symbol-days for bhavcopy_tab2).
+Case = namedtuple('Case', ['name', 'description', 'setup', 'run'])
+
+
+def _setup_bhavcopy(scale, workdir):
+    data = compact_dtypes(make_bhavcopy('2025-08-01', n_symbols=20 * scale))
+    return data, len(data)
+
+
+def _run_tokens(data):
+    return generate_tokens(data, 'AUG', 200, 8)
+
+
+def _setup_atm_pos(scale, workdir):
+    path = write_atm_pos_excel(os.path.join(workdir, f'atm_pos_{scale}.xlsx'), n_rows=500 * scale)
+    return path, 500 * scale
+
+
+def _run_atm_pos(path):
+    # parse_pos_contents in pages/Atm_position.py, on a cold parse cache
+    clear_cache()
+    data = read_pos(path, fields=ATM_POS_FIELDS)
+    data = data[data['qty'] != 0]
+    return find_atm_positions(data, 5)
+
+
+def _setup_position_pos(scale, workdir):
+    path = write_position_pos_excel(os.path.join(workdir, f'position_pos_{scale}.xlsx'), n_rows=500 * scale)
+    return path, 500 * scale
+
+
+def _run_position_pos(path):
+    # parse_pos_contents and the mismatch tables in pages/01position_matching.py
+    clear_cache()
+    data = select_position_rows(read_pos(path, fields=POS_FIELDS))
+    return summarize_positions(data), find_mismatches(data)
+
+
+def _setup_box_log(scale, workdir):
+    path = write_box_log(os.path.join(workdir, f'box_{scale}.log'), n_lines=10_000 * scale,
+                         instruments=('NIFTY', 'BANKNIFTY'))
+    return (path, LotSizeRegistry.default()), 10_000 * scale
+
+
+def _run_box_log(inputs):
+    # parse_data in pages/box_performance.py
+    path, registry = inputs
+    return parse_box_log(path, registry)
+
+
+def _run_tab1(data):
+    # "Top 30 by Traded Value" and the strike-wise chart data
+    data = data.dropna(subset=['StrkPric', 'OptnTp'])
+    data = data.assign(total_traded_value=calculate_traded_value(data, 'Volume'))
+    data = data[data['XpryDt'] == EXPIRY]
+    traded = data.groupby('TckrSymb', observed=True)['total_traded_value'].sum().reset_index()
+    top_n = traded.sort_values('total_traded_value', ascending=False).head(30)
+    stock = data[data['TckrSymb'] == top_n['TckrSymb'].iloc[0]]
+    return top_n, stock.groupby(['StrkPric', 'OptnTp'], observed=True)['total_traded_value'].sum()
+
+
+def _setup_tab2(scale, workdir):
+    dates = [d.date() for d in pd.bdate_range(end='2025-08-22', periods=TREND_DAYS)]
+    store = BhavcopyStore(os.path.join(workdir, f'bhavcopy_{scale}'), fetcher=fixture_fetcher(20 * scale))
+    for date in dates:
+        store.fetch(date)
+    return {'store': store, 'dates': dates, 'workdir': workdir, 'runs': 0}, TREND_DAYS * 20 * scale
+
+
+def _run_tab2(inputs):
+    # Trend, strike animation and heatmaps for one symbol, from a cold
+    # aggregate store (every run builds its own)
+    inputs['runs'] += 1
+    root = os.path.join(inputs['workdir'], f"aggregates_{id(inputs)}_{inputs['runs']}")
+    aggregates = DailyAggregates(inputs['store'], root=root).read(inputs['dates'], 'STK010', EXPIRY)
+    trend_df = trend(aggregates, 'Volume')
+    strikes = strike_values(aggregates, 'Volume')
+    cube = StrikeCube.from_frame(strikes)
+    center = trend_df['daily_close'].iloc[-1]
+    return trend_df, cube.heatmap('CE', center=center), cube.heatmap('PE', center=center)
+
+
+CASES = [
+    Case('run_analysis', 'CR tokens for one day and month (app.py)', _setup_bhavcopy, _run_tokens),
+    Case('atm_pos', 'ATM positions from a POS workbook (Atm_position.py)', _setup_atm_pos, _run_atm_pos),
+    Case('position_pos', 'Position matching from a POS workbook (01position_matching.py)',
+         _setup_position_pos, _run_position_pos),
+    Case('box_log', 'Box-strategy log parse and summary (box_performance.py)', _setup_box_log, _run_box_log),
+    Case('bhavcopy_tab1', 'Top-30 and strike-wise traded value (Bhavcopy_dashboard.py tab1)',
+         _setup_bhavcopy, _run_tab1),
+    Case('bhavcopy_tab2', f'{TREND_DAYS}-day trend and heatmaps, cold aggregates (Bhavcopy_dashboard.py tab2)',
+         _setup_tab2, _run_tab2),
+]
+
+
+def measure(case, scale, repeat, workdir):
+    inputs, size = case.setup(scale, workdir)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run(inputs)
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        case.run(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'case': case.name,
+        'scale': scale,
+        'size': size,
+        'seconds': seconds,
+        'best': min(seconds),
+        'median': statistics.median(seconds),
+        'peak_mb': peak / 2 ** 20,
+    }
+
+
+def environment():
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against ``baseline``; returns the regressed ``(case, scale)`` pairs."""
+    previous = {(r['case'], r['scale']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        old = previous.get((r['case'], r['scale']))
+        if old is None:
+            continue
+        ratio = r['best'] / old['best'] if old['best'] else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append((r['case'], r['scale']))
+            flag = '  REGRESSION'
+        print(f"  {r['case']:<14} x{r['scale']:<4} {old['best']:8.3f}s -> {r['best']:8.3f}s "
+              f"({ratio:5.2f}x), peak {old['peak_mb']:.1f} -> {r['peak_mb']:.1f} MB{flag}")
+    return regressions
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.harness', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES, help="default: 1 10 100")
+    parser.add_argument('--cases', nargs='+', choices=[c.name for c in CASES], default=[c.name for c in CASES])
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case and scale (default: 3)")
+    parser.add_argument('--output', help=f"JSON file to write (default: a new file in {RESULTS_DIR})")
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown against --compare before failing (default: 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    cases = [c for c in CASES if c.name in args.cases]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in cases:
+            for scale in args.scales:
+                result = measure(case, scale, args.repeat, workdir)
+                results.append(result)
+                print(f"{case.name:<14} x{scale:<4} {result['size']:>9} rows  best {result['best']:8.3f}s  "
+                      f"median {result['median']:8.3f}s  peak {result['peak_mb']:8.1f} MB", flush=True)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"harness-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare}:")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""Synthetic inputs with the same shape as the real NSE / broker files.
+
+Used by the benchmark scripts in this folder in place of network fetches.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.data_sources import DataSource
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+
+def last_thursday(year, month):
+    # Monthly F&O contracts expire on the last Thursday of the month
+    if month == 12:
+        day = datetime.date(year + 1, 1, 1) - datetime.timedelta(days=1)
+    else:
+        day = datetime.date(year, month + 1, 1) - datetime.timedelta(days=1)
+    return day - datetime.timedelta(days=(day.weekday() - 3) % 7)
+
+
+def expiries_for(date, count=3):
+    date = pd.Timestamp(date).date()
+    expiries = []
+    year, month = date.year, date.month
+    while len(expiries) < count:
+        expiry = last_thursday(year, month)
+        if expiry >= date:
+            expiries.append(expiry)
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return expiries
+
+
+def symbols(n_symbols):
+    names = [f'STK{i:03d}' for i in range(max(n_symbols - 2, 0))]
+    return ['NIFTY', 'BANKNIFTY'][:n_symbols] + names
+
+
+def make_bhavcopy(date, n_symbols=200, strikes_per_side=20, n_expiries=3, seed=None):
+    """Return a bhavcopy frame for ``date`` using the UDiFF column schema.
+
+    Underlying prices drift slowly with the date so consecutive days look like
+    a real series. Roughly ``n_symbols * n_expiries * strikes_per_side * 4``
+    option rows are produced (200 symbols -> ~48k options).
+    """
+    date = pd.Timestamp(date)
+    rng = np.random.default_rng(seed if seed is not None else date.toordinal())
+    names = symbols(n_symbols)
+    base = np.random.default_rng(0).uniform(100, 5000, len(names))
+    base[:2] = [24500, 52000][:min(2, len(names))]
+    drift = 1 + 0.002 * np.sin(date.toordinal() / 7 + np.arange(len(names)))
+    spot = np.round(base * drift, 2)
+    lots = np.random.default_rng(1).choice([25, 50, 75, 125, 250, 500, 1000, 1500], len(names))
+    lots[:2] = [75, 30][:min(2, len(names))]
+
+    frames = []
+    offsets = np.arange(-strikes_per_side, strikes_per_side + 1)
+    for expiry in expiries_for(date, n_expiries):
+        tag = f'{expiry:%y}{MONTHS[expiry.month - 1]}'
+        # Futures: one row per symbol
+        frames.append(pd.DataFrame({
+            'TckrSymb': names,
+            'FinInstrmTp': ['IDF' if s in ('NIFTY', 'BANKNIFTY') else 'STF' for s in names],
+            'XpryDt': f'{expiry:%Y-%m-%d}',
+            'StrkPric': np.nan,
+            'OptnTp': None,
+            'FinInstrmNm': [f'{s}{tag}FUT' for s in names],
+            'UndrlygPric': spot,
+            'ClsPric': np.round(spot * 1.003, 2),
+            'NewBrdLotQty': lots,
+        }))
+        # Options: strikes on a grid around spot, CE and PE at every strike
+        step = np.where(spot > 2000, 50.0, np.where(spot > 500, 10.0, 2.5))
+        atm = np.round(spot / step) * step
+        strikes = (atm[:, None] + offsets[None, :] * step[:, None]).ravel()
+        sym_idx = np.repeat(np.arange(len(names)), len(offsets))
+        for option_type in ('CE', 'PE'):
+            strike_txt = pd.Series(strikes).map(lambda k: f'{k:g}')
+            frames.append(pd.DataFrame({
+                'TckrSymb': np.asarray(names)[sym_idx],
+                'FinInstrmTp': ['IDO' if names[i] in ('NIFTY', 'BANKNIFTY') else 'STO' for i in sym_idx],
+                'XpryDt': f'{expiry:%Y-%m-%d}',
+                'StrkPric': strikes,
+                'OptnTp': option_type,
+                'FinInstrmNm': (pd.Series(np.asarray(names)[sym_idx]) + tag + strike_txt + option_type).to_numpy(),
+                'UndrlygPric': spot[sym_idx],
+                'ClsPric': np.round(np.abs(spot[sym_idx] - strikes) * 0.1 + 1, 2),
+                'NewBrdLotQty': lots[sym_idx],
+            }))
+
+    data = pd.concat(frames, ignore_index=True)
+    n = len(data)
+    data['OpnIntrst'] = rng.integers(0, 500, n) * data['NewBrdLotQty']
+    data['ChngInOpnIntrst'] = rng.integers(-100, 100, n) * data['NewBrdLotQty']
+    data['TtlTradgVol'] = rng.integers(0, 2000, n)
+    data['SttlmPric'] = data['ClsPric']
+    data['TradDt'] = f'{date:%Y-%m-%d}'
+    data['BizDt'] = f'{date:%Y-%m-%d}'
+    data['Sgmt'] = 'FO'
+    data['Src'] = 'NSE'
+    columns = [
+        'TradDt', 'BizDt', 'Sgmt', 'Src', 'FinInstrmTp', 'TckrSymb', 'XpryDt',
+        'StrkPric', 'OptnTp', 'FinInstrmNm', 'ClsPric', 'UndrlygPric', 'SttlmPric',
+        'OpnIntrst', 'ChngInOpnIntrst', 'TtlTradgVol', 'NewBrdLotQty',
+    ]
+    return data[columns]
+
+
+def fixture_fetcher(n_symbols=200, **kwargs):
+    """A drop-in ``fetcher`` for ``BhavcopyStore`` that never touches the network."""
+    def fetch(date):
+        if pd.Timestamp(date).weekday() >= 5:
+            raise ValueError(f'No bhavcopy for {date}')
+        return make_bhavcopy(date, n_symbols=n_symbols, **kwargs)
+    return fetch
+
+
+def make_atm_pos(n_rows=50000, seed=0):
+    """Parsed POS frame in the layout read by the AT Money Position page.
+
+    About one row in 25 is a futures ('FF') row; every Scrip has options
+    around its future's LTP, and a few Scrips have options but no future.
+    """
+    rng = np.random.default_rng(seed)
+    n_scrips = max(n_rows // 25, 1)
+    scrips = np.array([f'STK{i:04d}' for i in range(n_scrips)])
+    ltp = np.round(rng.uniform(100, 5000, n_scrips), 2)
+
+    # Futures: one per Scrip except the last few
+    with_fut = np.arange(n_scrips)[: max(n_scrips - 3, 1)]
+    fut = pd.DataFrame({
+        'Scrip': scrips[with_fut],
+        'Call/Put': 'FF',
+        'Exp Date': '28-Aug-2025',
+        'STK': 0.0,
+        'LTP': ltp[with_fut],
+    })
+
+    n_opt = n_rows - len(fut)
+    idx = rng.integers(0, n_scrips, n_opt)
+    step = np.where(ltp[idx] > 2000, 50.0, np.where(ltp[idx] > 500, 10.0, 2.5))
+    strikes = np.round(ltp[idx] / step) * step + rng.integers(-10, 11, n_opt) * step
+    opt = pd.DataFrame({
+        'Scrip': scrips[idx],
+        'Call/Put': rng.choice(['CE', 'PE'], n_opt),
+        'Exp Date': '28-Aug-2025',
+        'STK': strikes,
+        'LTP': np.round(rng.uniform(0.5, 200, n_opt), 2),
+    })
+
+    data = pd.concat([fut, opt], ignore_index=True).sample(frac=1, random_state=seed).reset_index(drop=True)
+    data['BF Qty'] = rng.integers(-20, 21, len(data)) * 25
+    data['Net Qty'] = rng.integers(-20, 21, len(data)) * 25
+    return data
+
+
+def make_position_pos(n_rows=50000, seed=0, mismatch_rate=0.05):
+    """Raw POS sheet as ``pd.read_excel`` returns it for position matching.
+
+    Columns are positional (``'Unnamed: N'``) except the strike column,
+    which carries the sheet title ``'COMBINED NET POSITION'``. A few header
+    and total rows without CE/PE/FX cells are mixed in, as in real files.
+    Most strikes are hedged (CE and PE cancel, FX offsets CE); about
+    ``mismatch_rate`` of the legs are left unbalanced.
+    """
+    rng = np.random.default_rng(seed)
+    legs_per_strike = 2
+    n_strikes = max(n_rows // (legs_per_strike + 0.1), 1)
+    n_stocks = max(int(n_strikes // 10), 1)
+    stocks = np.array([f'STK{i:04d}' for i in range(n_stocks)])
+
+    stock_idx = np.sort(rng.integers(0, n_stocks, int(n_strikes)))
+    strikes = np.round(rng.uniform(100, 5000, len(stock_idx)) / 10) * 10
+    qty = rng.integers(1, 40, len(stock_idx)) * 25
+
+    ce_qty = qty.copy()
+    pe_qty = -qty.copy()
+    broken = rng.random(len(qty)) < mismatch_rate
+    pe_qty[broken] += rng.choice([-25, 25], broken.sum())
+
+    legs = pd.DataFrame({
+        'stock': np.concatenate([stocks[stock_idx], stocks[stock_idx]]),
+        'strike': np.concatenate([strikes, strikes]),
+        'type': ['CE'] * len(qty) + ['PE'] * len(qty),
+        'qty': np.concatenate([ce_qty, pe_qty]),
+    })
+    # One futures row per stock, offsetting its CE quantity
+    ce_by_stock = legs[legs['type'] == 'CE'].groupby('stock')['qty'].sum()
+    fx = pd.DataFrame({
+        'stock': ce_by_stock.index,
+        'strike': 0.0,
+        'type': 'FX',
+        'qty': -ce_by_stock.to_numpy(),
+    })
+    fx_broken = rng.random(len(fx)) < mismatch_rate
+    fx.loc[fx_broken, 'qty'] += 25
+    legs = pd.concat([legs, fx], ignore_index=True).sort_values(['stock', 'type', 'strike'], kind='stable')
+
+    n = len(legs)
+    columns = {f'Unnamed: {i}': np.zeros(n) for i in range(18)}
+    columns['Unnamed: 0'] = legs['stock'].to_numpy()
+    columns['Unnamed: 1'] = '28-Aug-2025'
+    columns['Unnamed: 2'] = legs['stock'].to_numpy()
+    columns['Unnamed: 3'] = legs['strike'].to_numpy()
+    columns['Unnamed: 7'] = legs['type'].to_numpy()
+    columns['Unnamed: 9'] = legs['qty'].to_numpy()
+    columns['Unnamed: 11'] = np.round(rng.uniform(1, 500, n), 2)
+    columns['Unnamed: 15'] = np.round(np.abs(legs['qty'].to_numpy()) * rng.uniform(100, 5000, n), 2)
+    columns['Unnamed: 17'] = np.round(rng.normal(0, 20000, n), 2)
+    body = pd.DataFrame(columns)
+
+    header = pd.DataFrame([{f'Unnamed: {i}': f'col{i}' for i in range(18)}])
+    total = pd.DataFrame([{'Unnamed: 0': 'TOTAL', 'Unnamed: 9': body['Unnamed: 9'].sum()}])
+    raw = pd.concat([header, body, total], ignore_index=True)
+    return raw.rename(columns={'Unnamed: 3': 'COMBINED NET POSITION'})
+
+
+def write_atm_pos_excel(path, n_rows=50000, seed=0):
+    """Write ``make_atm_pos`` as the POS workbook the AT Money Position page reads.
+
+    Row 1 holds a title, row 2 the column names and column A a serial
+    number, matching ``pd.read_excel(file, header=1, index_col=0)``.
+    """
+    data = make_atm_pos(n_rows, seed=seed)
+    data.index = pd.RangeIndex(1, len(data) + 1, name='Sr')
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        data.to_excel(writer, startrow=1)
+        writer.sheets['Sheet1']['A1'] = 'NET POSITION REPORT'
+    return path
+
+
+def write_position_pos_excel(path, n_rows=50000, seed=0, mismatch_rate=0.05):
+    """Write ``make_position_pos`` as the POS workbook the position matching page reads.
+
+    The header row is blank except for the 'COMBINED NET POSITION' title in
+    column D, so ``pd.read_excel`` names the other columns ``'Unnamed: N'``.
+    """
+    raw = make_position_pos(n_rows, seed=seed, mismatch_rate=mismatch_rate)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        raw.to_excel(writer, header=False, index=False, startrow=1)
+        writer.sheets['Sheet1']['D1'] = 'COMBINED NET POSITION'
+    return path
+
+
+BOX_STRIKES = {'NIFTY': (24500, 50), 'BANKNIFTY': (52000, 100), 'FINNIFTY': (23500, 50)}
+
+
+def write_box_log(path, n_lines=100000, trade_rate=0.05, instruments=('NIFTY',), seed=0):
+    """Write an ALGOTRADE-style box strategy log to ``path``.
+
+    About ``trade_rate`` of the lines are confirmed box trades; the rest are
+    status chatter and unconfirmed ALGOTRADE messages, like a real session.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2025-08-01 09:15:00')
+    seconds = np.sort(rng.integers(0, 6 * 3600 + 15 * 60, n_lines))
+    is_trade = rng.random(n_lines) < trade_rate
+    is_algo_noise = rng.random(n_lines) < 0.3
+    instrument = rng.choice(list(instruments), n_lines)
+    width = rng.choice([1, 2, 4, 8], n_lines)
+    qty = rng.integers(-10, 11, n_lines)
+    qty[qty == 0] = 1
+    asked = np.round(rng.uniform(-2, 2, n_lines) + width * 50, 2)
+    traded = np.round(asked + rng.normal(0, 0.5, n_lines), 2)
+    option_type = rng.choice(['CE', 'PE'], n_lines)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('date,status,type,message\n')
+        for i in range(n_lines):
+            stamp = (start + pd.Timedelta(seconds=int(seconds[i]))).strftime('%Y-%m-%d %H:%M:%S')
+            if is_trade[i]:
+                name = instrument[i]
+                base, step = BOX_STRIKES[name]
+                itm = base + int(rng.integers(-5, 6)) * step
+                message = (f'BOX {name}25AUG-{itm}-{itm + width[i] * step}{option_type[i]} Strategy Trade '
+                           f'Confirmed Qty {qty[i]} @ {traded[i]:.2f} [Parity Was {asked[i]:.2f}]')
+                f.write(f'{stamp},OK,ALGOTRADE,{message}\n')
+            elif is_algo_noise[i]:
+                f.write(f'{stamp},OK,ALGOTRADE,BOX {instrument[i]}25AUG order sent awaiting confirmation\n')
+            else:
+                f.write(f'{stamp},OK,INFO,heartbeat latency {int(seconds[i]) % 97} ms\n')
+    return path
+
+
+def make_option_chain_payload(symbol, strikes_per_side=20, expiry='28-Aug-2025', seed=None):
+    """NSE option-chain API payload (``records.data`` layout) for one symbol."""
+    rng = np.random.default_rng(seed if seed is not None else sum(map(ord, symbol)))
+    spot = round(float(rng.uniform(100, 5000)), 2)
+    step = 50.0 if spot > 2000 else 10.0 if spot > 500 else 2.5
+    atm = round(spot / step) * step
+    lot = int(rng.choice([25, 50, 75, 125, 250, 500]))
+    data = []
+    for k in range(-strikes_per_side, strikes_per_side + 1):
+        strike = atm + k * step
+        item = {'strikePrice': strike, 'expiryDates': expiry}
+        for side in ('CE', 'PE'):
+            intrinsic = max(spot - strike, 0) if side == 'CE' else max(strike - spot, 0)
+            item[side] = {
+                'strikePrice': strike,
+                'expiryDate': expiry,
+                'underlying': symbol,
+                'openInterest': int(rng.integers(0, 5000)),
+                'changeinOpenInterest': int(rng.integers(-500, 500)),
+                'totalTradedVolume': int(rng.integers(0, 20000)),
+                'impliedVolatility': round(float(rng.uniform(10, 60)), 2),
+                'lastPrice': round(intrinsic + float(rng.uniform(0.5, 30)), 2),
+                'change': round(float(rng.normal(0, 5)), 2),
+                'buyQuantity1': lot * int(rng.integers(1, 10)),
+                'buyPrice1': round(intrinsic + 1, 2),
+                'sellPrice1': round(intrinsic + 1.5, 2),
+                'sellQuantity1': lot * int(rng.integers(1, 10)),
+                'underlyingValue': spot,
+            }
+        data.append(item)
+    return {'records': {'timestamp': '01-Aug-2025 15:30:00', 'underlyingValue': spot,
+                        'expiryDates': [expiry], 'data': data}}
+
+
+class SyntheticSource(DataSource):
+    """A ``core.data_sources`` backend serving the generators above."""
+
+    def __init__(self, n_symbols=200, **kwargs):
+        self.n_symbols = n_symbols
+        self.fetch_bhavcopy = fixture_fetcher(n_symbols, **kwargs)
+
+    def bhavcopy(self, date):
+        return self.fetch_bhavcopy(date)
+
+    def equity_list(self):
+        return symbols(self.n_symbols)[2:]
+
+    def option_chain(self, symbol, expiry=None):
+        return make_option_chain_payload(symbol)
@@ -0,0 +1 @@
+"""Shared, UI-free building blocks used by the Streamlit pages."""
@@ -0,0 +1,39 @@
+"""At-the-money option legs from a POS file."""
+from core.perf import timed
+from core.pos_schema import FUTURES
+
+# Output columns under the net position report's headers
+ATM_COLUMNS = ['Scrip', 'Call/Put', 'Exp Date', 'STK', 'Net Qty']
+ATM_FIELDS = {'stock': 'Scrip', 'type': 'Call/Put', 'expiry': 'Exp Date', 'strike': 'STK', 'qty': 'Net Qty'}
+# Fields the AT Money Position page reads from the POS file
+POS_FIELDS = ['stock', 'type', 'expiry', 'strike', 'ltp', 'bf_qty', 'qty']
+
+
+@timed('atm.find_positions')
+def find_atm_positions(data, atm_range):
+    """Option legs struck within ``atm_range`` of their future's LTP.
+
+    ``data`` holds ``core.pos_schema`` positions. Only the in-the-money side
+    counts: calls below the LTP and puts above it. The LTP is the first
+    futures row for the same stock. Returns the ``ATM_COLUMNS`` of the
+    matching legs in file order.
+    """
+    fut = data[data['type'] == FUTURES]
+    opt = data[data['type'] != FUTURES]
+
+    # One LTP per stock, taken from its first futures row
+    fut_ltp = (
+        fut[['stock', 'ltp']]
+        .dropna(subset=['stock'])
+        .drop_duplicates(subset='stock')
+        .rename(columns={'ltp': 'fut_ltp'})
+    )
+    opt = opt.merge(fut_ltp, on='stock', how='inner', validate='many_to_one')
+
+    strike = opt['strike']
+    ltp = opt['fut_ltp']
+    near = (strike - ltp).abs() < atm_range
+    itm = ((strike < ltp) & (opt['type'] == 'CE')) | ((strike > ltp) & (opt['type'] == 'PE'))
+
+    atm = opt.loc[near & itm, list(ATM_FIELDS)].rename(columns=ATM_FIELDS)
+    return atm.reset_index(drop=True)
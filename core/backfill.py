@@ -0,0 +1,153 @@
+"""Concurrent backfill of the local bhavcopy store for a date range.
+
+Only NSE trading sessions are requested. Missing days are fetched on a
+bounded thread pool; every request to the same host passes through one rate
+limiter, and failed fetches are retried with exponential backoff, except
+for days NSE has not published (yet), which no retry will bring. Each day
+ends up with a ``DayResult`` so callers can show what happened instead of
+silently skipping it; days that failed or came back empty are remembered
+for ``NEGATIVE_TTL`` seconds so page reruns do not request them again.
+"""
+import concurrent.futures
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from core.perf import in_context
+from core.trading_calendar import get_calendar
+
+NSE_HOST = 'nsearchives.nseindia.com'
+
+# status is one of 'cached', 'fetched', 'empty' or 'failed'
+DayResult = namedtuple('DayResult', ['date', 'status', 'attempts', 'error'])
+
+NEGATIVE_TTL = 300
+
+
+def trading_days(start, end):
+    """Trading sessions between ``start`` and ``end`` (inclusive) as dates."""
+    return get_calendar().sessions_between(start, end)
+
+
+class RateLimiter:
+    """Spaces out calls so no more than ``rate`` start per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(host, rate):
+    # One limiter per host is shared by every backfill in the process
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = RateLimiter(rate)
+        return _limiters[host]
+
+
+def not_published(error):
+    """Whether ``error`` means the day is not available, so retrying cannot help.
+
+    nselib raises FileNotFoundError (or its own NSEdataNotFound) for a day
+    NSE has not published; a LookupError is e.g. a fixture that was never
+    recorded.
+    """
+    return isinstance(error, (FileNotFoundError, LookupError)) or type(error).__name__ == 'NSEdataNotFound'
+
+
+def fetch_day(store, date, limiter, retries=3, backoff=1.0):
+    attempts = 0
+    while True:
+        attempts += 1
+        limiter.wait()
+        try:
+            data = store.fetch(date)
+        except Exception as e:
+            if attempts > retries or not_published(e):
+                return DayResult(date, 'failed', attempts, f'{type(e).__name__}: {e}')
+            time.sleep(backoff * 2 ** (attempts - 1))
+            continue
+        status = 'empty' if data.empty else 'fetched'
+        return DayResult(date, status, attempts, None)
+
+
+_unavailable = {}
+_unavailable_lock = threading.Lock()
+
+
+def _remembered(store, date):
+    with _unavailable_lock:
+        entry = _unavailable.get((store.root, date))
+        if entry is None:
+            return None
+        if entry[0] > time.monotonic():
+            return entry[1]._replace(attempts=0)
+        del _unavailable[(store.root, date)]
+        return None
+
+
+def _remember(store, result):
+    if result.status in ('empty', 'failed'):
+        with _unavailable_lock:
+            _unavailable[(store.root, result.date)] = (time.monotonic() + NEGATIVE_TTL, result)
+
+
+def forget_unavailable():
+    """Drop the remembered failed / empty days, so the next backfill retries them."""
+    with _unavailable_lock:
+        _unavailable.clear()
+
+
+def backfill(store, dates, max_workers=6, rate=4.0, retries=3, backoff=1.0,
+             host=NSE_HOST, progress=None):
+    """Make sure every day in ``dates`` is in ``store``.
+
+    ``progress(done, total, result)`` is called from the calling thread after
+    each day completes, so it is safe to update Streamlit widgets from it.
+    Returns the list of ``DayResult`` in date order; a day remembered as
+    failed or empty is returned as it was, with ``attempts`` 0.
+    """
+    dates = [pd.Timestamp(d).date() for d in dates]
+    total = len(dates)
+    results = []
+
+    missing = []
+    for date in dates:
+        result = DayResult(date, 'cached', 0, None) if store.has(date) else _remembered(store, date)
+        if result is not None:
+            results.append(result)
+            if progress:
+                progress(len(results), total, result)
+        else:
+            missing.append(date)
+
+    if missing:
+        limiter = limiter_for(host, rate)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(in_context(fetch_day), store, date, limiter, retries, backoff)
+                for date in missing
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                _remember(store, result)
+                results.append(result)
+                if progress:
+                    progress(len(results), total, result)
+
+    return sorted(results, key=lambda r: r.date)
@@ -0,0 +1,173 @@
+"""On-disk F&O bhavcopy repository.
+
+Each trading day is fetched from NSE once and written as a single Parquet
+file under ``<root>/TradDt=YYYY-MM-DD/``. Later reads are served from disk and
+can be narrowed to one symbol / expiry with predicate pushdown, so reruns of
+the pages no longer download and parse the same bhavcopy again.
+"""
+import datetime
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.perf import timed
+
+DEFAULT_ROOT = os.environ.get(
+    'BHAVCOPY_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'bhavcopy'),
+)
+
+# Columns with few distinct values per day are stored as categoricals
+# (dictionary encoded in Parquet); FinInstrmNm is unique per row so it is not.
+CATEGORY_COLUMNS = [
+    'TradDt', 'BizDt', 'Sgmt', 'Src', 'FinInstrmTp', 'TckrSymb', 'SctySrs',
+    'XpryDt', 'FininstrmActlXpryDt', 'OptnTp', 'SsnId', 'Rmks',
+]
+
+# Rows are sorted on these before writing so that row-group statistics let
+# pyarrow skip everything outside the requested symbol / expiry.
+SORT_COLUMNS = ['TckrSymb', 'XpryDt']
+ROW_GROUP_SIZE = 4096
+
+
+def source_fetcher(date):
+    # The process-wide data source (live NSE, offline or replayed fixtures);
+    # imported lazily as core.data_sources builds on this module
+    from core.data_sources import get_source
+    return get_source().bhavcopy(date)
+
+
+def to_date(value):
+    # Accepts date/datetime/Timestamp objects or ISO 'YYYY-MM-DD' strings
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+def compact_dtypes(df):
+    # Numeric columns keep their width: the pages multiply volume, lot size
+    # and price together and narrower integers would overflow. Parquet's
+    # encoding already keeps them small on disk.
+    df = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+class BhavcopyStore:
+    def __init__(self, root=None, fetcher=None, filename='bhavcopy.parquet'):
+        self.root = root or DEFAULT_ROOT
+        self.fetcher = fetcher or source_fetcher
+        self.filename = filename
+        # Spans are named after the file, e.g. 'bhavcopy.read', 'aggregates.fetch'
+        self.span_prefix = os.path.splitext(filename)[0]
+
+    def path_for(self, date):
+        date = to_date(date)
+        return os.path.join(self.root, f'TradDt={date:%Y-%m-%d}', self.filename)
+
+    def has(self, date):
+        return os.path.exists(self.path_for(date))
+
+    def cached_dates(self):
+        if not os.path.isdir(self.root):
+            return []
+        dates = []
+        for name in os.listdir(self.root):
+            if name.startswith('TradDt=') and os.path.exists(os.path.join(self.root, name, self.filename)):
+                dates.append(to_date(name.split('=', 1)[1]))
+        return sorted(dates)
+
+    def fetch(self, date):
+        """Download one day from the source and persist it. Returns the frame."""
+        date = to_date(date)
+        with timed(f'{self.span_prefix}.fetch') as span:
+            data = self.fetcher(date)
+            span.record(rows_out=0 if data is None else len(data))
+        if data is None or data.empty:
+            # Nothing is written so the day is retried on the next request
+            return pd.DataFrame() if data is None else data
+        data = compact_dtypes(data)
+        sort_cols = [c for c in SORT_COLUMNS if c in data.columns]
+        if sort_cols:
+            data = data.sort_values(sort_cols, kind='stable').reset_index(drop=True)
+        self._write(date, data)
+        return data
+
+    def _write(self, date, data):
+        path = self.path_for(date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial file
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression='zstd')
+        os.replace(tmp_path, path)
+
+    def read(self, date, symbol=None, expiry=None, columns=None):
+        """Return the bhavcopy for ``date``, fetching and caching it on a miss.
+
+        ``symbol`` and ``expiry`` (``'YYYY-MM-DD'``) are pushed down to the
+        Parquet reader so only the matching row groups are decoded.
+        """
+        with timed(f'{self.span_prefix}.read') as span:
+            if self.has(date):
+                span.record(cache='hit')
+            else:
+                span.record(cache='miss')
+                data = self.fetch(date)
+                if data.empty:
+                    return data
+            data = self._read_file(date, symbol, expiry, columns)
+            span.record(rows_out=len(data), bytes=os.path.getsize(self.path_for(date)))
+            return data
+
+    def _read_file(self, date, symbol, expiry, columns):
+        filters = []
+        if symbol is not None:
+            filters.append(('TckrSymb', symbol))
+        if expiry is not None:
+            filters.append(('XpryDt', expiry))
+
+        parquet_file = pq.ParquetFile(self.path_for(date))
+        read_columns = columns
+        if columns is not None:
+            read_columns = list(columns) + [col for col, _ in filters if col not in columns]
+        row_groups = _matching_row_groups(parquet_file, filters)
+        table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+
+        # Row groups are only pruned by min/max, so finish the filter on the
+        # Arrow table before anything is converted to pandas
+        for col, value in filters:
+            table = table.filter(pc.equal(table[col].cast(pa.string()), value))
+        if columns is not None:
+            # Filter-only columns are not converted
+            table = table.select(list(columns))
+        return table.to_pandas()
+
+
+def _matching_row_groups(parquet_file, filters):
+    # pyarrow does not prune dictionary-encoded columns by statistics on its
+    # own, so compare each row group's min/max against the requested values.
+    metadata = parquet_file.metadata
+    names = parquet_file.schema_arrow.names
+    matching = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        keep = True
+        for col, value in filters:
+            if col not in names:
+                continue
+            stats = row_group.column(names.index(col)).statistics
+            if stats is not None and stats.has_min_max and not (stats.min <= value <= stats.max):
+                keep = False
+                break
+        if keep:
+            matching.append(i)
+    return matching
@@ -0,0 +1,189 @@
+"""Streaming parser for box-strategy trade logs.
+
+The log is read in chunks. Each chunk is narrowed to ``ALGOTRADE`` rows
+before the trade-confirmation regex runs, and its totals are added to a
+running summary, so only one chunk of raw log lines is held at a time.
+
+The confirmed trades themselves are kept, since the page lists them and
+plots their parity. Each chunk's trades are stored with their repeated
+strings as categoricals, so what is retained grows with the number of
+trades (a few percent of a log's lines), not with the size of the log.
+"""
+import re
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from core.lot_sizes import get_registry
+from core.perf import timed
+
+LOG_COLUMNS = ['date', 'status', 'type', 'message']
+CHUNK_LINES = 100_000
+
+TRADE_PATTERN = re.compile(
+    r"BOX\s+(\w+\d*)-(\d+)-(\d+)(CE|PE)\s+Strategy\s+Trade\s+Confirmed\s+Qty\s+([-+]?\d+)\s+@\s+([-+]?\d*\.\d+|\d+)\s+\[Parity\s+Was\s+([-+]?\d*\.\d+|\d+)"
+)
+TRADE_FIELDS = ['expiry', 'itm_stk', 'counter', 'option_type', 'open_cls', 'traded_parity', 'asked_parity']
+
+SUMMARY_COLUMNS = [
+    'box_size', 'total_trades', 'correct_trades', 'wrong_trades',
+    'positive_alpha', 'negative_alpha', 'net_alpha', 'gross_flow'
+]
+
+TRADE_COLUMNS = LOG_COLUMNS + TRADE_FIELDS + [
+    'box_size', 'parity_diff', 'pnl', 'wrong_right', 'gross_flow', 'instrument', 'lot_size', 'hour'
+]
+
+# Repeated strings of the kept trades, stored as categoricals
+TRADE_CATEGORIES = ['status', 'type', 'expiry', 'option_type', 'wrong_right', 'instrument']
+
+# The instrument is the leading capitals of the expiry string, e.g. NIFTY25AUG
+INSTRUMENT_PATTERN = re.compile(r'([A-Z]+)')
+
+
+def parse_trades(chunk, registry):
+    """Confirmed box trades in one chunk of log lines.
+
+    Every trade is priced with the lot size ``registry`` has for its own
+    instrument on its trade date. Raises ``ValueError`` for instruments
+    without a known lot size.
+    """
+    chunk.columns = LOG_COLUMNS
+    df = chunk[chunk['type'] == 'ALGOTRADE']
+    if df.empty:
+        return df.reindex(columns=TRADE_COLUMNS)
+
+    df_extracted = df['message'].str.extract(TRADE_PATTERN)
+    df_extracted.columns = TRADE_FIELDS
+    df = pd.concat([df, df_extracted], axis=1)
+
+    # Clean numeric data
+    for col in ['open_cls', 'itm_stk', 'counter', 'traded_parity', 'asked_parity']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df.dropna(subset=['expiry', 'open_cls', 'itm_stk', 'counter', 'traded_parity', 'asked_parity'])
+    df = df[df['asked_parity'] < 5000].copy()
+
+    df['box_size'] = abs(df['itm_stk'] - df['counter'])
+    df['parity_diff'] = (df['traded_parity'] - df['asked_parity'])*abs(df['open_cls'])
+    df['wrong_right'] = df['traded_parity'] > df['asked_parity']
+    df['wrong_right'] = df['wrong_right'].map({True: 'right', False: 'wrong'})
+
+    df['instrument'] = df['expiry'].str.extract(INSTRUMENT_PATTERN, expand=False)
+    traded_at = pd.to_datetime(df['date'], errors='coerce')
+    df['hour'] = traded_at.dt.hour
+    df['lot_size'] = registry.lookup(df['instrument'], traded_at.dt.normalize())
+    unknown = df.loc[df['lot_size'].isna(), 'expiry'].unique()
+    if len(unknown):
+        raise ValueError(f"Unknown instrument in expiry string: {', '.join(map(str, unknown))}")
+
+    df['pnl'] = df['parity_diff'] * df['lot_size']
+    df['gross_flow'] = df['traded_parity'] * abs(df['open_cls']) * df['lot_size']
+    return df[TRADE_COLUMNS]
+
+
+def compact_trades(trades):
+    """``trades`` with the ``TRADE_CATEGORIES`` columns as categoricals."""
+    return trades.astype({col: 'category' for col in TRADE_CATEGORIES})
+
+
+def concat_trades(chunks):
+    """One frame of compacted trade chunks, keeping the categoricals."""
+    # pd.concat turns categoricals whose categories differ back into strings
+    categories = {
+        col: union_categoricals([chunk[col].array for chunk in chunks]).categories
+        for col in TRADE_CATEGORIES
+    }
+    return pd.concat([
+        chunk.assign(**{col: chunk[col].cat.set_categories(cats) for col, cats in categories.items()})
+        for chunk in chunks
+    ])
+
+
+# Dimensions the running totals are kept at; any roll-up of them (box size,
+# hour, expiry, ...) is a sum over this small cube, not a rescan of trades
+BREAKDOWN_DIMENSIONS = ['instrument', 'box_size', 'expiry', 'option_type', 'hour']
+
+
+class BoxSummary:
+    """Running totals per instrument, box size, expiry, option type and hour.
+
+    Each chunk of trades goes through one ``groupby`` with named
+    aggregations; the results are added to the running cube.
+    """
+
+    def __init__(self):
+        self.totals = None
+
+    def update(self, trades):
+        if trades.empty:
+            return
+        qty = trades['open_cls'].abs()
+        right = trades['wrong_right'] == 'right'
+        parts = pd.DataFrame({
+            'instrument': trades['instrument'],
+            'box_size': trades['box_size'],
+            'expiry': trades['expiry'],
+            'option_type': trades['option_type'],
+            'hour': trades['hour'],
+            'qty': qty,
+            'right_qty': qty.where(right, 0),
+            'wrong_qty': qty.where(~right, 0),
+            'right_alpha': trades['pnl'].where(right, 0),
+            'wrong_alpha': trades['pnl'].where(~right, 0),
+            'gross_flow': trades['gross_flow'],
+        })
+        chunk_totals = parts.groupby(BREAKDOWN_DIMENSIONS, dropna=False).agg(
+            total_trades=('qty', 'sum'),
+            correct_trades=('right_qty', 'sum'),
+            wrong_trades=('wrong_qty', 'sum'),
+            positive_alpha=('right_alpha', 'sum'),
+            negative_alpha=('wrong_alpha', 'sum'),
+            gross_flow=('gross_flow', 'sum'),
+        )
+        if self.totals is None:
+            self.totals = chunk_totals
+        else:
+            self.totals = self.totals.add(chunk_totals, fill_value=0)
+
+    def breakdown(self, by=BREAKDOWN_DIMENSIONS):
+        """Summary columns aggregated over the ``by`` dimensions."""
+        columns = list(by) + SUMMARY_COLUMNS[1:]
+        if self.totals is None:
+            return pd.DataFrame(columns=columns)
+        totals = self.totals.groupby(level=list(by), dropna=False).sum().reset_index()
+        totals['net_alpha'] = totals['positive_alpha'] + totals['negative_alpha']
+        return totals[columns]
+
+    def result(self):
+        """The per-instrument, per-box-size summary table shown on the page."""
+        return self.breakdown(by=['instrument', 'box_size'])
+
+
+@timed('box_log.parse')
+def parse_box_log(file, registry=None, chunksize=CHUNK_LINES):
+    """Return ``(df_traded, df_summary, df_breakdown)`` for a box-strategy log.
+
+    ``df_summary`` has one row per instrument and box size; ``df_breakdown``
+    has the same columns per instrument, box size, expiry, option type and
+    hour of day. Logs may mix instruments and expiries.
+
+    ``file`` is a path or binary file object. ``registry`` defaults to the
+    process-wide lot-size registry. Raises ``ValueError`` when an instrument
+    in an expiry string has no known lot size.
+    """
+    if registry is None:
+        registry = get_registry()
+    summary = BoxSummary()
+    trade_chunks = []
+    reader = pd.read_csv(file, chunksize=chunksize, dtype=str, on_bad_lines='skip', encoding='utf-8')
+    for chunk in reader:
+        trades = parse_trades(chunk, registry)
+        if not trades.empty:
+            summary.update(trades)
+            trade_chunks.append(compact_trades(trades))
+
+    if not trade_chunks:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    df = concat_trades(trade_chunks)
+    return df, summary.result(), summary.breakdown()
@@ -0,0 +1,116 @@
+"""Keeping large Plotly figures small and building them once.
+
+Every rerun used to rebuild each figure with Plotly Express and send all
+of its rows to the browser: the animated strike bar of the trend tab held
+every strike of every day, and the M2M bar every futures position. The
+helpers here cut a frame down to what a chart can show (a window of
+strikes around ATM, an evenly spaced subset of animation frames, the
+largest losses and gains) before it is plotted.
+
+``cached_figure`` keeps built figures in a process-wide LRU keyed by the
+caller's parameters and a hash of the plotted frame, so a rerun whose
+inputs did not change skips Plotly Express and only serializes the figure.
+Cached figures are shared by every session and must not be modified.
+
+Plotly has no WebGL bar or heatmap traces, and ``px.line`` / ``px.scatter``
+already switch to WebGL above 1000 points, so these charts keep their SVG
+traces and are made cheaper by sending fewer points instead.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from core.perf import timed
+from core.shared_cache import LRUCache
+
+# Upper bounds on what is sent to the browser per chart
+MAX_STRIKES = 40
+MAX_FRAMES = 60
+MAX_BARS = 60
+
+FIGURE_CACHE_SIZE = 32
+
+
+def strike_window(strikes, center=None, max_strikes=MAX_STRIKES):
+    """``(start, stop)`` of the ``max_strikes`` sorted strikes nearest ``center``.
+
+    The window is centred in the strike range when ``center`` is ``None``
+    and shifted inwards at either end of it.
+    """
+    if len(strikes) <= max_strikes:
+        return 0, len(strikes)
+    if center is None or pd.isna(center):
+        start = (len(strikes) - max_strikes) // 2
+    else:
+        nearest = int(np.abs(np.asarray(strikes, dtype=float) - center).argmin())
+        start = min(max(nearest - max_strikes // 2, 0), len(strikes) - max_strikes)
+    return start, start + max_strikes
+
+
+def clip_strikes(frame, center=None, max_strikes=MAX_STRIKES, column='StrkPric'):
+    """Rows of ``frame`` whose strike is among the ``max_strikes`` nearest ``center``."""
+    strikes = np.unique(frame[column].to_numpy(dtype=float))
+    start, stop = strike_window(strikes, center, max_strikes)
+    if stop - start == len(strikes):
+        return frame
+    return frame[frame[column].between(strikes[start], strikes[stop - 1])]
+
+
+def sample_frames(frame, column, max_frames=MAX_FRAMES):
+    """Rows of at most ``max_frames`` evenly spaced values of ``column``.
+
+    The first and last values are always kept, so an animation still spans
+    the whole period.
+    """
+    values = np.sort(frame[column].unique())
+    if len(values) <= max_frames:
+        return frame
+    keep = values[np.unique(np.linspace(0, len(values) - 1, max_frames).round().astype(int))]
+    return frame[frame[column].isin(keep)]
+
+
+def day_labels(dates, fmt='%d-%m-%Y'):
+    """A Series of dates formatted as ``fmt``, parsing and formatting each distinct day once."""
+    codes, days = pd.factorize(dates.astype(str))
+    return pd.Series(pd.to_datetime(days).strftime(fmt).to_numpy()[codes], index=dates.index)
+
+
+def extremes(frame, column, max_bars=MAX_BARS):
+    """The ``max_bars // 2`` lowest and highest rows of ``frame`` by ``column``, in order."""
+    ordered = frame.sort_values(column)
+    if len(ordered) <= max_bars:
+        return ordered
+    return pd.concat([ordered.head(max_bars // 2), ordered.tail(max_bars - max_bars // 2)])
+
+
+def frame_digest(frame):
+    """Content hash of a frame's columns, index and values."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+_figures = LRUCache(FIGURE_CACHE_SIZE)
+
+
+def clear_cache():
+    _figures.clear()
+
+
+def cached_figure(key, frame, build):
+    """``build(frame)``, reused while ``key`` and the content of ``frame`` are unchanged.
+
+    ``key`` holds every other input of the figure (chart name, title,
+    labels...). Two sessions missing at once may both build; the last one
+    is kept.
+    """
+    full_key = (key, frame_digest(frame))
+    fig = _figures.get(full_key)
+    with timed('charts.figure') as span:
+        span.record(rows_in=len(frame), cache='miss' if fig is None else 'hit')
+        if fig is None:
+            fig = build(frame)
+            _figures.put(full_key, fig)
+    return fig
@@ -0,0 +1,155 @@
+"""Daily F&O aggregates per symbol, expiry, strike and option type.
+
+Each trading day is reduced once to one row per (symbol, expiry, strike,
+option type) carrying the traded value under every metric, OI, change in
+OI and the futures close of that expiry. The rows are stored as a Parquet
+file per day next to the raw bhavcopies and built the first time a day is
+asked for, so a new day only aggregates that day. Trend charts read a small
+slice per symbol and switching the metric only picks another column.
+"""
+import os
+import threading
+
+import pandas as pd
+
+from core.bhavcopy_store import DEFAULT_ROOT as BHAVCOPY_ROOT
+from core.bhavcopy_store import BhavcopyStore, to_date
+from core.perf import timed
+from core.shared_cache import LRUCache
+
+# Bump when the aggregate columns change so old files are not reused
+AGGREGATE_VERSION = 1
+DEFAULT_ROOT = os.path.join(os.path.dirname(BHAVCOPY_ROOT), f'daily_aggregates_v{AGGREGATE_VERSION}')
+
+KEY_COLUMNS = ['TckrSymb', 'XpryDt', 'StrkPric', 'OptnTp']
+VALUE_COLUMNS = {
+    'Volume': 'value_volume',
+    'Open Interest': 'value_oi',
+    'Change in OI': 'value_chng_oi',
+}
+AGGREGATE_COLUMNS = (
+    ['TradDt'] + KEY_COLUMNS + list(VALUE_COLUMNS.values())
+    + ['OpnIntrst', 'ChngInOpnIntrst', 'fut_close']
+)
+
+# Slices kept in memory, keyed by (symbol, expiry)
+SLICE_CACHE_SIZE = 32
+
+
+def calculate_traded_value(df, method):
+    if method == "Volume":
+        return df['TtlTradgVol'] * df['NewBrdLotQty'] * df['SttlmPric']
+    elif method == "Open Interest":
+        return df['OpnIntrst'] * df['SttlmPric']
+    elif method == "Change in OI":
+        return df['ChngInOpnIntrst'] * df['SttlmPric']
+    else:
+        return df['TtlTradgVol'] * df['NewBrdLotQty'] * df['SttlmPric']
+
+
+@timed('aggregates.aggregate_day')
+def aggregate_day(data, date):
+    """Reduce one day's bhavcopy to the ``AGGREGATE_COLUMNS`` layout.
+
+    ``fut_close`` is the close of the first futures row of each symbol and
+    expiry. A symbol / expiry with a future but no options keeps one row with
+    empty strike and option type so its close is not lost.
+    """
+    if data.empty:
+        return pd.DataFrame(columns=AGGREGATE_COLUMNS)
+    data = data.assign(
+        TckrSymb=data['TckrSymb'].astype(str),
+        XpryDt=data['XpryDt'].astype(str),
+    )
+    futures = data[data['FinInstrmNm'].str.contains('FUT', na=False)]
+    fut_close = (
+        futures.drop_duplicates(['TckrSymb', 'XpryDt'])
+        .set_index(['TckrSymb', 'XpryDt'])['ClsPric']
+        .rename('fut_close')
+    )
+
+    options = data.dropna(subset=['StrkPric', 'OptnTp'])
+    options = options.assign(
+        OptnTp=options['OptnTp'].astype(str),
+        **{column: calculate_traded_value(options, method) for method, column in VALUE_COLUMNS.items()},
+    )
+    aggregates = options.groupby(KEY_COLUMNS, observed=True).agg(
+        **{column: (column, 'sum') for column in VALUE_COLUMNS.values()},
+        OpnIntrst=('OpnIntrst', 'sum'),
+        ChngInOpnIntrst=('ChngInOpnIntrst', 'sum'),
+    ).reset_index()
+
+    aggregates = aggregates.merge(fut_close.reset_index(), on=['TckrSymb', 'XpryDt'], how='outer')
+    aggregates['TradDt'] = f'{to_date(date):%Y-%m-%d}'
+    return aggregates[AGGREGATE_COLUMNS]
+
+
+class DailyAggregates:
+    """Per-day aggregate files built on demand from a ``BhavcopyStore``."""
+
+    def __init__(self, source, root=None):
+        self.source = source
+        self.store = BhavcopyStore(root or DEFAULT_ROOT, fetcher=self._aggregate, filename='aggregates.parquet')
+        self.lock = threading.Lock()
+        self.slices = LRUCache(SLICE_CACHE_SIZE)
+
+    def _aggregate(self, date):
+        return aggregate_day(self.source.read(date), date)
+
+    def read_day(self, date, symbol=None, expiry=None):
+        """One day's aggregates, aggregating the stored bhavcopy on a miss."""
+        return self.store.read(date, symbol=symbol, expiry=expiry)
+
+    def read(self, dates, symbol, expiry):
+        """Aggregates of ``symbol`` / ``expiry`` for ``dates``, oldest first.
+
+        Each (symbol, expiry) slice is kept in memory and only days it does
+        not hold yet are read from disk and appended.
+        """
+        dates = sorted({to_date(d) for d in dates})
+        with timed('aggregates.slice') as span, self.lock:
+            data, loaded = self.slices.pop((symbol, expiry), (None, set()))
+            missing = [d for d in dates if d not in loaded]
+            span.record(cache='miss' if missing else 'hit')
+            frames = [self.read_day(date, symbol=symbol, expiry=expiry) for date in missing]
+            frames = [f for f in frames if not f.empty]
+            if frames:
+                new = pd.concat(frames, ignore_index=True)
+                for col in ['TradDt', 'TckrSymb', 'XpryDt', 'OptnTp']:
+                    new[col] = new[col].astype(object)
+                data = new if data is None else pd.concat([data, new], ignore_index=True)
+                data = data.sort_values('TradDt', kind='stable', ignore_index=True)
+                # Days without data are retried; they may not be published yet
+                loaded = loaded | set(to_date(d) for d in new['TradDt'].unique())
+            self.slices.put((symbol, expiry), (data, loaded))
+        if data is None:
+            return pd.DataFrame(columns=AGGREGATE_COLUMNS)
+        wanted = {f'{d:%Y-%m-%d}' for d in dates}
+        return data[data['TradDt'].isin(wanted)].reset_index(drop=True)
+
+
+@timed('aggregates.trend')
+def trend(aggregates, method):
+    """Per-day total traded value (``method``) and futures close.
+
+    Days without a futures close for the expiry are left out, as the
+    contract was not listed yet.
+    """
+    listed = aggregates[aggregates['fut_close'].notna()]
+    daily = listed.groupby('TradDt', sort=True).agg(
+        total_traded_value=(VALUE_COLUMNS[method], 'sum'),
+        daily_close=('fut_close', 'first'),
+    ).reset_index()
+    return daily.rename(columns={'TradDt': 'date'})
+
+
+@timed('aggregates.strike_values')
+def strike_values(aggregates, method):
+    """Per-strike traded value (``method``) on every listed day."""
+    listed = aggregates[aggregates['fut_close'].notna()].dropna(subset=['StrkPric', 'OptnTp'])
+    return pd.DataFrame({
+        'TradDt': listed['TradDt'],
+        'StrkPric': listed['StrkPric'],
+        'OptnTp': listed['OptnTp'],
+        'total_traded_value': listed[VALUE_COLUMNS[method]],
+    }).reset_index(drop=True)
@@ -0,0 +1,283 @@
+"""Where bhavcopies, the F&O list and option chains come from.
+
+Every remote call in the app goes through one ``DataSource``:
+
+- ``NselibSource``: live NSE (nselib for bhavcopies and the F&O list, the
+  pooled ``NseChainClient`` for option chains).
+- ``StoreSource``: offline; only what the local bhavcopy store already holds.
+- ``RecordingSource``: wraps another source and saves every response under
+  a fixture directory (Parquet for frames, gzipped JSON for the rest).
+- ``ReplaySource``: serves those fixtures back, with optional injected
+  latency, so cold and warm paths can be benchmarked or an incident
+  reproduced without the network.
+
+``get_source()`` picks the backend from ``FETCH_BACKEND`` (``live``,
+``store``, ``record`` or ``replay``), ``FETCH_FIXTURES_DIR`` and
+``FETCH_LATENCY`` (seconds per call), and wraps it in a ``SharedSource`` so
+every Streamlit session shares one single-flight response cache
+(``FETCH_SHARED_CACHE=0`` turns that off).
+"""
+import abc
+import gzip
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from core.bhavcopy_store import DEFAULT_ROOT as BHAVCOPY_ROOT
+from core.bhavcopy_store import to_date
+from core.shared_cache import Singleton, get_shared_cache
+
+DEFAULT_FIXTURES_DIR = os.environ.get(
+    'FETCH_FIXTURES_DIR',
+    os.path.join(os.path.dirname(BHAVCOPY_ROOT), 'fixtures'),
+)
+BACKENDS = ['live', 'store', 'record', 'replay']
+
+
+class FixtureMissingError(LookupError):
+    """The requested response is not available from this source."""
+
+
+class DataSource(abc.ABC):
+    """Interface shared by all backends.
+
+    A backend missing any of these methods fails when it is created, not
+    part-way through a page render.
+    """
+
+    @abc.abstractmethod
+    def bhavcopy(self, date):
+        """The raw F&O bhavcopy frame for ``date``."""
+
+    @abc.abstractmethod
+    def equity_list(self):
+        """F&O equity symbols, as ``capital_market.fno_equity_list()['symbol']``."""
+
+    @abc.abstractmethod
+    def option_chain(self, symbol, expiry=None):
+        """The option-chain API payload for ``symbol``."""
+
+
+class NselibSource(DataSource):
+    def __init__(self, chain_client=None):
+        self._chain_client = chain_client
+        self.lock = threading.Lock()
+
+    def bhavcopy(self, date):
+        # Imported lazily so the app can run offline without nselib
+        from nselib import derivatives
+        return derivatives.fno_bhav_copy(to_date(date).strftime('%d-%m-%Y'))
+
+    def equity_list(self):
+        from nselib import capital_market
+        return list(capital_market.fno_equity_list()['symbol'])
+
+    def option_chain(self, symbol, expiry=None):
+        from core.scanner import NseChainClient
+        with self.lock:
+            if self._chain_client is None:
+                self._chain_client = NseChainClient()
+        return self._chain_client.option_chain(symbol, expiry)
+
+
+class StoreSource(DataSource):
+    """Offline source: nothing is fetched, only the local store is used."""
+
+    def __init__(self, store=None):
+        from core.bhavcopy_store import BhavcopyStore
+        self.store = store or BhavcopyStore(fetcher=self.bhavcopy)
+
+    def bhavcopy(self, date):
+        raise FixtureMissingError(f"{to_date(date)} is not in the local store")
+
+    def equity_list(self):
+        dates = self.store.cached_dates()
+        if not dates:
+            raise FixtureMissingError("The local store holds no bhavcopy")
+        data = self.store.read(dates[-1], columns=['TckrSymb', 'FinInstrmTp'])
+        stocks = data.loc[data['FinInstrmTp'].astype(str).isin(['STF', 'STO']), 'TckrSymb']
+        return sorted(stocks.astype(str).unique())
+
+    def option_chain(self, symbol, expiry=None):
+        raise FixtureMissingError("Option chains are not available offline")
+
+
+def _fixture_key(*parts):
+    # File-name safe: symbols such as M&M or BAJAJ-AUTO are kept readable
+    return '_'.join(re.sub(r'[^A-Za-z0-9.-]', lambda m: f'%{ord(m.group()):02X}', str(p)) for p in parts if p)
+
+
+class FixtureFiles:
+    """Compressed response files under ``root``."""
+
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_FIXTURES_DIR
+
+    def path(self, kind, key, extension):
+        return os.path.join(self.root, kind, f'{key}.{extension}')
+
+    def _replace(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def save_frame(self, kind, key, frame):
+        path = self.path(kind, key, 'parquet')
+        self._replace(path, lambda tmp: frame.to_parquet(tmp, index=False, compression='zstd'))
+
+    def load_frame(self, kind, key):
+        path = self.path(kind, key, 'parquet')
+        if not os.path.exists(path):
+            raise FixtureMissingError(f"No recorded {kind} for {key}")
+        return pd.read_parquet(path)
+
+    def save_json(self, kind, key, value):
+        def write(tmp):
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                json.dump(value, f)
+        self._replace(self.path(kind, key, 'json.gz'), write)
+
+    def load_json(self, kind, key):
+        path = self.path(kind, key, 'json.gz')
+        if not os.path.exists(path):
+            raise FixtureMissingError(f"No recorded {kind} for {key}")
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+
+class RecordingSource(DataSource):
+    """Passes calls to ``inner`` and saves each response as a fixture."""
+
+    def __init__(self, inner, root=None):
+        self.inner = inner
+        self.files = FixtureFiles(root)
+
+    def bhavcopy(self, date):
+        data = self.inner.bhavcopy(date)
+        if data is not None and not data.empty:
+            self.files.save_frame('bhavcopy', f'{to_date(date):%Y-%m-%d}', data)
+        return data
+
+    def equity_list(self):
+        symbols = self.inner.equity_list()
+        self.files.save_json('equity_list', 'fno', list(symbols))
+        return symbols
+
+    def option_chain(self, symbol, expiry=None):
+        payload = self.inner.option_chain(symbol, expiry)
+        self.files.save_json('option_chain', _fixture_key(symbol, expiry), payload)
+        return payload
+
+
+class ReplaySource(DataSource):
+    """Serves recorded fixtures, sleeping ``latency`` (+ up to ``jitter``) per call.
+
+    Jitter comes from a seeded generator so a replay is repeatable. Responses
+    that were never recorded raise ``FixtureMissingError``.
+    """
+
+    def __init__(self, root=None, latency=0.0, jitter=0.0, seed=0):
+        self.files = FixtureFiles(root)
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _wait(self):
+        with self.lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def bhavcopy(self, date):
+        self._wait()
+        return self.files.load_frame('bhavcopy', f'{to_date(date):%Y-%m-%d}')
+
+    def equity_list(self):
+        self._wait()
+        return self.files.load_json('equity_list', 'fno')
+
+    def option_chain(self, symbol, expiry=None):
+        self._wait()
+        return self.files.load_json('option_chain', _fixture_key(symbol, expiry))
+
+
+class SharedSource(DataSource):
+    """Serves ``inner``'s responses through the process-wide ``SingleFlightCache``.
+
+    Concurrent sessions asking for the same bhavcopy, F&O list or option
+    chain wait on one call to ``inner``. ``TTLS`` bounds how long a response
+    is reused: a bhavcopy only needs to outlive the burst of sessions (the
+    store keeps it on disk), option chains are live quotes. Frames are
+    returned as shallow copies so a caller's new columns stay its own.
+    """
+
+    TTLS = {'bhavcopy': 300, 'equity_list': 6 * 3600, 'option_chain': 15}
+
+    def __init__(self, inner, cache=None, ttls=None):
+        self.inner = inner
+        self.cache = cache or get_shared_cache()
+        self.ttls = dict(self.TTLS, **(ttls or {}))
+
+    def bhavcopy(self, date):
+        date = to_date(date)
+        data = self.cache.get(('bhavcopy', date), lambda: self.inner.bhavcopy(date), self.ttls['bhavcopy'])
+        return data if data is None else data.copy(deep=False)
+
+    def equity_list(self):
+        return list(self.cache.get(('equity_list',), self.inner.equity_list, self.ttls['equity_list']))
+
+    def option_chain(self, symbol, expiry=None):
+        return self.cache.get(
+            ('option_chain', symbol.upper(), expiry),
+            lambda: self.inner.option_chain(symbol, expiry),
+            self.ttls['option_chain'],
+        )
+
+
+def unshared(source):
+    """``source`` without its ``SharedSource`` layer, for callers that need fresh responses."""
+    return source.inner if isinstance(source, SharedSource) else source
+
+
+def make_source(backend='live', fixtures_dir=None, latency=0.0):
+    if backend == 'live':
+        return NselibSource()
+    if backend == 'store':
+        return StoreSource()
+    if backend == 'record':
+        return RecordingSource(NselibSource(), fixtures_dir)
+    if backend == 'replay':
+        return ReplaySource(fixtures_dir, latency=latency)
+    raise ValueError(f"Unknown fetch backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def _source_from_env():
+    source = make_source(
+        os.environ.get('FETCH_BACKEND', 'live'),
+        os.environ.get('FETCH_FIXTURES_DIR'),
+        float(os.environ.get('FETCH_LATENCY', 0)),
+    )
+    if os.environ.get('FETCH_SHARED_CACHE', '1') not in ('0', 'false', 'False'):
+        source = SharedSource(source)
+    return source
+
+
+_source = Singleton(_source_from_env)
+
+
+def get_source():
+    """Process-wide source chosen by the ``FETCH_*`` environment variables."""
+    return _source.get()
+
+
+def set_source(source):
+    """Swap the process-wide source, e.g. for a benchmark; returns the old one."""
+    return _source.set(source)
@@ -0,0 +1,157 @@
+"""Date x strike x option-type cubes for the strike heatmaps.
+
+The trend tab used to pivot every day's strike values into a wide
+(Strike, OptnTp) frame, run ``pct_change`` over all of it and slice calls
+and puts out with ``xs`` on every rerun. A ``StrikeCube`` keeps the values
+and their day-over-day % change in dense NumPy arrays indexed by sorted
+strike, appends new days without recomputing old ones, and hands
+``px.imshow`` a matrix clipped to a window around ATM.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.charts import MAX_STRIKES, strike_window
+from core.perf import timed
+from core.shared_cache import LRUCache
+
+OPTION_TYPES = ['CE', 'PE']
+
+# Upper bound on the days sent to the browser per heatmap; strikes are
+# bounded by ``core.charts.MAX_STRIKES``
+MAX_DATES = 120
+
+CUBE_CACHE_SIZE = 32
+
+
+def _pct_change(values, previous):
+    # Same as DataFrame.pct_change() without filling gaps: NaN when either
+    # side is missing, inf when the previous value is zero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (values / previous - 1) * 100
+
+
+class StrikeCube:
+    """Values and % change with shape ``(dates, strikes, len(OPTION_TYPES))``."""
+
+    def __init__(self, dates, strikes, values):
+        self.dates = np.asarray(dates, dtype=object)
+        self.strikes = np.asarray(strikes, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self.pct = np.full_like(self.values, np.nan)
+        if len(self.dates) > 1:
+            self.pct[1:] = _pct_change(self.values[1:], self.values[:-1])
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], np.empty((0, 0, len(OPTION_TYPES))))
+
+    @classmethod
+    def from_frame(cls, data, date='TradDt', value='total_traded_value'):
+        """Build from long rows of ``date``, ``StrkPric``, ``OptnTp`` and ``value``.
+
+        Duplicate (date, strike, type) rows are averaged, as ``pivot_table``
+        did.
+        """
+        data = data[data['OptnTp'].isin(OPTION_TYPES)]
+        if data.empty:
+            return cls.empty()
+        date_idx, dates = pd.factorize(data[date].astype(str), sort=True)
+        strike_idx, strikes = pd.factorize(data['StrkPric'].astype(float), sort=True)
+        type_idx = pd.Categorical(data['OptnTp'], categories=OPTION_TYPES).codes
+
+        shape = (len(dates), len(strikes), len(OPTION_TYPES))
+        flat = np.ravel_multi_index((date_idx, strike_idx, type_idx), shape)
+        totals = np.bincount(flat, weights=data[value].to_numpy(dtype=float), minlength=np.prod(shape))
+        counts = np.bincount(flat, minlength=np.prod(shape))
+        with np.errstate(invalid='ignore'):
+            values = np.where(counts > 0, totals / counts, np.nan).reshape(shape)
+        return cls(dates.to_numpy(dtype=object), strikes.to_numpy(), values)
+
+    def extend(self, other):
+        """Append the days of ``other`` after the last day held here.
+
+        Only the new days get their % change computed; earlier rows are
+        reused as they are. Strikes seen for the first time widen the cube.
+        """
+        new = other.dates > self.dates[-1] if len(self.dates) else np.ones(len(other.dates), dtype=bool)
+        if not new.any():
+            return self
+        strikes = np.union1d(self.strikes, other.strikes)
+        values = self._reindexed(self.values, self.strikes, strikes)
+        pct = self._reindexed(self.pct, self.strikes, strikes)
+        added = self._reindexed(other.values[new], other.strikes, strikes)
+
+        previous = values[-1:] if len(values) else np.full_like(added[:1], np.nan)
+        added_pct = _pct_change(added, np.concatenate([previous, added[:-1]]))
+
+        cube = StrikeCube.empty()
+        cube.dates = np.concatenate([self.dates, other.dates[new]])
+        cube.strikes = strikes
+        cube.values = np.concatenate([values, added])
+        cube.pct = np.concatenate([pct, added_pct])
+        return cube
+
+    @staticmethod
+    def _reindexed(array, strikes, target):
+        if len(strikes) == len(target):
+            return array
+        out = np.full((array.shape[0], len(target), array.shape[2]), np.nan)
+        out[:, np.searchsorted(target, strikes)] = array
+        return out
+
+    def heatmap(self, option_type, center=None, max_strikes=MAX_STRIKES, max_dates=MAX_DATES, decimals=2):
+        """% change as a strike x date frame sized for ``px.imshow``.
+
+        Keeps the latest ``max_dates`` days and the ``max_strikes`` strikes
+        nearest ``center`` (the middle of the strike range when ``None``).
+        Rows are strikes ascending and columns are dates.
+        """
+        pct = self.pct[-max_dates:, :, OPTION_TYPES.index(option_type)]
+        dates = self.dates[-max_dates:]
+        has_data = ~np.isnan(self.values[-max_dates:, :, OPTION_TYPES.index(option_type)]).all(axis=0)
+        strikes = self.strikes[has_data]
+        pct = pct[:, has_data]
+
+        start, stop = strike_window(strikes, center, max_strikes)
+        strikes = strikes[start:stop]
+        pct = pct[:, start:stop]
+
+        return pd.DataFrame(
+            np.round(pct.T, decimals),
+            index=pd.Index(strikes, name='StrkPric'),
+            columns=pd.Index(dates, name='date'),
+        )
+
+
+_cubes = LRUCache(CUBE_CACHE_SIZE)
+
+
+@timed('heatmap.get_cube')
+def get_cube(key, data, date='TradDt', value='total_traded_value'):
+    """Cube for ``key`` built from ``data``, reusing the days already built.
+
+    ``data`` holds long strike rows as for ``StrikeCube.from_frame``. A cached
+    cube is extended with the days after its last one; it is rebuilt when
+    ``data`` starts on a different day, lacks one of the cube's days or has
+    a day inside the cube's range the cube lacks (e.g. a retried backfill).
+    """
+    data_dates = data[date].astype(str)
+    cube = _cubes.pop(key)
+    if cube is not None and len(cube.dates) and len(data) and data_dates.min() == cube.dates[0]:
+        days = data_dates.unique()
+        gaps = days[(days <= cube.dates[-1]) & ~np.isin(days, cube.dates)]
+        if len(gaps):
+            cube = None
+        else:
+            newer = data[data_dates > cube.dates[-1]]
+            if not newer.empty:
+                cube = cube.extend(StrikeCube.from_frame(newer, date=date, value=value))
+            if not np.isin(cube.dates, days).all():
+                cube = None
+    else:
+        cube = None
+    if cube is None:
+        cube = StrikeCube.from_frame(data, date=date, value=value)
+    _cubes.put(key, cube)
+    return cube
@@ -0,0 +1,203 @@
+"""Instrument master: the contracts of one day's bhavcopy, parsed once.
+
+Contracts used to be found by matching ``FinInstrmNm`` against a month
+name, which also matched symbols containing those letters ('MAR' in
+MARUTI) and ignored the expiry year. ``InstrumentMaster`` parses every row
+of a bhavcopy into underlying, expiry date, type (FUT, CE or PE), strike
+and lot, stored as categoricals and integer strike ticks, and indexes the
+rows by (underlying, expiry). Month, symbol and expiry filters are then
+dictionary lookups into row positions of the bhavcopy.
+
+``master_for`` keeps the masters of the last few stored days in memory,
+keyed by the Parquet file, so a page rerun does not read or parse the day
+again.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.perf import timed
+from core.shared_cache import LRUCache
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+CONTRACT_TYPES = ['FUT', 'CE', 'PE']
+OPTION_TYPES = ['CE', 'PE']
+# Codes of the ``type`` categorical, for comparisons without boxing strings
+FUT_CODE, CE_CODE, PE_CODE = range(len(CONTRACT_TYPES))
+
+# Strikes are held as integer multiples of the exchange's price tick;
+# futures have no strike
+STRIKE_TICK = 0.05
+TICKS_PER_RUPEE = 20
+NO_STRIKE = -1
+
+# Masters kept in memory by ``master_for``
+CACHE_SIZE = 4
+
+
+def strike_ticks(strike):
+    """Strike prices (floats, NaN for futures) as integer ticks."""
+    strike = np.asarray(strike, dtype=float)
+    return np.where(np.isnan(strike), NO_STRIKE, np.rint(np.nan_to_num(strike) / STRIKE_TICK)).astype(np.int64)
+
+
+def _expiry_dates(values):
+    # Parse each distinct expiry once, not once per row
+    codes, uniques = pd.factorize(pd.Series(values).astype(object))
+    return pd.Categorical.from_codes(codes, categories=pd.DatetimeIndex(pd.to_datetime(uniques.astype(str))))
+
+
+class InstrumentMaster:
+    """Parsed contracts of one bhavcopy, row-aligned with it.
+
+    ``contracts`` has one row per bhavcopy row: ``underlying``, ``expiry``,
+    ``type`` and ``stem`` (the contract name without the option type, used
+    to build CE / PE tokens) are categoricals, ``strike`` is in ticks of
+    ``STRIKE_TICK`` (``NO_STRIKE`` for futures) and ``lot`` is int32.
+    """
+
+    @timed('instruments.build')
+    def __init__(self, data):
+        self.data = data
+        if data.empty:
+            self.contracts = pd.DataFrame(columns=['underlying', 'expiry', 'type', 'strike', 'lot', 'stem'])
+            self._by_key = {}
+            self._by_expiry = {}
+            return
+
+        option_type = data['OptnTp'].astype(object).to_numpy()
+        type_codes = np.select([option_type == 'CE', option_type == 'PE'], [CE_CODE, PE_CODE], FUT_CODE).astype(np.int8)
+        names = data['FinInstrmNm'].astype(str)
+        stem = names.str.slice(stop=-2).where(type_codes > 0, names)
+
+        self.contracts = pd.DataFrame({
+            'underlying': data['TckrSymb'].astype('category').array,
+            'expiry': _expiry_dates(data['XpryDt']),
+            'type': pd.Categorical.from_codes(type_codes, categories=CONTRACT_TYPES),
+            'strike': strike_ticks(data['StrkPric']),
+            'lot': data['NewBrdLotQty'].to_numpy(dtype=np.int32),
+            'stem': stem.astype('category').array,
+        })
+        self._by_key = self._index(['underlying', 'expiry'])
+        self._by_expiry = {key[0]: rows for key, rows in self._index(['expiry']).items()}
+
+    def _index(self, columns):
+        # {key tuple: row positions} from the categorical codes: one stable
+        # sort and a split, instead of boxing every row's key
+        codes = [self.contracts[c].cat.codes.to_numpy().astype(np.int64) for c in columns]
+        categories = [list(self.contracts[c].cat.categories) for c in columns]
+        combined = codes[0]
+        for code, cats in zip(codes[1:], categories[1:]):
+            combined = combined * len(cats) + code
+        # Rows missing a key field (code -1) are not indexed
+        valid = np.flatnonzero(np.all([code >= 0 for code in codes], axis=0))
+        if not len(valid):
+            return {}
+        order = valid[np.argsort(combined[valid], kind='stable')]
+        starts = np.flatnonzero(np.diff(combined[order], prepend=-1))
+        index = {}
+        for rows in np.split(order, starts[1:]):
+            first = rows[0]
+            index[tuple(cats[code[first]] for code, cats in zip(codes, categories))] = rows
+        return index
+
+    def __len__(self):
+        return len(self.contracts)
+
+    @property
+    def empty(self):
+        return self.data.empty
+
+    def expiries(self, month=None, underlying=None):
+        """Sorted expiry dates, optionally of one month ('AUG') and/or underlying."""
+        if underlying is not None:
+            dates = [expiry for symbol, expiry in self._by_key if symbol == underlying]
+        else:
+            dates = list(self._by_expiry)
+        if month is not None:
+            number = MONTHS.index(month.upper()) + 1
+            dates = [expiry for expiry in dates if expiry.month == number]
+        return sorted(dates)
+
+    def rows(self, underlying=None, expiry=None, month=None, types=None):
+        """Positions, in bhavcopy order, of the contracts matching every filter.
+
+        ``expiry`` is a date (or ISO string); ``month`` selects every expiry
+        in that month; ``types`` is a list such as ``OPTION_TYPES``.
+        """
+        if expiry is not None:
+            expiries = [pd.Timestamp(expiry)]
+        else:
+            expiries = self.expiries(month)
+        if underlying is not None:
+            parts = [self._by_key.get((underlying, e)) for e in expiries]
+        else:
+            parts = [self._by_expiry.get(e) for e in expiries]
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return np.array([], dtype=np.intp)
+        positions = np.sort(np.concatenate(parts))
+        if types is not None:
+            codes = [CONTRACT_TYPES.index(t) for t in types]
+            positions = positions[np.isin(self.contracts['type'].cat.codes.to_numpy()[positions], codes)]
+        return positions
+
+    def column(self, name, rows, dtype=float):
+        """One numeric bhavcopy column at ``rows`` as an array."""
+        return self.data[name].to_numpy(dtype=dtype)[rows]
+
+    def type_codes(self, rows):
+        """``FUT_CODE`` / ``CE_CODE`` / ``PE_CODE`` of each of ``rows``."""
+        return self.contracts['type'].cat.codes.to_numpy()[rows]
+
+    def stems(self, rows):
+        """The ``stem`` of each of ``rows`` as a string Series."""
+        return self.contracts['stem'].take(rows).astype(str).reset_index(drop=True)
+
+    def frame(self, rows=None):
+        """The bhavcopy rows at ``rows`` (all of them by default) as a new frame."""
+        if rows is None:
+            return self.data.copy(deep=False)
+        return self.data.take(rows)
+
+    def tokenised(self, rows):
+        """Which of ``rows`` may get tokens: no index underlyings, whole-rupee strikes."""
+        # Checked once per underlying, not once per contract name
+        underlying = self.contracts['underlying'].cat
+        excluded = np.asarray(underlying.categories.str.contains(r'NIFTY|\.', regex=True), dtype=bool)
+        strike = self.contracts['strike'].to_numpy()[rows]
+        whole_rupee = (strike == NO_STRIKE) | (strike % TICKS_PER_RUPEE == 0)
+        return ~excluded[underlying.codes.to_numpy()[rows]] & whole_rupee
+
+
+def as_master(data):
+    """``data`` itself when it is a master, else a master built from the frame."""
+    return data if isinstance(data, InstrumentMaster) else InstrumentMaster(data)
+
+
+_cache = LRUCache(CACHE_SIZE)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def master_for(store, date):
+    """The ``InstrumentMaster`` of a stored day, fetching the day on a miss.
+
+    Masters are cached by file path and modification time, so a day that is
+    fetched again is parsed again.
+    """
+    path = store.path_for(date)
+    if store.has(date):
+        key = (path, os.stat(path).st_mtime_ns)
+        master = _cache.get(key)
+        if master is not None:
+            return master
+    master = InstrumentMaster(store.read(date))
+    if master.empty:
+        return master
+    key = (path, os.stat(path).st_mtime_ns)
+    _cache.put(key, master)
+    return master
@@ -0,0 +1,44 @@
+"""Deferred imports for heavy, optional-at-startup dependencies.
+
+``px = lazy_import('plotly.express')`` at the top of a page costs nothing;
+the module is imported the first time an attribute of ``px`` is used, so a
+page that never draws a chart never pays for plotly. Setting
+``EAGER_IMPORTS=1`` imports everything up front instead, which surfaces a
+missing dependency at startup.
+"""
+import importlib
+import os
+import threading
+
+EAGER = os.environ.get('EAGER_IMPORTS', '') not in ('', '0', 'false', 'False')
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        # Only called for attributes not set in __init__
+        module = self._module or self._load()
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_import(name):
+    """The module ``name``, imported on first use (or now when ``EAGER``)."""
+    if EAGER:
+        return importlib.import_module(name)
+    return LazyModule(name)
@@ -0,0 +1,222 @@
+"""Live-refresh mode of the option-chain scan.
+
+``LiveBoard`` is a persistent in-memory table of every symbol's ITM call
+and put rows, keyed by (expiry, strike). A refreshed chain is diffed
+against it and only the rows whose traded value changed are merged; each
+symbol's call / put total is adjusted by the difference, so the top-10
+rankings only need re-sorting when a total actually moved.
+
+``LiveRefresher`` polls chains on a background thread, one batch per
+interval: the most active symbols (highest traded value) on every tick,
+the remaining slots going to the symbols refreshed longest ago, so the
+whole universe is covered every few ticks without rescanning it on each
+one. It is shared by every session of the process and stops by itself
+once no session has looked at it for ``IDLE_TIMEOUT`` seconds.
+"""
+import heapq
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from core.data_sources import get_source, unshared
+from core.perf import timed
+from core.scanner import OptionChainScanner
+from core.shared_cache import Singleton
+
+SIDES = {'CALLS': 'CALLS_Trade_Value', 'PUTS': 'PUTS_Trade_Value'}
+TOP_N = 10
+
+DEFAULT_INTERVAL = 15
+BATCH_SIZE = 40
+HOT_SYMBOLS = 10
+IDLE_TIMEOUT = 120
+
+# ``top`` holds a (Symbol, <side>_Trade_Value) frame per side; ``symbols``
+# counts the symbols with a loaded chain; ``updated_at`` is the wall-clock
+# time of the last tick that changed anything
+BoardSnapshot = namedtuple('BoardSnapshot', [
+    'top', 'symbols', 'ticks', 'changed_rows', 'errors', 'updated_at', 'last_tick_seconds',
+])
+
+
+def trade_values(rows, side):
+    """Traded value per row of one side, as the one-shot scan computes it."""
+    return rows[f'{side}_Volume'] * rows[f'{side}_LTP'] * rows['Lot_Size']
+
+
+class LiveBoard:
+    def __init__(self, top_n=TOP_N):
+        self.top_n = top_n
+        self.lock = threading.Lock()
+        # side -> symbol -> {(expiry, strike): traded value}
+        self.rows = {side: {} for side in SIDES}
+        self.totals = {side: {} for side in SIDES}
+        self.refreshed_at = {}
+        self.errors = {}
+        self.ticks = 0
+        self.changed_rows = 0
+        self.updated_at = None
+        self.last_tick_seconds = None
+        self._top = {}
+
+    def _merge(self, side, symbol, rows):
+        # Apply the rows whose value is new, changed or gone; returns how many
+        values = trade_values(rows, side).to_numpy(dtype=float)
+        fresh = {}
+        for key, value in zip(zip(rows['Expiry_Date'].to_numpy(), rows['Strike_Price'].to_numpy()), values):
+            fresh[key] = fresh.get(key, 0.0) + value
+        table = self.rows[side].setdefault(symbol, {})
+        delta = 0.0
+        changed = 0
+        for key in fresh.keys() | table.keys():
+            old, new = table.get(key, 0.0), fresh.get(key, 0.0)
+            if old == new:
+                continue
+            changed += 1
+            delta += new - old
+            if key in fresh:
+                table[key] = new
+            else:
+                del table[key]
+        if changed:
+            self.totals[side][symbol] = self.totals[side].get(symbol, 0.0) + delta
+            self._top.pop(side, None)
+        return changed
+
+    def update(self, symbol, calls, puts):
+        """Merge one symbol's refreshed ITM rows; returns the changed row count."""
+        with self.lock:
+            changed = self._merge('CALLS', symbol, calls) + self._merge('PUTS', symbol, puts)
+            self.refreshed_at[symbol] = time.monotonic()
+            self.errors.pop(symbol, None)
+            self.changed_rows += changed
+            if changed:
+                self.updated_at = time.time()
+            return changed
+
+    def record_error(self, symbol, error):
+        with self.lock:
+            # Retried on a later tick, after the symbols never tried
+            self.refreshed_at[symbol] = time.monotonic()
+            self.errors[symbol] = error
+
+    def record_tick(self, seconds):
+        with self.lock:
+            # A completed tick clears the error of a failed one ('*')
+            self.errors.pop('*', None)
+            self.ticks += 1
+            self.last_tick_seconds = seconds
+
+    def top(self, side):
+        """The ``top_n`` symbols of one side by traded value."""
+        with self.lock:
+            if side not in self._top:
+                best = heapq.nlargest(self.top_n, self.totals[side].items(), key=lambda item: item[1])
+                self._top[side] = pd.DataFrame(best, columns=['Symbol', SIDES[side]])
+            return self._top[side].copy()
+
+    def most_active(self, n):
+        """The ``n`` symbols with the highest call + put traded value."""
+        with self.lock:
+            symbols = set(self.totals['CALLS']) | set(self.totals['PUTS'])
+            return heapq.nlargest(
+                n, symbols, key=lambda s: self.totals['CALLS'].get(s, 0) + self.totals['PUTS'].get(s, 0)
+            )
+
+    def stalest(self, symbols):
+        """``symbols`` ordered by last refresh, never-refreshed first."""
+        with self.lock:
+            return sorted(symbols, key=lambda s: self.refreshed_at.get(s, float('-inf')))
+
+    def snapshot(self):
+        top = {side: self.top(side) for side in SIDES}
+        with self.lock:
+            return BoardSnapshot(
+                top, len(set(self.rows['CALLS']) | set(self.rows['PUTS'])), self.ticks, self.changed_rows,
+                dict(self.errors),
+                self.updated_at, self.last_tick_seconds,
+            )
+
+
+class LiveRefresher:
+    def __init__(self, scanner=None, board=None, interval=DEFAULT_INTERVAL, batch_size=BATCH_SIZE,
+                 hot_symbols=HOT_SYMBOLS, idle_timeout=IDLE_TIMEOUT):
+        # Chains bypass SharedSource: its option_chain TTL may be longer
+        # than the interval, and a cached chain would be shown as live
+        self.scanner = scanner or OptionChainScanner(unshared(get_source()))
+        self.board = board or LiveBoard()
+        self.interval = interval
+        self.batch_size = batch_size
+        self.hot_symbols = hot_symbols
+        self.idle_timeout = idle_timeout
+        self.symbols = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.watched_at = time.monotonic()
+
+    def configure(self, symbols, interval=None):
+        with self.lock:
+            self.symbols = list(symbols)
+            if interval is not None and interval != self.interval:
+                self.interval = interval
+                self.wake.set()
+
+    def next_batch(self):
+        """The symbols to poll on the next tick."""
+        with self.lock:
+            symbols = list(self.symbols)
+        universe = set(symbols)
+        hot = [s for s in self.board.most_active(self.hot_symbols) if s in universe]
+        rest = self.board.stalest([s for s in symbols if s not in set(hot)])
+        return (hot + rest)[:self.batch_size]
+
+    @timed('live.tick')
+    def tick(self):
+        """Poll one batch and merge it into the board; returns the changed row count."""
+        start = time.perf_counter()
+        batch = self.next_batch()
+        changed = 0
+        for (calls, puts, metric), symbol in zip(self.scanner.scan_each(batch), batch):
+            if calls is None:
+                self.board.record_error(symbol, metric.error)
+            else:
+                changed += self.board.update(symbol, calls, puts)
+        self.board.record_tick(time.perf_counter() - start)
+        return changed
+
+    def watch(self):
+        """Called by a session on each view: keeps the poller alive, starting it if needed."""
+        with self.lock:
+            self.watched_at = time.monotonic()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='live-refresh', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if time.monotonic() - self.watched_at > self.idle_timeout:
+                    self.thread = None
+                    return
+            started = time.monotonic()
+            # Cleared before the tick, so a new interval set during it is not lost
+            self.wake.clear()
+            try:
+                self.tick()
+            except Exception as e:
+                # A failed tick must not end the poller; the next one retries
+                self.board.record_error('*', f'{type(e).__name__}: {e}')
+            with self.lock:
+                interval = self.interval
+            self.wake.wait(max(interval - (time.monotonic() - started), 0))
+
+
+_refresher = Singleton(LiveRefresher)
+
+
+def get_live_refresher():
+    """Process-wide refresher, so sessions share one poller and one board."""
+    return _refresher.get()
@@ -0,0 +1,121 @@
+"""Lot-size registry keyed by instrument and effective date.
+
+Seeded with fallback sizes for the index underlyings and then from the
+``NewBrdLotQty`` column of every bhavcopy in the local store. Lookups take
+whole columns of instruments and dates and resolve them with one
+``merge_asof``, so each trade can carry its own lot size.
+"""
+import numpy as np
+import pandas as pd
+
+from core.shared_cache import Singleton
+
+# Used when no bhavcopy in the store covers an instrument
+DEFAULT_LOT_SIZES = {
+    'NIFTY': 75,
+    'BANKNIFTY': 30,
+    'MIDCPNIFTY': 120,
+    'FINNIFTY': 65
+}
+DEFAULT_EFFECTIVE_DATE = pd.Timestamp('2000-01-01')
+
+
+class LotSizeRegistry:
+    def __init__(self):
+        self.table = pd.DataFrame({
+            'instrument': pd.Series(dtype=object),
+            'effective_date': pd.Series(dtype='datetime64[ns]'),
+            'lot_size': pd.Series(dtype='int64'),
+        })
+        self.seeded_dates = set()
+
+    @classmethod
+    def default(cls):
+        registry = cls()
+        registry.add(
+            list(DEFAULT_LOT_SIZES),
+            [DEFAULT_EFFECTIVE_DATE] * len(DEFAULT_LOT_SIZES),
+            list(DEFAULT_LOT_SIZES.values()),
+        )
+        return registry
+
+    def add(self, instruments, effective_dates, lot_sizes):
+        """Record lot sizes; rows that do not change the current size are dropped."""
+        new = pd.DataFrame({
+            'instrument': pd.Series(instruments, dtype=object).to_numpy(),
+            'effective_date': pd.to_datetime(pd.Series(effective_dates)).to_numpy(dtype='datetime64[ns]'),
+            'lot_size': pd.Series(lot_sizes).astype('int64').to_numpy(),
+        })
+        if new.empty:
+            return
+        current = self.lookup(new['instrument'], new['effective_date'])
+        new = new[current != new['lot_size'].to_numpy()]
+        if new.empty:
+            return
+        table = pd.concat([self.table, new], ignore_index=True)
+        table = table.drop_duplicates(['instrument', 'effective_date'], keep='last')
+        self.table = table.sort_values(['effective_date', 'instrument'], ignore_index=True)
+
+    def add_bhavcopy(self, data, date=None):
+        """Seed from one day's bhavcopy using its near-month ``NewBrdLotQty``."""
+        if data.empty:
+            return
+        if date is None:
+            date = data['TradDt'].iloc[0]
+        near_month = (
+            data[['TckrSymb', 'XpryDt', 'NewBrdLotQty']]
+            .dropna()
+            .sort_values('XpryDt')
+            .drop_duplicates('TckrSymb')
+        )
+        self.add(
+            near_month['TckrSymb'].astype(str),
+            [pd.Timestamp(date)] * len(near_month),
+            near_month['NewBrdLotQty'],
+        )
+
+    def refresh_from_store(self, store):
+        """Add every stored bhavcopy day not seen yet, oldest first."""
+        for date in store.cached_dates():
+            if date in self.seeded_dates:
+                continue
+            data = store.read(date, columns=['TckrSymb', 'XpryDt', 'NewBrdLotQty'])
+            self.add_bhavcopy(data, date)
+            self.seeded_dates.add(date)
+
+    def lookup(self, instruments, dates):
+        """Lot size for each (instrument, date) pair; NaN where unknown."""
+        query = pd.DataFrame({
+            'instrument': pd.Series(instruments, dtype=object).to_numpy(),
+            'date': pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]'),
+        })
+        if query.empty or self.table.empty:
+            return np.full(len(query), np.nan)
+        # Undated trades get the latest known size
+        query['date'] = query['date'].fillna(self.table['effective_date'].max())
+        query['position'] = np.arange(len(query))
+        # Both sides use the same string dtype, as merge_asof requires
+        query['instrument'] = query['instrument'].astype(str)
+        table = self.table.assign(instrument=self.table['instrument'].astype(str))
+        merged = pd.merge_asof(
+            query.sort_values('date'), table,
+            left_on='date', right_on='effective_date',
+            by='instrument', direction='backward',
+        )
+        return merged.sort_values('position')['lot_size'].to_numpy(dtype=float)
+
+    def current(self):
+        """Latest lot size per instrument as a Series."""
+        return self.table.drop_duplicates('instrument', keep='last').set_index('instrument')['lot_size']
+
+
+_registry = Singleton(LotSizeRegistry.default)
+
+
+def get_registry(store=None):
+    """Process-wide registry, topped up from ``store`` on every call."""
+    registry = _registry.get()
+    if store is not None:
+        with _registry.lock:
+            registry.refresh_from_store(store)
+    return registry
@@ -0,0 +1,272 @@
+"""Lightweight timing and counters for fetches, parsers and aggregations.
+
+``timed(name)`` works as a decorator or a context manager and records one
+span per call: wall time, rows in / out, bytes fetched and cache hit or
+miss. Spans are kept in a bounded buffer and folded into per-name totals,
+which export as JSON lines or Prometheus text.
+
+Recording is off unless ``PERF_INSTRUMENTATION=1`` is set or ``enable()``
+is called. That is the process default; ``enable_in_context()`` overrides
+it for the current context only, so one Streamlit session's script run can
+record without turning recording on for the others. Spans go to the
+process-wide ``recorder`` unless ``record_in_context()`` has given the
+current context a ``Recorder`` of its own, so a session only sees and
+resets its own spans. While off, a decorated
+function costs one flag check per call and ``timed`` as a context manager
+hands back a shared no-op span.
+"""
+import collections
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+MAX_SPANS = 5000
+
+_enabled = os.environ.get('PERF_INSTRUMENTATION', '') not in ('', '0', 'false', 'False')
+
+
+# Override of ``_enabled`` for the current context; None uses the default
+_context_enabled = contextvars.ContextVar('perf_enabled', default=None)
+
+
+def enable(on=True):
+    """Turn recording on or off by default, for every context of the process."""
+    global _enabled
+    _enabled = bool(on)
+
+
+def enable_in_context(on):
+    """Turn recording on or off for the current context only; None restores the default."""
+    _context_enabled.set(None if on is None else bool(on))
+
+
+def is_enabled():
+    on = _context_enabled.get()
+    return _enabled if on is None else on
+
+
+def record_in_context(target):
+    """Send the current context's spans to ``target``; None restores ``recorder``."""
+    _context_recorder.set(target)
+
+
+def current_recorder():
+    """The ``Recorder`` spans of the current context go to."""
+    return _context_recorder.get() or recorder
+
+
+def in_context(func):
+    """``func`` bound to a copy of the current context, for a worker thread.
+
+    Threads do not inherit context variables, so work submitted to a pool
+    would otherwise record (or not) by the process default, into the
+    process-wide recorder.
+    """
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+class Span:
+    """One timed call; fields may be set while the call runs."""
+
+    __slots__ = ('name', 'labels', 'started', 'seconds', 'rows_in', 'rows_out', 'bytes', 'cache', 'error')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.started = time.time()
+        self.seconds = None
+        self.rows_in = None
+        self.rows_out = None
+        self.bytes = None
+        self.cache = None
+        self.error = None
+
+    def record(self, rows_in=None, rows_out=None, bytes=None, cache=None):
+        """Set counters on the span; ``cache`` is ``'hit'`` or ``'miss'``."""
+        if rows_in is not None:
+            self.rows_in = int(rows_in)
+        if rows_out is not None:
+            self.rows_out = int(rows_out)
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + int(bytes)
+        if cache is not None:
+            self.cache = cache
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def record(self, rows_in=None, rows_out=None, bytes=None, cache=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+TOTAL_FIELDS = ['calls', 'errors', 'seconds', 'max_seconds', 'rows_in', 'rows_out', 'bytes', 'cache_hits', 'cache_misses']
+
+
+class Recorder:
+    def __init__(self, max_spans=MAX_SPANS):
+        self.lock = threading.Lock()
+        self.spans = collections.deque(maxlen=max_spans)
+        self.totals = {}
+
+    def add(self, span):
+        with self.lock:
+            self.spans.append(span)
+            totals = self.totals.get(span.name)
+            if totals is None:
+                totals = self.totals[span.name] = dict.fromkeys(TOTAL_FIELDS, 0)
+            totals['calls'] += 1
+            totals['errors'] += span.error is not None
+            totals['seconds'] += span.seconds
+            totals['max_seconds'] = max(totals['max_seconds'], span.seconds)
+            totals['rows_in'] += span.rows_in or 0
+            totals['rows_out'] += span.rows_out or 0
+            totals['bytes'] += span.bytes or 0
+            totals['cache_hits'] += span.cache == 'hit'
+            totals['cache_misses'] += span.cache == 'miss'
+
+    def reset(self):
+        with self.lock:
+            self.spans.clear()
+            self.totals.clear()
+
+    def summary(self):
+        """Per-name totals, slowest total time first."""
+        with self.lock:
+            rows = [{'name': name, **totals} for name, totals in self.totals.items()]
+        summary = pd.DataFrame(rows, columns=['name'] + TOTAL_FIELDS)
+        return summary.sort_values('seconds', ascending=False, ignore_index=True)
+
+    def recent(self, n=200):
+        with self.lock:
+            spans = list(self.spans)[-n:]
+        return pd.DataFrame([s.as_dict() for s in reversed(spans)], columns=list(Span.__slots__))
+
+    def to_jsonl(self):
+        """Every buffered span as one JSON object per line."""
+        with self.lock:
+            spans = list(self.spans)
+        return ''.join(json.dumps(s.as_dict(), default=str) + '\n' for s in spans)
+
+    def to_prometheus(self, prefix='trading_dashboard'):
+        """Totals in the Prometheus text exposition format."""
+        metrics = [
+            ('calls', 'counter', 'Calls recorded'),
+            ('errors', 'counter', 'Calls that raised'),
+            ('seconds', 'counter', 'Wall time spent, in seconds'),
+            ('max_seconds', 'gauge', 'Slowest single call, in seconds'),
+            ('rows_in', 'counter', 'Rows passed in'),
+            ('rows_out', 'counter', 'Rows returned'),
+            ('bytes', 'counter', 'Bytes fetched or read'),
+            ('cache_hits', 'counter', 'Cache hits'),
+            ('cache_misses', 'counter', 'Cache misses'),
+        ]
+        with self.lock:
+            totals = {name: dict(t) for name, t in self.totals.items()}
+        lines = []
+        for field, kind, help_text in metrics:
+            metric = f'{prefix}_{field}' + ('_total' if kind == 'counter' else '')
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} {kind}')
+            for name in sorted(totals):
+                label = re.sub(r'(["\\\\])', r'\\\1', name)
+                lines.append(f'{metric}{{span="{label}"}} {totals[name][field]:g}')
+        return '\n'.join(lines) + '\n'
+
+
+recorder = Recorder()
+
+# Recorder of the current context; None records into ``recorder``
+_context_recorder = contextvars.ContextVar('perf_recorder', default=None)
+
+
+def _rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, tuple):
+        # (frame, error) and similar: the first frame found
+        for item in value:
+            if isinstance(item, (pd.DataFrame, pd.Series)):
+                return len(item)
+    return None
+
+
+class timed:
+    """Record a span around a block or every call of a function.
+
+    As a context manager it yields the span so counters can be set with
+    ``span.record(...)``. As a decorator the first frame argument and the
+    returned frame (or the first frame in a returned tuple) give rows in and
+    rows out.
+    """
+
+    __slots__ = ('name', 'labels', 'span', 'start')
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.span = None
+
+    def __enter__(self):
+        # is_enabled(), inlined: this check is all a call costs while off
+        on = _context_enabled.get()
+        if not (_enabled if on is None else on):
+            return NOOP_SPAN
+        self.span = Span(self.name, self.labels)
+        self.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.seconds = time.perf_counter() - self.start
+            if exc_type is not None:
+                self.span.error = f'{exc_type.__name__}: {exc}'
+            current_recorder().add(self.span)
+            self.span = None
+        return False
+
+    def __call__(self, func):
+        name = self.name
+        labels = self.labels
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            on = _context_enabled.get()
+            if not (_enabled if on is None else on):
+                return func(*args, **kwargs)
+            span = Span(name, labels)
+            for arg in args:
+                rows = _rows(arg)
+                if rows is not None:
+                    span.rows_in = rows
+                    break
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                span.error = f'{type(e).__name__}: {e}'
+                raise
+            else:
+                span.rows_out = _rows(result)
+                return result
+            finally:
+                span.seconds = time.perf_counter() - start
+                current_recorder().add(span)
+        return wrapper
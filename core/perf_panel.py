@@ -0,0 +1,67 @@
+"""Streamlit side of ``core.perf``: the sidebar panel and timed chart rendering.
+
+Every page calls ``apply_session_settings()`` before anything is timed and
+``sidebar_panel()`` once at the end, after its spans of the rerun have been
+recorded. *Record timings* is a per-session choice: it is kept in
+``st.session_state`` and applied to that session's script runs only, whose
+spans go to a ``perf.Recorder`` also kept in the session state. The panel
+shows, exports and resets that recorder alone.
+"""
+import datetime
+
+import streamlit as st
+
+from core import perf
+from core.shared_cache import get_shared_cache
+
+
+def plotly_chart(fig, **kwargs):
+    """``st.plotly_chart`` with its figure serialization timed."""
+    with perf.timed('plotly.render'):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def apply_session_settings():
+    """Record this script run's spans, into the session's own recorder, if
+    the session ticked *Record timings*.
+
+    Sessions that never touched the checkbox follow the process default.
+    """
+    if 'perf_recorder' not in st.session_state:
+        st.session_state['perf_recorder'] = perf.Recorder()
+    perf.record_in_context(st.session_state['perf_recorder'])
+    perf.enable_in_context(st.session_state.get('perf_enabled'))
+
+
+def sidebar_panel():
+    with st.sidebar.expander("Performance", expanded=False):
+        # Takes effect from the rerun the change triggers, through
+        # apply_session_settings() at the top of the page
+        enabled = st.checkbox("Record timings", value=perf.is_enabled(), key='perf_enabled',
+                              help="Time fetches, parsers, aggregations and charts on every rerun "
+                                   "of this session")
+        # Counted whether or not timings are recorded
+        cache_stats = get_shared_cache().stats()
+        if not cache_stats.empty:
+            st.caption("Shared fetch cache (all sessions)")
+            st.dataframe(cache_stats.round({'hit_rate': 3}), hide_index=True)
+        recorder = perf.current_recorder()
+        summary = recorder.summary()
+        if summary.empty:
+            st.caption("Nothing recorded yet." if enabled else "Recording is off.")
+            return
+
+        st.dataframe(summary.round({'seconds': 4, 'max_seconds': 4}), hide_index=True)
+        st.caption("Latest calls")
+        st.dataframe(recorder.recent(20), hide_index=True)
+
+        stamp = f'{datetime.datetime.now():%Y%m%d_%H%M%S}'
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("JSON lines", data=recorder.to_jsonl(),
+                               file_name=f'perf_{stamp}.jsonl', mime='application/x-ndjson')
+        with col2:
+            st.download_button("Prometheus", data=recorder.to_prometheus(),
+                               file_name=f'perf_{stamp}.prom', mime='text/plain')
+        if st.button("Reset timings"):
+            recorder.reset()
@@ -0,0 +1,138 @@
+"""Reading uploaded POS files (xlsx, xls or csv) into positions.
+
+The format is sniffed from the file's first bytes, not its name. xlsx
+sheets are streamed with openpyxl in read-only, values-only mode, and only
+up to the last column a page asks for once the header row is found
+(openpyxl still parses every cell's XML, but the cells to its right are
+not converted or kept); xls goes through ``pd.read_excel`` (xlrd) and csv
+through the ``csv`` module, which read every column. The cell rows are
+then mapped to named, typed fields by ``core.pos_schema``, converting only
+the columns a page asks for.
+
+Parsed frames are cached by a hash of the file's bytes, so a widget change
+on a page reuses the frame instead of parsing the workbook again.
+"""
+import csv
+import hashlib
+import io
+
+import pandas as pd
+
+from core.perf import timed
+from core.pos_schema import HEADER_SCAN_ROWS, last_column, normalize_rows
+from core.shared_cache import LRUCache
+
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+FORMATS = ['xlsx', 'xls', 'csv']
+
+# Parsed frames kept in memory, keyed by content hash and fields
+CACHE_SIZE = 8
+
+
+def sniff_format(content):
+    """``'xlsx'``, ``'xls'`` or ``'csv'`` from the leading bytes of a file."""
+    if content.startswith(XLSX_MAGIC):
+        return 'xlsx'
+    if content.startswith(XLS_MAGIC):
+        return 'xls'
+    return 'csv'
+
+
+def content_hash(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _xlsx_rows(content, fields=None):
+    # The same cells pandas' openpyxl reader produces (integral floats as
+    # int, blanks as '', errors as NaN), without building cell objects
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import ERROR_CODES
+
+    def convert(values, trim):
+        row = []
+        for value in values:
+            if value is None:
+                value = ''
+            elif type(value) is float and value.is_integer():
+                value = int(value)
+            elif type(value) is str and value in ERROR_CODES:
+                value = float('nan')
+            row.append(value)
+        # openpyxl pads rows to ``max_col``; the padding is not the sheet's width
+        while trim and row and row[-1] == '':
+            row.pop()
+        return row
+
+    book = load_workbook(io.BytesIO(content), read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = book.worksheets[0]
+        sheet.reset_dimensions()
+        rows = [convert(values, False) for values in sheet.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True)]
+        last = last_column(rows, fields)
+        max_col = None if last is None else last + 1
+        rows.extend(convert(values, max_col is not None) for values in
+                    sheet.iter_rows(min_row=HEADER_SCAN_ROWS + 1, max_col=max_col, values_only=True))
+    finally:
+        book.close()
+    return rows
+
+
+def _xls_rows(content, fields=None):
+    try:
+        data = pd.read_excel(io.BytesIO(content), header=None)
+    except ImportError as e:
+        raise ValueError("Reading .xls files needs the xlrd package; save the file as .xlsx or .csv") from e
+    return data.astype(object).where(data.notna(), '').to_numpy().tolist()
+
+
+def _csv_rows(content, fields=None):
+    return list(csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding='utf-8-sig', newline='')))
+
+
+ROW_READERS = {'xlsx': _xlsx_rows, 'xls': _xls_rows, 'csv': _csv_rows}
+
+
+def sheet_rows(content, fields=None):
+    """Cell rows of the first sheet (or the csv), blank cells as ``''``.
+
+    With ``fields``, xlsx rows after the header may stop at the last column
+    those fields use.
+    """
+    return ROW_READERS[sniff_format(content)](content, fields)
+
+
+_cache = LRUCache(CACHE_SIZE)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def read_pos(file, fields=None):
+    """Positions in a POS file (path, bytes or file object such as an upload).
+
+    ``fields`` are the ``core.pos_schema`` fields the caller uses; a
+    ``ValueError`` is raised when the file lacks one or its layout is not
+    recognised. The returned frame is a copy the caller may modify.
+    """
+    if isinstance(file, (bytes, bytearray)):
+        content = bytes(file)
+    elif isinstance(file, str):
+        with open(file, 'rb') as f:
+            content = f.read()
+    else:
+        content = file.getvalue() if hasattr(file, 'getvalue') else file.read()
+
+    key = (content_hash(content), None if fields is None else tuple(fields))
+    with timed('pos.read') as span:
+        span.record(bytes=len(content))
+        data = _cache.get(key)
+        if data is None:
+            span.record(cache='miss')
+            data = normalize_rows(sheet_rows(content, fields), fields)
+            _cache.put(key, data)
+        else:
+            span.record(cache='hit')
+        span.record(rows_out=len(data))
+    return data.copy()
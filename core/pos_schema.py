@@ -0,0 +1,161 @@
+"""Named, typed positions from the POS sheet layouts in use.
+
+- The net position report (AT Money Position page) has a title row and
+  then a header row naming its columns ('Scrip', 'Call/Put', 'STK', ...).
+  Futures are marked 'FF'.
+- The combined net position report (position matching page) has a blank
+  header row except for the 'COMBINED NET POSITION' title over the strike
+  column; the other fields sit at fixed offsets from that column. Futures
+  are marked 'FX'.
+
+``normalize_rows`` finds the header row and layout in the first rows of a
+sheet and returns one frame with the fields below, whatever the layout:
+one row per position (CE, PE or FX; 'FF' becomes 'FX'), text fields as
+categoricals, quantities as int32 and money as float32. Strikes and LTPs
+stay float64 as the ATM band is compared against them.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+FIELD_DTYPES = {
+    'stock': 'category',
+    'type': 'category',
+    'expiry': 'category',
+    'strike': 'float64',
+    'ltp': 'float64',
+    'bf_qty': 'int32',
+    'qty': 'int32',
+    'exposure': 'float32',
+    'm2m': 'float32',
+}
+POSITION_TYPES = ['CE', 'PE', 'FX']
+FUTURES = 'FX'
+HEADER_SCAN_ROWS = 10
+
+# ``columns`` maps a header label (or, with an ``anchor``, an offset from
+# the anchor label's column) to a field. A row is the header row when it
+# holds every ``markers`` label, or the anchor.
+PosLayout = namedtuple('PosLayout', ['name', 'markers', 'anchor', 'columns', 'type_labels'])
+
+NET_POSITION = PosLayout(
+    name='net position',
+    markers=['Scrip', 'Call/Put'],
+    anchor=None,
+    columns={
+        'Scrip': 'stock', 'Call/Put': 'type', 'Exp Date': 'expiry', 'STK': 'strike',
+        'LTP': 'ltp', 'BF Qty': 'bf_qty', 'Net Qty': 'qty',
+    },
+    type_labels={'CE': 'CE', 'PE': 'PE', 'FF': FUTURES},
+)
+
+COMBINED_NET_POSITION = PosLayout(
+    name='combined net position',
+    markers=[],
+    anchor='COMBINED NET POSITION',
+    columns={-3: 'stock', 0: 'strike', 4: 'type', 6: 'qty', 12: 'exposure', 14: 'm2m'},
+    type_labels={'CE': 'CE', 'PE': 'PE', 'FX': FUTURES},
+)
+
+LAYOUTS = [NET_POSITION, COMBINED_NET_POSITION]
+
+
+def _field_positions(layout, labels, width):
+    # {field: column} for a candidate header row, or None when it is not one.
+    # ``width`` is the widest row, as header rows are often shorter.
+    if layout.anchor is not None:
+        if layout.anchor not in labels:
+            return None
+        anchor = labels.index(layout.anchor)
+        return {
+            field: anchor + offset for offset, field in layout.columns.items()
+            if 0 <= anchor + offset < width
+        }
+    if not all(marker in labels for marker in layout.markers):
+        return None
+    return {field: labels.index(label) for label, field in layout.columns.items() if label in labels}
+
+
+def detect_layout(rows, width=None):
+    """Return ``(layout, header_row, {field: column})`` for a sheet's rows.
+
+    ``width`` bounds the columns fields may sit in and defaults to the
+    widest row. Raises ``ValueError`` when none of the first
+    ``HEADER_SCAN_ROWS`` rows is a header row of a known layout.
+    """
+    if width is None:
+        width = max(map(len, rows), default=0)
+    for number, row in enumerate(rows[:HEADER_SCAN_ROWS]):
+        labels = [str(value).strip() for value in row]
+        for layout in LAYOUTS:
+            positions = _field_positions(layout, labels, width)
+            if positions is not None:
+                return layout, number, positions
+    expected = ' or '.join(
+        repr(layout.anchor) if layout.anchor else ', '.join(map(repr, layout.markers)) for layout in LAYOUTS
+    )
+    raise ValueError(f"Unrecognised POS file: no header row with {expected} in the first {HEADER_SCAN_ROWS} rows")
+
+
+def last_column(rows, fields):
+    """The highest column ``fields`` (and the position type) use, from the
+    header found in a sheet's first rows; ``None`` when every field is used.
+
+    Lets a reader skip the columns to the right of it. A missing field is
+    left for ``normalize_rows`` to report.
+    """
+    if fields is None:
+        return None
+    _, _, positions = detect_layout(rows, width=float('inf'))
+    return max((positions[f] for f in ['type', *fields] if f in positions), default=0)
+
+
+def _cast(values, dtype):
+    if dtype == 'category':
+        series = pd.Series(values, dtype=object)
+        return series.where(series != '').astype('category')
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+    if dtype.startswith('int'):
+        # A blank quantity holds no position
+        numbers = numbers.fillna(0)
+    return numbers.astype(dtype)
+
+
+def normalize_rows(rows, fields=None):
+    """Positions from a sheet's cell rows (blank cells as ``''``).
+
+    ``fields`` are the fields the caller uses; only those columns are
+    converted and a ``ValueError`` names any the file does not have. By
+    default every field of the detected layout is returned.
+    """
+    layout, header, positions = detect_layout(rows)
+    if fields is None:
+        fields = [f for f in FIELD_DTYPES if f in positions]
+    missing = [f for f in dict.fromkeys(['type', *fields]) if f not in positions]
+    if missing:
+        plural = 's' if len(missing) > 1 else ''
+        raise ValueError(f"The {layout.name} POS file has no {', '.join(missing)} column{plural}")
+
+    body = rows[header + 1:]
+    types = pd.Series([row[positions['type']] if positions['type'] < len(row) else '' for row in body],
+                      dtype=object)
+    types = types.map(layout.type_labels)
+    keep = np.flatnonzero(types.notna().to_numpy())
+
+    data = {}
+    for field in fields:
+        if field == 'type':
+            data[field] = pd.Categorical(types.iloc[keep], categories=POSITION_TYPES)
+            continue
+        column = positions[field]
+        values = [body[i][column] if column < len(body[i]) else '' for i in keep]
+        data[field] = _cast(values, FIELD_DTYPES[field]).array
+    return pd.DataFrame(data, columns=list(fields))
+
+
+def normalize_frame(frame, fields=None):
+    """``normalize_rows`` for a frame as ``pd.read_excel`` returns it."""
+    header = ['' if str(col).startswith('Unnamed: ') else col for col in frame.columns]
+    body = frame.astype(object).where(frame.notna(), '').to_numpy().tolist()
+    return normalize_rows([header] + body, fields)
@@ -0,0 +1,119 @@
+"""FX / CE / PE position matching for a POS file.
+
+Pure functions over the frame ``core.pos_file.read_pos`` returns for a POS file;
+the Streamlit page only renders what these return.
+"""
+import pandas as pd
+
+from core.perf import timed
+from core.pos_schema import POSITION_TYPES
+
+# core.pos_schema fields
+STOCK = 'stock'
+STRIKE = 'strike'
+TYPE = 'type'
+QTY = 'qty'
+EXPOSURE = 'exposure'
+M2M = 'm2m'
+# Fields the position matching page reads from the POS file
+POS_FIELDS = [STOCK, STRIKE, TYPE, QTY, EXPOSURE, M2M]
+
+
+@timed('positions.select_rows')
+def select_position_rows(data):
+    """The CE, PE and FX positions."""
+    return data[data[TYPE].isin(POSITION_TYPES)].reset_index(drop=True)
+
+
+@timed('positions.summarize')
+def summarize_positions(data):
+    """Return ``(exposure, fx_sum, ce_sum, pe_sum, position)``.
+
+    ``position`` is 'Matched' when the absolute FX, CE and PE quantities are
+    all equal and 'Not Matched' otherwise.
+    """
+    # Totals over the whole file can outgrow the int32 quantities
+    sums = data[QTY].astype('int64').groupby(data[TYPE], observed=True).sum()
+    fx_sum = sums.get('FX', 0)
+    ce_sum = sums.get('CE', 0)
+    pe_sum = sums.get('PE', 0)
+
+    exp = data.loc[data[TYPE] == 'FX', EXPOSURE].sum()
+    exposure = f'{round(exp / 100000)} Lac'
+
+    if abs(fx_sum) == abs(ce_sum) == abs(pe_sum):
+        position = 'Matched'
+    else:
+        position = 'Not Matched'
+    return exposure, fx_sum, ce_sum, pe_sum, position
+
+
+def net_positions(data):
+    """Net quantities per strike and per stock from one grouped aggregation.
+
+    Returns ``(strikes, stocks)``:
+
+    - ``strikes``: one row per (stock, strike) holding CE or PE legs, with
+      ``CE``/``PE``/``FX`` quantities and ``strike_mismatch`` when CE and PE
+      do not cancel out.
+    - ``stocks``: one row per stock with its total ``FX``/``CE``/``PE``,
+      the number of balanced strikes and ``future_mismatch`` when a stock
+      with balanced strikes has CE and FX that do not cancel out.
+
+    Stocks keep their order of first appearance; strikes are sorted.
+    """
+    data = data[data[TYPE].isin(POSITION_TYPES)]
+    stock_order = pd.unique(data[STOCK])
+    stock_key = pd.Categorical(data[STOCK], categories=stock_order)
+
+    # The single pass over the rows; everything below works on its result.
+    # Missing (stock, strike, type) combinations stay NaN so a strike whose
+    # legs net to zero can still be told apart from one without legs.
+    grouped = (
+        data.groupby([stock_key, data[STRIKE], data[TYPE]], dropna=False, observed=True)[QTY]
+        .sum()
+        .unstack()
+        .reindex(columns=POSITION_TYPES)
+    )
+    grouped.index.names = ['Stock', 'Strike']
+    has_legs = grouped['CE'].notna() | grouped['PE'].notna()
+    grouped = grouped.fillna(0).astype(data[QTY].dtype)
+
+    stocks = grouped.groupby(level='Stock', observed=True).sum()
+
+    strikes = grouped.loc[has_legs, ['CE', 'PE']]
+    strikes = strikes[strikes.index.get_level_values('Strike').notna()]
+    strikes = strikes.join(stocks['FX'], on='Stock')
+    strikes['strike_mismatch'] = (strikes['CE'] + strikes['PE']) != 0
+    strikes = strikes.reset_index()
+
+    balanced = strikes[~strikes['strike_mismatch']].groupby('Stock', observed=True).size()
+    stocks['balanced_strikes'] = balanced.reindex(stocks.index, fill_value=0)
+    stocks['future_mismatch'] = (stocks['balanced_strikes'] > 0) & ((stocks['CE'] + stocks['FX']) != 0)
+    stocks = stocks.reset_index()
+
+    return strikes, stocks
+
+
+@timed('positions.find_mismatches')
+def find_mismatches(data):
+    """Mismatch tables in the layout shown on the position matching page."""
+    strikes, stocks = net_positions(data)
+
+    mismatch_strikes = strikes[strikes['strike_mismatch']]
+    mismatch_strikes = pd.DataFrame({
+        'Stock': mismatch_strikes['Stock'].astype(object),
+        'Strike': mismatch_strikes['Strike'],
+        'CE Quantity': mismatch_strikes['CE'],
+        'PE Quantity': mismatch_strikes['PE'],
+        'FX Quantity': mismatch_strikes['FX'],
+    }).reset_index(drop=True)
+
+    future_mismatch = stocks[stocks['future_mismatch']]
+    future_mismatch = pd.DataFrame({
+        'stock': future_mismatch['Stock'].astype(object),
+        'net fx quantity': future_mismatch['FX'],
+        'net ce quantity': future_mismatch['CE'],
+    }).reset_index(drop=True)
+
+    return mismatch_strikes, future_mismatch
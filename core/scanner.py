@@ -0,0 +1,183 @@
+"""Live option-chain scanner for the F&O universe.
+
+All symbols share one pooled ``requests.Session`` (NSE cookies are fetched
+once, not per call) behind a bounded thread pool and the per-host rate
+limiter from ``core.backfill``. The LTP is the chain's own
+``underlyingValue``, and every symbol's latency and error is recorded so
+slow or failing symbols are visible.
+
+The scanner keeps no cache of its own: chains are reused only by the
+process-wide source (``core.data_sources.SharedSource``), so there is one
+TTL that says how old a quote can be.
+"""
+import concurrent.futures
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from core.backfill import limiter_for
+from core.data_sources import get_source
+from core.perf import in_context, timed
+from core.shared_cache import Singleton
+from core.universe import INDEX_SYMBOLS
+
+NSE_BASE_URL = 'https://www.nseindia.com'
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nseindia.com/option-chain',
+    'Connection': 'keep-alive',
+}
+
+# Same layout as nselib's nse_live_option_chain(oi_mode='full')
+LEG_FIELDS = [
+    ('OI', 'openInterest'),
+    ('Chng_in_OI', 'changeinOpenInterest'),
+    ('Volume', 'totalTradedVolume'),
+    ('IV', 'impliedVolatility'),
+    ('LTP', 'lastPrice'),
+    ('Net_Chng', 'change'),
+    ('Bid_Qty', 'buyQuantity1'),
+    ('Bid_Price', 'buyPrice1'),
+    ('Ask_Price', 'sellPrice1'),
+    ('Ask_Qty', 'sellQuantity1'),
+]
+
+# status is 'ok' or 'error'; latency is in seconds
+SymbolMetric = namedtuple('SymbolMetric', ['symbol', 'status', 'latency', 'rows', 'error'])
+ScanResult = namedtuple('ScanResult', ['calls', 'puts', 'metrics'])
+
+
+class NseChainClient:
+    """Fetches raw option-chain JSON over one pooled, cookie-carrying session."""
+
+    def __init__(self, base_url=NSE_BASE_URL, pool_size=32, timeout=10, rate=8.0):
+        # requests is imported here so the pages load without it
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(BROWSER_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.limiter = limiter_for(requests.utils.urlparse(self.base_url).netloc, rate)
+        self.cookie_lock = threading.Lock()
+        self.has_cookies = False
+
+    def _warm_cookies(self, force=False):
+        # NSE only answers API calls that carry the cookies from a page visit
+        with self.cookie_lock:
+            if self.has_cookies and not force:
+                return
+            self.session.get(f'{self.base_url}/option-chain', timeout=self.timeout)
+            self.has_cookies = True
+
+    def option_chain(self, symbol, expiry=None):
+        self._warm_cookies()
+        kind = 'Indices' if symbol.upper() in INDEX_SYMBOLS else 'Equity'
+        params = {'type': kind, 'symbol': symbol.upper()}
+        if expiry:
+            params['expiry'] = expiry
+        url = f'{self.base_url}/api/option-chain-v3'
+        for attempt in range(2):
+            self.limiter.wait()
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            if response.status_code in (401, 403) and attempt == 0:
+                # Cookies expired; refresh them once and retry
+                self._warm_cookies(force=True)
+                continue
+            response.raise_for_status()
+            with timed('scanner.parse_json') as span:
+                span.record(bytes=len(response.content))
+                return response.json()
+
+
+def parse_chain(symbol, payload):
+    """Return ``(chain_df, underlying_value)`` from an option-chain payload."""
+    records = payload['records']
+    rows = []
+    for item in records.get('data', []):
+        row = {
+            'Fetch_Time': records.get('timestamp'),
+            'Symbol': symbol,
+            'Expiry_Date': item.get('expiryDates', item.get('expiryDate')),
+            'Strike_Price': item.get('strikePrice', 0),
+        }
+        for side, prefix in (('CE', 'CALLS'), ('PE', 'PUTS')):
+            leg = item.get(side) or {}
+            for name, key in LEG_FIELDS:
+                row[f'{prefix}_{name}'] = leg.get(key, 0)
+        rows.append(row)
+    return pd.DataFrame(rows), records.get('underlyingValue')
+
+
+def split_chain(chain, ltp):
+    """ITM calls (strike <= LTP) and ITM puts (strike >= LTP) with a lot size."""
+    lot_size = chain[chain['CALLS_Ask_Qty'] != 0]['CALLS_Ask_Qty'].min()
+    lot_size = 1 if pd.isna(lot_size) or lot_size == 0 else lot_size
+    chain = chain.assign(Lot_Size=lot_size)
+    calls = chain[chain['Strike_Price'] <= ltp].copy()
+    puts = chain[chain['Strike_Price'] >= ltp].copy()
+    return calls, puts
+
+
+class OptionChainScanner:
+    def __init__(self, client=None, max_workers=16):
+        # Anything with ``option_chain(symbol)``: a ``NseChainClient`` or a
+        # ``core.data_sources`` source (the process-wide one by default)
+        self.client = client or get_source()
+        self.max_workers = max_workers
+
+    def chain(self, symbol):
+        """Return ``(chain_df, ltp)`` for one symbol."""
+        with timed('scanner.chain') as span:
+            chain, ltp = parse_chain(symbol, self.client.option_chain(symbol))
+            span.record(rows_out=len(chain))
+            return chain, ltp
+
+    def _scan_one(self, symbol):
+        start = time.perf_counter()
+        try:
+            chain, ltp = self.chain(symbol)
+            if chain.empty or ltp is None:
+                raise ValueError('empty option chain')
+            calls, puts = split_chain(chain, ltp)
+            metric = SymbolMetric(symbol, 'ok', time.perf_counter() - start, len(chain), None)
+            return calls, puts, metric
+        except Exception as e:
+            metric = SymbolMetric(symbol, 'error', time.perf_counter() - start, 0, f'{type(e).__name__}: {e}')
+            return None, None, metric
+
+    def scan_each(self, symbols):
+        """``(calls, puts, metric)`` per symbol, in order; calls and puts are None on error."""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # One context copy per symbol: a context cannot be entered by two threads at once
+            runs = [in_context(self._scan_one) for _ in symbols]
+            return list(executor.map(lambda run, symbol: run(symbol), runs, symbols))
+
+    def scan(self, symbols):
+        """Scan every symbol; returns ``ScanResult(calls, puts, metrics)``."""
+        results = self.scan_each(symbols)
+        calls = [c for c, _, _ in results if c is not None]
+        puts = [p for _, p, _ in results if p is not None]
+        metrics = pd.DataFrame([m for _, _, m in results], columns=SymbolMetric._fields)
+        return ScanResult(
+            pd.concat(calls, ignore_index=True) if calls else pd.DataFrame(),
+            pd.concat(puts, ignore_index=True) if puts else pd.DataFrame(),
+            metrics,
+        )
+
+
+_scanner = Singleton(OptionChainScanner)
+
+
+def get_scanner():
+    """Process-wide scanner so its pooled session outlives a rerun."""
+    return _scanner.get()
@@ -0,0 +1,213 @@
+"""Process-wide response cache shared by every Streamlit session.
+
+Sessions run as threads of one server process, so a cache at module level
+is seen by all of them. ``SingleFlightCache`` is an LRU bounded by entry
+count and by the memory of the frames it holds; entries expire after a
+per-key TTL. Concurrent misses on one key do not each call the source:
+the first caller fetches and the others wait on that fetch and share its
+result (or its exception, which is not cached).
+
+Counters are kept per kind (the first element of a key tuple, e.g.
+``'bhavcopy'``) and ``stats()`` returns them with the hit rate.
+
+``LRUCache`` and ``Singleton`` are the small thread-safe building blocks
+the other process-wide caches and getters in ``core`` are made of.
+"""
+import collections
+import threading
+import time
+
+import pandas as pd
+
+MAX_ENTRIES = 256
+MAX_BYTES = 512 * 2 ** 20
+
+STATS_COLUMNS = ['kind', 'hits', 'coalesced', 'misses', 'errors', 'evictions', 'entries', 'hit_rate']
+
+
+def _size(value):
+    # Only frames are weighed; JSON payloads and symbol lists are small
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    return 0
+
+
+def _kind(key):
+    return key[0] if isinstance(key, tuple) else key
+
+
+class LRUCache:
+    """A thread-safe mapping keeping the ``max_entries`` most recently used keys."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self.lock:
+            return self.entries.pop(key, default)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class Singleton:
+    """One process-wide instance of ``factory()``, created on first use."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.instance = None
+
+    def get(self):
+        with self.lock:
+            if self.instance is None:
+                self.instance = self.factory()
+            return self.instance
+
+    def set(self, instance):
+        """Replace the instance (``None`` recreates it on next use); returns the previous one."""
+        with self.lock:
+            previous, self.instance = self.instance, instance
+        return previous
+
+
+class _Flight:
+    """One fetch in progress; waiters block on ``done``."""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> (expires_at, size, value), least recently used first
+        self.entries = collections.OrderedDict()
+        self.in_flight = {}
+        self.bytes = 0
+        self.counts = collections.defaultdict(collections.Counter)
+
+    def get(self, key, fetch, ttl=None):
+        """The cached value for ``key``, calling ``fetch()`` once on a miss.
+
+        ``ttl`` is in seconds; ``None`` keeps the entry until it is evicted.
+        """
+        kind = _kind(key)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.counts[kind]['hits'] += 1
+                    return entry[2]
+                self._remove(key)
+            flight = self.in_flight.get(key)
+            if flight is not None:
+                self.counts[kind]['coalesced'] += 1
+                owner = False
+            else:
+                flight = self.in_flight[key] = _Flight()
+                self.counts[kind]['misses'] += 1
+                owner = True
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+        except BaseException as e:
+            flight.error = e
+            with self.lock:
+                self.counts[kind]['errors'] += 1
+                del self.in_flight[key]
+            flight.done.set()
+            raise
+        with self.lock:
+            del self.in_flight[key]
+            size = _size(flight.value)
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (None if ttl is None else time.monotonic() + ttl, size, flight.value)
+            self.bytes += size
+            self._evict()
+        flight.done.set()
+        return flight.value
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+
+    def _evict(self):
+        # The newest entry stays even when it alone is over ``max_bytes``
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            key = next(iter(self.entries))
+            self._remove(key)
+            self.counts[_kind(key)]['evictions'] += 1
+
+    def invalidate(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+            self.counts.clear()
+
+    def stats(self):
+        """One row per kind with ``STATS_COLUMNS``.
+
+        ``coalesced`` calls waited on another session's fetch; they count
+        as hits in ``hit_rate`` since the source was not called for them.
+        """
+        with self.lock:
+            entries = collections.Counter(_kind(key) for key in self.entries)
+            rows = []
+            for kind in sorted(set(self.counts) | set(entries), key=str):
+                counts = self.counts[kind]
+                served = counts['hits'] + counts['coalesced']
+                total = served + counts['misses']
+                rows.append([
+                    kind, counts['hits'], counts['coalesced'], counts['misses'], counts['errors'],
+                    counts['evictions'], entries[kind], served / total if total else 0.0,
+                ])
+        return pd.DataFrame(rows, columns=STATS_COLUMNS)
+
+
+_cache = Singleton(SingleFlightCache)
+
+
+def get_shared_cache():
+    """The process-wide cache used by ``core.data_sources.SharedSource``."""
+    return _cache.get()
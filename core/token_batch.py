@@ -0,0 +1,166 @@
+"""Headless batch generation of CR token files.
+
+Writes the same CSV / TXT files as the download buttons of the Stock CR
+Token page for every combination of dates, expiry months, OI thresholds and
+ATM percentages. Missing bhavcopies are backfilled into the local store
+first; then every date is handled by one worker process that reads its
+bhavcopy once and evaluates the whole parameter grid against it.
+
+Example::
+
+    python -m core.token_batch --dates 2025-08-01 2025-08-04 --months AUG SEP \\
+        --oi-thresholds 0 500 --atm-percentages 5 8 --out tokens/
+"""
+import argparse
+import concurrent.futures
+import datetime
+import itertools
+import os
+import sys
+from collections import namedtuple
+
+import pandas as pd
+
+from core.backfill import backfill, trading_days
+from core.bhavcopy_store import BhavcopyStore, to_date
+from core.instruments import as_master
+from core.token_sweep import TokenSweep
+from core.tokens import token_counts, token_file_name, tokens_csv, tokens_txt
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+FORMATS = {'csv': tokens_csv, 'txt': tokens_txt}
+
+# One row per (date, month, oi_threshold, atm_percentage); ``files`` lists the
+# paths written and ``error`` is the message the page would have shown
+BatchResult = namedtuple('BatchResult', [
+    'date', 'month', 'oi_threshold', 'atm_percentage',
+    'tokens', 'futures', 'calls', 'puts', 'files', 'error',
+])
+
+
+def parameter_grid(months, oi_thresholds, atm_percentages):
+    """Every ``(month, oi_threshold, atm_percentage)`` combination."""
+    return list(itertools.product(months, oi_thresholds, atm_percentages))
+
+
+def output_name(date_str, month, oi_threshold, atm_percentage, extension, tag_params):
+    name = token_file_name(date_str, month, extension)
+    if not tag_params:
+        return name
+    # Several thresholds for the same date and month would overwrite each other
+    stem, extension = os.path.splitext(name)
+    return f'{stem}_oi{oi_threshold:g}_atm{atm_percentage:g}{extension}'
+
+
+def evaluate_date(data, date, grid, out_dir, ascending=True, formats=tuple(FORMATS), tag_params=False):
+    """Evaluate ``grid`` against one day's bhavcopy and write the token files."""
+    date_str = f'{to_date(date):%Y-%m-%d}'
+    results = []
+    # The contracts are parsed once per date and looked up once per month,
+    # not once per grid point
+    master = as_master(data)
+    sweeps = {}
+    for month, oi_threshold, atm_percentage in grid:
+        if month not in sweeps:
+            sweeps[month] = TokenSweep(master, month)
+        tokens_df, error = sweeps[month].tokens(oi_threshold, atm_percentage)
+        if error:
+            results.append(BatchResult(date_str, month, oi_threshold, atm_percentage, 0, 0, 0, 0, [], error))
+            continue
+        tokens_df = tokens_df.sort_values(by='All Columns', ascending=ascending)
+        files = []
+        for extension in formats:
+            path = os.path.join(out_dir, output_name(date_str, month, oi_threshold, atm_percentage, extension, tag_params))
+            with open(path, 'wb') as f:
+                f.write(FORMATS[extension](tokens_df))
+            files.append(path)
+        futures, calls, puts = token_counts(tokens_df)
+        results.append(BatchResult(
+            date_str, month, oi_threshold, atm_percentage, len(tokens_df), futures, calls, puts, files, None,
+        ))
+    return results
+
+
+def _run_date(root, date, grid, out_dir, ascending, formats, tag_params):
+    # Runs in a worker process; the day is already in the store
+    data = BhavcopyStore(root).read(date)
+    return evaluate_date(data, date, grid, out_dir, ascending, formats, tag_params)
+
+
+def run_batch(store, dates, grid, out_dir, max_workers=None, ascending=True, formats=tuple(FORMATS)):
+    """Write token files for every date and grid point; returns ``BatchResult`` rows.
+
+    Dates whose bhavcopy cannot be loaded get one error row per grid point.
+    ``max_workers`` defaults to one process per core.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tag_params = len({(oi, atm) for _, oi, atm in grid}) > 1
+    results = []
+    loadable = []
+    for day in backfill(store, [to_date(d) for d in dates]):
+        if day.status in ('failed', 'empty'):
+            error = f"Error: {day.error or 'No data available for the selected date.'}"
+            results.extend(
+                BatchResult(f'{day.date:%Y-%m-%d}', month, oi, atm, 0, 0, 0, 0, [], error)
+                for month, oi, atm in grid
+            )
+        else:
+            loadable.append(day.date)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_run_date, store.root, date, grid, out_dir, ascending, formats, tag_params)
+            for date in loadable
+        ]
+        for future in futures:
+            results.extend(future.result())
+    return sorted(results, key=lambda r: (r.date, MONTHS.index(r.month) if r.month in MONTHS else 0,
+                                          r.oi_threshold, r.atm_percentage))
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m core.token_batch', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--dates', nargs='+', default=[], help="trading dates, YYYY-MM-DD")
+    parser.add_argument('--start', help="first date of a range of NSE sessions, YYYY-MM-DD")
+    parser.add_argument('--end', help="last date of the range (default: today)")
+    parser.add_argument('--months', nargs='+', default=[MONTHS[datetime.date.today().month - 1]],
+                        type=str.upper, choices=MONTHS, help="expiry months (default: current month)")
+    parser.add_argument('--oi-thresholds', nargs='+', type=float, default=[0], help="default: 0")
+    parser.add_argument('--atm-percentages', nargs='+', type=float, default=[8], help="default: 8")
+    parser.add_argument('--out', default='tokens', help="output directory (default: ./tokens)")
+    parser.add_argument('--formats', nargs='+', choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument('--descending', action='store_true', help="sort tokens in descending order")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument('--store', default=None, help="bhavcopy store directory")
+    args = parser.parse_args(argv)
+    if not args.dates and not args.start:
+        parser.error("give --dates or --start")
+    args.dates = [to_date(d) for d in args.dates]
+    if args.start:
+        try:
+            args.dates += trading_days(to_date(args.start), to_date(args.end) if args.end else datetime.date.today())
+        except ValueError as e:
+            parser.error(str(e))
+    args.dates = sorted(set(args.dates))
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    dates = args.dates
+
+    grid = parameter_grid(args.months, args.oi_thresholds, args.atm_percentages)
+    results = run_batch(
+        BhavcopyStore(args.store), dates, grid, args.out,
+        max_workers=args.workers, ascending=not args.descending, formats=args.formats,
+    )
+
+    summary = pd.DataFrame(results, columns=BatchResult._fields).drop(columns='files')
+    print(summary.to_string(index=False))
+    failed = summary['error'].notna().sum()
+    print(f"\n{len(summary) - failed}/{len(summary)} token sets written to {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Token counts over a grid of OI thresholds and ATM percentages.
+
+``TokenSweep`` looks up one day's contracts of a month once and keeps, per
+in-the-money strike, how many of the grid's ATM percentages leave it
+outside the band and how many of the grid's OI thresholds it clears. A
+two-dimensional histogram of those ranks and a couple of cumulative sums
+then give the FUT / CE / PE counts of every grid point at once, with the
+same comparisons as ``generate_tokens`` so the counts match it exactly.
+"""
+import numpy as np
+import pandas as pd
+
+from core.instruments import CE_CODE, FUT_CODE, PE_CODE, as_master
+from core.perf import timed
+from core.tokens import generate_tokens
+
+SWEEP_COLUMNS = ['oi_threshold', 'atm_percentage', 'tokens', 'futures', 'calls', 'puts', 'error']
+
+
+def _outside_counts(strike, underlying, atm_percentages):
+    """Per strike, how many of the sorted ``atm_percentages`` put it outside the band.
+
+    Being outside only gets harder as the percentage grows, so a vectorized
+    bisection over the grid finds the cut-off with the exact predicate.
+    """
+    lo = np.zeros(len(strike), dtype=np.int64)
+    hi = np.full(len(strike), len(atm_percentages), dtype=np.int64)
+    while (lo < hi).any():
+        active = lo < hi
+        mid = (lo + hi) // 2
+        atm_decimal = atm_percentages[np.minimum(mid, len(atm_percentages) - 1)] / 100
+        outside = (
+            (strike <= underlying - (atm_decimal * underlying)) |
+            (strike >= underlying + (atm_decimal * underlying))
+        )
+        lo = np.where(active & outside, mid + 1, lo)
+        hi = np.where(active & ~outside, mid, hi)
+    return lo
+
+
+class TokenSweep:
+    """One day's bhavcopy for one expiry month, ready to be swept."""
+
+    def __init__(self, data, month):
+        self.month = month
+        self.error = None
+        # A frame or the day's InstrumentMaster; grid points reuse its index
+        self.master = as_master(data)
+        if self.master.empty:
+            self.error = "No data available for the selected date."
+            return
+        rows = self.master.rows(month=month)
+        if not len(rows):
+            self.error = f"No contracts found for {month}."
+
+        contract_type = self.master.type_codes(rows)
+        tokenised = self.master.tokenised(rows)
+        self.futures = int(((contract_type == FUT_CODE) & tokenised).sum())
+
+        strike = self.master.column('StrkPric', rows)
+        underlying = self.master.column('UndrlygPric', rows)
+        itm = ((strike >= underlying) & (contract_type == PE_CODE)) | ((strike <= underlying) & (contract_type == CE_CODE))
+        if self.error is None and not itm.any():
+            self.error = "No matching data after applying filters."
+
+        # Only in-the-money strikes can ever be selected
+        self.strike = strike[itm]
+        self.underlying = underlying[itm]
+        self.open_int = (self.master.column('OpnIntrst', rows) / self.master.column('NewBrdLotQty', rows))[itm]
+        self.tokenised = tokenised[itm]
+
+    @timed('tokens.sweep_grid')
+    def grid(self, oi_thresholds, atm_percentages):
+        """One row per (OI threshold, ATM %) with the token counts of that point.
+
+        ``error`` holds the message ``generate_tokens`` would return there.
+        """
+        oi_grid = np.asarray(sorted(set(oi_thresholds)), dtype=float)
+        atm_grid = np.asarray(sorted(set(atm_percentages)), dtype=float)
+        shape = (len(oi_grid), len(atm_grid))
+        selected_all = np.zeros(shape, dtype=np.int64)
+        selected_tokenised = np.zeros(shape, dtype=np.int64)
+
+        if self.error is None and len(oi_grid) and len(atm_grid):
+            # Strike i is inside the band for ATM grid points >= outside[i]
+            # and clears OI grid points < clears[i]
+            outside = _outside_counts(self.strike, self.underlying, atm_grid)
+            open_int = np.nan_to_num(self.open_int, nan=-np.inf)
+            clears = np.searchsorted(oi_grid, open_int, side='left')
+            for target, weights in ((selected_all, None), (selected_tokenised, self.tokenised)):
+                hist = np.zeros((len(atm_grid) + 1, len(oi_grid) + 1))
+                np.add.at(hist, (outside, clears), 1 if weights is None else weights.astype(float))
+                # Inside the band: every strike with outside <= a
+                inside = np.cumsum(hist.sum(axis=1))[:len(atm_grid)]
+                # Outside the band (outside > a) but clearing the OI threshold (clears > t)
+                suffix = hist[::-1, ::-1].cumsum(axis=0).cumsum(axis=1)[::-1, ::-1]
+                outside_clearing = suffix[1:len(atm_grid) + 1, 1:len(oi_grid) + 1]
+                target[:] = (inside[:, None] + outside_clearing).T.round().astype(np.int64)
+
+        oi_mesh, atm_mesh = np.meshgrid(oi_grid, atm_grid, indexing='ij')
+        result = pd.DataFrame({
+            'oi_threshold': oi_mesh.ravel(),
+            'atm_percentage': atm_mesh.ravel(),
+            'calls': selected_tokenised.ravel(),
+            'puts': selected_tokenised.ravel(),
+        })
+        no_selection = selected_all.ravel() == 0
+        result['futures'] = np.where(no_selection, 0, self.futures if self.error is None else 0)
+        result.loc[no_selection, ['calls', 'puts']] = 0
+        result['tokens'] = result['futures'] + result['calls'] + result['puts']
+        result['error'] = self.error if self.error else np.where(
+            no_selection, "No data after applying OI threshold filter.", None
+        )
+        return result[SWEEP_COLUMNS]
+
+    def tokens(self, oi_threshold, atm_percentage):
+        """``(tokens_df, error)`` for one grid point, as ``generate_tokens`` returns."""
+        if self.error:
+            return None, self.error
+        return generate_tokens(self.master, self.month, oi_threshold, atm_percentage)
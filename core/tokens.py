@@ -0,0 +1,83 @@
+"""Stock CR token generation from a day's F&O bhavcopy."""
+import pandas as pd
+
+from core.instruments import CE_CODE, FUT_CODE, PE_CODE, as_master
+from core.perf import timed
+
+
+@timed('tokens.generate')
+def generate_tokens(data, month, oi_threshold, atm_percentage):
+    """Return ``(tokens_df, error)`` for a bhavcopy frame or its ``InstrumentMaster``.
+
+    ``tokens_df`` has a single ``'All Columns'`` column of ``NRML|`` tokens
+    sorted alphabetically. Contracts of ``month`` are looked up by expiry in
+    the instrument master; every later step is a boolean mask over whole
+    columns.
+    """
+    master = as_master(data)
+    if master.empty:
+        return None, "No data available for the selected date."
+
+    # Contracts expiring in the selected month
+    rows = master.rows(month=month)
+    if not len(rows):
+        return None, f"No contracts found for {month}."
+    contract_type = master.type_codes(rows)
+    is_fut = contract_type == FUT_CODE
+
+    strike = master.column('StrkPric', rows)
+    underlying = master.column('UndrlygPric', rows)
+    open_int = master.column('OpnIntrst', rows) / master.column('NewBrdLotQty', rows)
+
+    # In-the-money strikes: calls at or below the underlying, puts at or above
+    itm = ((strike >= underlying) & (contract_type == PE_CODE)) | ((strike <= underlying) & (contract_type == CE_CODE))
+    if not itm.any():
+        return None, "No matching data after applying filters."
+
+    # Strikes beyond the ATM band only qualify with enough open interest
+    atm_decimal = atm_percentage / 100
+    outside_atm = (
+        (strike <= underlying - (atm_decimal * underlying)) |
+        (strike >= underlying + (atm_decimal * underlying))
+    )
+    selected = itm & (~outside_atm | (open_int > oi_threshold))
+    if not selected.any():
+        return None, "No data after applying OI threshold filter."
+
+    # Index contracts and odd strikes are never tokenised
+    tokenised = master.tokenised(rows)
+
+    # Every selected strike gets both a CE and a PE token
+    base = master.stems(rows[selected & tokenised])
+    futures = master.stems(rows[is_fut & tokenised])
+    tokens = pd.concat(
+        ['NRML|' + base + 'CE', 'NRML|' + base + 'PE', 'NRML|' + futures],
+        ignore_index=True,
+    )
+
+    df = pd.DataFrame({'All Columns': tokens.sort_values().to_numpy()})
+    return df, None
+
+
+def token_counts(tokens_df):
+    """Return ``(futures, calls, puts)`` counts for a tokens frame."""
+    tokens = tokens_df['All Columns']
+    return (
+        int(tokens.str.contains('FUT$', regex=True).sum()),
+        int(tokens.str.contains('CE$', regex=True).sum()),
+        int(tokens.str.contains('PE$', regex=True).sum()),
+    )
+
+
+def token_file_name(date_str, month, extension):
+    return f"stock_crtoken_{date_str}_{month}.{extension}"
+
+
+def tokens_csv(tokens_df):
+    """The bytes of the CSV download."""
+    return tokens_df.to_csv(index=False).encode('utf-8')
+
+
+def tokens_txt(tokens_df):
+    """The bytes of the TXT download: one token per line."""
+    return "\n".join(tokens_df['All Columns'].tolist()).encode('utf-8')
@@ -0,0 +1,73 @@
+"""NSE trading calendar backed by a precomputed, sorted array of sessions.
+
+The pandas_market_calendars calendar is built once per process; after that
+every query is a binary search over a ``datetime64[D]`` array instead of a
+fresh ``get_calendar('NSE').schedule(...)`` call.
+"""
+import datetime
+import functools
+
+import numpy as np
+import pandas as pd
+
+WINDOW_START = datetime.date(2005, 1, 1)
+WINDOW_YEARS_AHEAD = 2
+
+
+def _day(value):
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class TradingCalendar:
+    def __init__(self, sessions):
+        self.sessions = np.unique(np.asarray(sessions, dtype='datetime64[D]'))
+        if len(self.sessions) == 0:
+            raise ValueError("Trading calendar has no sessions")
+        self.first = self.sessions[0]
+        self.last = self.sessions[-1]
+
+    def _check(self, day):
+        if day < self.first or day > self.last:
+            raise ValueError(f"{day} is outside the calendar window {self.first} to {self.last}")
+
+    def is_trading_day(self, date):
+        day = _day(date)
+        self._check(day)
+        i = np.searchsorted(self.sessions, day)
+        return i < len(self.sessions) and self.sessions[i] == day
+
+    def previous_session(self, date):
+        """Last session strictly before ``date``."""
+        day = _day(date)
+        self._check(day)
+        i = np.searchsorted(self.sessions, day, side='left')
+        if i == 0:
+            raise ValueError(f"No session before {day} in the calendar window")
+        return self.sessions[i - 1].astype(datetime.date)
+
+    def next_session(self, date):
+        """First session strictly after ``date``."""
+        day = _day(date)
+        self._check(day)
+        i = np.searchsorted(self.sessions, day, side='right')
+        if i == len(self.sessions):
+            raise ValueError(f"No session after {day} in the calendar window")
+        return self.sessions[i].astype(datetime.date)
+
+    def sessions_between(self, start, end):
+        """Sessions from ``start`` to ``end`` inclusive, as ``datetime.date``."""
+        start, end = _day(start), _day(end)
+        self._check(start)
+        self._check(end)
+        lo = np.searchsorted(self.sessions, start, side='left')
+        hi = np.searchsorted(self.sessions, end, side='right')
+        return self.sessions[lo:hi].astype(datetime.date).tolist()
+
+
+@functools.lru_cache(maxsize=1)
+def get_calendar():
+    """Process-wide NSE calendar covering 2005 to two years from today."""
+    import pandas_market_calendars as mcal
+    end = datetime.date(datetime.date.today().year + WINDOW_YEARS_AHEAD, 12, 31)
+    valid_days = mcal.get_calendar('NSE').valid_days(start_date=WINDOW_START, end_date=end)
+    return TradingCalendar(valid_days.tz_localize(None).values)
@@ -0,0 +1,128 @@
+"""F&O symbol universe shared by every page.
+
+The equity list from ``capital_market.fno_equity_list()`` is kept in memory
+and in a small JSON file on disk, and is refreshed at most once per trading
+day, so a page rerun never waits on NSE just to fill a selectbox. The index
+underlyings are added to it. Lot sizes and expiries per symbol come from the
+latest bhavcopy in the local store and are looked up from plain dicts.
+"""
+import datetime
+import json
+import os
+import threading
+import uuid
+
+from core.bhavcopy_store import BhavcopyStore
+from core.perf import timed
+from core.shared_cache import Singleton
+from core.trading_calendar import get_calendar
+
+DEFAULT_PATH = os.environ.get(
+    'FNO_UNIVERSE_FILE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'fno_universe.json'),
+)
+
+INDEX_SYMBOLS = ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY', 'NIFTYNXT50']
+
+
+def source_equity_fetcher():
+    # Imported lazily, like the store's fetcher
+    from core.data_sources import get_source
+    return get_source().equity_list()
+
+
+def is_fresh(fetched_on, today):
+    """True when no trading session has started since ``fetched_on``."""
+    if fetched_on >= today:
+        return True
+    try:
+        return not get_calendar().sessions_between(fetched_on + datetime.timedelta(days=1), today)
+    except ValueError:
+        return False
+
+
+class SymbolUniverse:
+    def __init__(self, path=None, fetcher=None, store=None):
+        self.path = path or DEFAULT_PATH
+        self.fetcher = fetcher or source_equity_fetcher
+        self.store = store or BhavcopyStore()
+        self.lock = threading.Lock()
+        self.equities = None
+        self.fetched_on = None
+        self.contracts_date = None
+        self.lot_size_map = {}
+        self.expiry_map = {}
+
+    def _load_file(self):
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            return saved['symbols'], datetime.date.fromisoformat(saved['fetched_on'])
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def _save_file(self, symbols, fetched_on):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched_on': fetched_on.isoformat(), 'symbols': symbols}, f)
+        os.replace(tmp_path, self.path)
+
+    def _refresh(self, today):
+        if self.equities is None:
+            self.equities, self.fetched_on = self._load_file()
+        if self.equities is not None and is_fresh(self.fetched_on, today):
+            return
+        try:
+            with timed('universe.fetch') as span:
+                equities = [s for s in self.fetcher() if s not in INDEX_SYMBOLS]
+                span.record(rows_out=len(equities))
+        except Exception:
+            if self.equities is None:
+                raise
+            # A stale list beats no list; try again on the next call
+            return
+        self.equities, self.fetched_on = equities, today
+        self._save_file(equities, today)
+
+    def equity_symbols(self, today=None):
+        with self.lock:
+            self._refresh(today or datetime.date.today())
+            return list(self.equities)
+
+    def symbols(self, today=None):
+        """F&O equities followed by the index underlyings."""
+        return self.equity_symbols(today) + INDEX_SYMBOLS
+
+    def _refresh_contracts(self):
+        dates = self.store.cached_dates()
+        if not dates or dates[-1] == self.contracts_date:
+            return
+        data = self.store.read(dates[-1], columns=['TckrSymb', 'XpryDt', 'NewBrdLotQty'])
+        data = data.dropna(subset=['TckrSymb', 'XpryDt'])
+        data = data.assign(TckrSymb=data['TckrSymb'].astype(str), XpryDt=data['XpryDt'].astype(str))
+        near_month = data.dropna(subset=['NewBrdLotQty']).sort_values('XpryDt').drop_duplicates('TckrSymb')
+        self.lot_size_map = dict(zip(near_month['TckrSymb'], near_month['NewBrdLotQty'].astype(int)))
+        expiries = data[['TckrSymb', 'XpryDt']].drop_duplicates().sort_values('XpryDt')
+        self.expiry_map = expiries.groupby('TckrSymb')['XpryDt'].agg(list).to_dict()
+        self.contracts_date = dates[-1]
+
+    def lot_size(self, symbol):
+        """Near-month lot size from the latest stored bhavcopy, or None."""
+        with self.lock:
+            self._refresh_contracts()
+            return self.lot_size_map.get(symbol)
+
+    def expiries(self, symbol):
+        """Listed expiries (``'YYYY-MM-DD'``, ascending) in the latest stored bhavcopy."""
+        with self.lock:
+            self._refresh_contracts()
+            return list(self.expiry_map.get(symbol, []))
+
+
+_universe = Singleton(SymbolUniverse)
+
+
+def get_universe():
+    """Process-wide universe so the list outlives Streamlit reruns."""
+    return _universe.get()
@@ -1,6 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+from core.charts import MAX_BARS, cached_figure, extremes
+from core.lazy import lazy_import
+from core.perf_panel import apply_session_settings, plotly_chart, sidebar_panel
+from core.pos_file import read_pos
+from core.position_matching import M2M, POS_FIELDS, QTY, STOCK, TYPE, find_mismatches, select_position_rows, summarize_positions
+
+px = lazy_import('plotly.express')
+apply_session_settings()
 
 
 
@@ -14,48 +20,24 @@ st.header("Upload POS File (Excel)")
     # Function to process the data
 def parse_pos_contents(file):
     try:
-        df = pd.read_excel(uploaded_file)
+        # Parsed once per file and cached by its contents
+        df = read_pos(file, fields=POS_FIELDS)
         st.success(f"Successfully read POS file")
             
        
         
             
         # Data cleaning and processing steps for POS file
-        # More robust approach to find rows with CE, PE, FX
-        new_data = []
-        for index, row in df.iterrows():
-            if any(keyword in row.values for keyword in ['CE', 'PE', 'FX']):
-                new_data.append(row)
-            
+        # Keep the CE, PE and FX positions
+        new_data = select_position_rows(df)
             
-        if not new_data:
+        if new_data.empty:
             st.warning("No rows found containing 'CE', 'PE', or 'FX'. Please check your file format.")
             return None, None, None, None, None, None
             
-        new_data = pd.DataFrame(new_data)
-        new_data.dropna(axis=1, inplace=True)
-        new_data.reset_index(drop=True, inplace=True)
-            
-        
-            
-            
-            
         # Calculate exposure and other sums using identified columns
         try:
-            # Calculate exposure and other sums
-            exp = new_data[new_data['Unnamed: 7'] == 'FX']['Unnamed: 15'].sum()
-            exp = exp/100000
-            exp = round(exp)
-            exposure = f'{exp} Lac'
-            fx_sum = new_data[new_data['Unnamed: 7'] == 'FX']['Unnamed: 9'].sum()
-            ce_sum = new_data[new_data['Unnamed: 7'] == 'CE']['Unnamed: 9'].sum()
-            pe_sum = new_data[new_data['Unnamed: 7'] == 'PE']['Unnamed: 9'].sum()
-            if abs(fx_sum) == abs(ce_sum) == abs(pe_sum):
-                position = 'Matched'
-            else:
-                position = 'Not Matched'
-
-
+            exposure, fx_sum, ce_sum, pe_sum, position = summarize_positions(new_data)
 
             return new_data, exposure, fx_sum, ce_sum, pe_sum, position
             
@@ -100,12 +82,23 @@ if uploaded_file is not None:
             
             # Create and display the bar chart
             try:
-                filtered_data = pos_data[pos_data['Unnamed: 7'] == 'FX'].sort_values(by=['Unnamed: 17'])
-                filtered_data = filtered_data[filtered_data['Unnamed: 9'] != 0]   
+                filtered_data = pos_data[pos_data[TYPE] == 'FX'].sort_values(by=[M2M])
+                # Plain strings so the bars keep the M2M order, not the category order
+                filtered_data = filtered_data[filtered_data[QTY] != 0].astype({STOCK: str})
                 if not filtered_data.empty:
-                    fig = px.bar(filtered_data, x="Unnamed: 0", y="Unnamed: 17",labels={'Unnamed: 0': 'Stocks', 'Unnamed: 17': 'M2M'},title="M2M")  # Create the plot
-                    fig.update_layout(xaxis_tickangle=-90)
-                    st.plotly_chart(fig, use_container_width=True)
+                    # Only the largest losses and gains fit on the axis; the table below has every row
+                    title = "M2M"
+                    if len(filtered_data) > MAX_BARS:
+                        title = f"M2M (lowest and highest {MAX_BARS // 2} of {len(filtered_data)} stocks)"
+                        filtered_data = extremes(filtered_data, M2M)
+
+                    def m2m_chart(frame):
+                        fig = px.bar(frame, x=STOCK, y=M2M, labels={STOCK: 'Stocks', M2M: 'M2M'}, title=title)
+                        fig.update_layout(xaxis_tickangle=-90)
+                        return fig
+
+                    fig = cached_figure(('m2m', title), filtered_data[[STOCK, M2M]], m2m_chart)
+                    plotly_chart(fig, use_container_width=True)
                 else:
                     st.warning("No data available for plotting after filtering.")
             except Exception as plot_error:
@@ -116,45 +109,8 @@ if uploaded_file is not None:
                 st.dataframe(pos_data)
 
             if position == 'Not Matched':
-                # Get unique stock names
-                data = pos_data
-                stock_list = data['Unnamed: 0'].unique()
-                mismatch_strikes = []
-                Future_mismatch =[]
-
-                # Filter CE and PE data first
-                data_ce_pe = data[data['Unnamed: 7'].isin(['CE', 'PE'])]
-                data_fx = data[data['Unnamed: 7'] == 'FX']
-
-                # Loop through each stock
-                for stock in stock_list:
-                    stock_data = data_ce_pe[data_ce_pe['Unnamed: 0'] == stock]  # Filter for current stock
-                    stock_data_fx = data_fx[data_fx['Unnamed: 0'] == stock]
-
-                    # Get total FX quantity for this stock
-                    fx_quantity = stock_data_fx['Unnamed: 9'].sum() if not stock_data_fx.empty else 0
-
-                    # Get total CE sum for the current stock
-                    ce_sum = stock_data[stock_data['Unnamed: 7'] == 'CE']['Unnamed: 9'].sum()
-
-                    # If CE and FX do not balance out, store the mismatch
-                    
-
-                    # Iterate over each strike price
-                    for strike, group in stock_data.groupby('COMBINED NET POSITION'):  # Assuming 'Unnamed: 3' is the strike column
-                        ce_quantity = group[group['Unnamed: 7'] == 'CE']['Unnamed: 9'].sum()
-                        pe_quantity = group[group['Unnamed: 7'] == 'PE']['Unnamed: 9'].sum()
-
-                        # If CE and PE do not balance out, store the mismatch
-                        if ce_quantity + pe_quantity != 0:
-                            mismatch_strikes.append((stock, strike, ce_quantity, pe_quantity, fx_quantity))
-                        else:
-                            if ce_sum + fx_quantity != 0:
-                                Future_mismatch.append((stock, fx_quantity,ce_sum))
-
-                # Convert to DataFrame
-                mismatch_strikes_df = pd.DataFrame(mismatch_strikes, columns=['Stock', 'Strike', 'CE Quantity', 'PE Quantity', 'FX Quantity'])
-                Future_mismatch_df = pd.DataFrame(Future_mismatch,columns=['stock','net fx quantity', 'net ce quantity'])
+                # Net CE/PE/FX quantities per stock and strike in one grouped pass
+                mismatch_strikes_df, Future_mismatch_df = find_mismatches(pos_data)
                 with st.expander("Mis-Match in CE, PE", expanded=True):
                     st.dataframe(data=mismatch_strikes_df)
                 with st.expander("Mis-Match in FX", expanded=True):
@@ -168,3 +124,5 @@ if uploaded_file is not None:
 else:
     st.info("Please upload the POS Excel file.")
 
+sidebar_panel()
+
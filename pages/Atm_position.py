@@ -1,6 +1,9 @@
-import pandas as pd
 import streamlit as st
-import openpyxl
+from core.atm import POS_FIELDS, find_atm_positions
+from core.perf_panel import apply_session_settings, sidebar_panel
+from core.pos_file import read_pos
+
+apply_session_settings()
 
 # Only include title and header once
 st.title("AT Money Position")
@@ -15,41 +18,19 @@ atm_range = st.slider("Select ATM Range (±)",
 
 def parse_pos_contents(file, atm_range_value):
     try:
-        # Read the uploaded file
-        data = pd.read_excel(file, header=1, index_col=0)
+        # Parsed once per file; slider changes reuse the cached frame.
+        # Raises when a required column is missing.
+        data = read_pos(file, fields=POS_FIELDS)
         st.success("Successfully read POS file!")
 
-        # Ensure required columns exist
-        required_columns = {'Call/Put', 'Scrip', 'STK', 'LTP', 'BF Qty'}
-        if not required_columns.issubset(data.columns):
-            st.error(f"Missing required columns: {required_columns - set(data.columns)}")
-            return None
-
-        # Filter out rows where BF Qty is 0
-        data = data[data['Net Qty'] != 0]
+        # Filter out rows where Net Qty is 0
+        data = data[data['qty'] != 0]
         
-        # Separate Futures and Options
-        fut = data[data['Call/Put'] == 'FF']
-        opt = data[data['Call/Put'] != 'FF']
-
-        # Create an empty DataFrame for ATM options
-        ATM = pd.DataFrame(columns=opt.columns)
-
-        # Iterate through options data
-        for index, row in opt.iterrows():
-            # Find matching Future contract
-            matching_fut = fut[fut['Scrip'] == row['Scrip']]
-            if not matching_fut.empty:
-                ltp_value = matching_fut['LTP'].values[0]  # Get the first matching LTP value
-
-                # Check if option is At The Money (using the user-selected range)
-                if abs(row['STK'] - ltp_value) < atm_range_value:
-                    if row['STK'] < ltp_value and row['Call/Put']=='CE' or row['STK'] > ltp_value and row['Call/Put']=='PE':
-                        ATM = pd.concat([ATM, pd.DataFrame([row.values], columns=ATM.columns)], ignore_index=True)
+        # Join every option leg to its future's LTP and keep the ATM ones
+        ATM = find_atm_positions(data, atm_range_value)
 
         # Display ATM data
         if not ATM.empty:
-            ATM = ATM[['Scrip', 'Call/Put', 'Exp Date', 'STK', 'Net Qty']]
             with st.expander("At Money Position", expanded=True):
                 st.dataframe(ATM)
                 
@@ -79,3 +60,6 @@ if uploaded_file is not None:
 else:
     st.info("Please upload a POS Excel file.")
 
+sidebar_panel()
+
+
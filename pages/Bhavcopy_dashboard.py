@@ -1,24 +1,34 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import datetime as dt
-from nselib import derivatives, capital_market
-import plotly.express as px
-import logging
-import traceback
-import yfinance as yf
-import concurrent.futures
-import pytz
+from core.backfill import backfill, trading_days
+from core.bhavcopy_store import BhavcopyStore
+from core.charts import cached_figure, clip_strikes, day_labels, sample_frames
+from core.daily_aggregates import DailyAggregates, calculate_traded_value, strike_values, trend
+from core.heatmap import get_cube
+from core.instruments import OPTION_TYPES, master_for
+from core.lazy import lazy_import
+from core.live_scan import get_live_refresher, trade_values
+from core.perf_panel import apply_session_settings, plotly_chart, sidebar_panel
+from core.scanner import get_scanner
+from core.universe import get_universe
+
+px = lazy_import('plotly.express')
 
 st.set_page_config(layout="wide", page_title="Bhavcopy Dashboard")
+apply_session_settings()
 
 st.title("📈 NSE F&O Bhavcopy Dashboard")
 
+# Bhavcopies are fetched once per day and then served from the local store
+bhavcopy_store = BhavcopyStore()
+daily_aggregates = DailyAggregates(bhavcopy_store)
+
 # Sidebar inputs
 st.sidebar.header("Input Parameters")
-stock_list = list(capital_market.fno_equity_list()['symbol'])
-stock_list.append('NIFTY')
-stock_list.append('BANKNIFTY')
+# Cached on disk and refreshed once per trading day
+universe = get_universe()
+stock_list = universe.symbols()
 selected_value_parameter = st.sidebar.selectbox(
     "Select Metric for Traded Value Calculation",
     options=["Volume", "Open Interest", "Change in OI"]
@@ -39,32 +49,19 @@ with tab1:
     st.subheader(f"Top Stocks by Traded Value on {date_str}")
     
     try:
-        data = derivatives.fno_bhav_copy(date_str)
+        master = master_for(bhavcopy_store, selected_date)
     except Exception as e:
         st.error(f"Failed to fetch bhavcopy: {e}")
+        sidebar_panel()
         st.stop()
-    # Define total_traded_value calculation logic
-    def calculate_traded_value(df, method):
-        if method == "Volume":
-            return df['TtlTradgVol'] * df['NewBrdLotQty'] * df['SttlmPric']
-        elif method == "Open Interest":
-            return df['OpnIntrst'] * df['SttlmPric']
-        elif method == "Change in OI":
-            return df['ChngInOpnIntrst'] * df['SttlmPric']
-        else:
-            return df['TtlTradgVol'] * df['NewBrdLotQty'] * df['SttlmPric']
-    
-    
-
-
-    data = data.dropna(subset=['StrkPric', 'OptnTp'])
+    # Options of the selected expiry, looked up in the day's instrument master
+    data = master.frame(master.rows(expiry=expiry_str, types=OPTION_TYPES))
     data['total_traded_value'] = calculate_traded_value(data, selected_value_parameter)
-    data = data[data['XpryDt'] == expiry_str]
 
     
     #data = data[data['TckrSymb'].isin(stock_list)]
 
-    traded_val_df = data.groupby('TckrSymb')['total_traded_value'].sum().reset_index()
+    traded_val_df = data.groupby('TckrSymb', observed=True)['total_traded_value'].sum().reset_index()
     traded_val_df['total_traded_value'] = traded_val_df['total_traded_value'] / 1e7  # in ₹ Cr
     top_n = traded_val_df.sort_values('total_traded_value', ascending=False).head(30)
 
@@ -72,7 +69,7 @@ with tab1:
                      title=f'Top 30 Stocks by Total Traded Value - {date_str}',
                      labels={'total_traded_value': '₹ Crores', 'TckrSymb': 'Stock'})
     fig_top.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig_top, use_container_width=True)
+    plotly_chart(fig_top, use_container_width=True)
 
     st.subheader(" Strike-Wise Total Traded Value")
     
@@ -84,39 +81,44 @@ with tab1:
     
 
     
-    stock_df = data[data['TckrSymb'] == stock]
-    grouped_df = stock_df.groupby(['StrkPric', 'OptnTp'])['total_traded_value'].sum().reset_index()
+    stock_df = master.frame(master.rows(underlying=stock, expiry=expiry_str, types=OPTION_TYPES))
+    stock_df['total_traded_value'] = calculate_traded_value(stock_df, selected_value_parameter)
+    grouped_df = stock_df.groupby(['StrkPric', 'OptnTp'], observed=True)['total_traded_value'].sum().reset_index()
     grouped_df['total_traded_value'] = grouped_df['total_traded_value'] / 1e7
 
     fig = px.bar(grouped_df, x='StrkPric', y='total_traded_value', color='OptnTp',
                  barmode='group', title=f"{stock}: Traded Value by Strike & Type",
                  labels={'StrkPric': 'Strike', 'total_traded_value': '₹ Cr'})
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
 with tab2:
     st.subheader(f"Trend Analysis for {stock_to_track}")
 
-    collected_data = []
-    strike_data = []
-    oi_change_data =[]
-    date_range = pd.date_range(start=selected_start_date, end=dt.date.today())
-    for date in date_range:
-        try:
-            d = derivatives.fno_bhav_copy(date.strftime('%d-%m-%Y'))
-            daily_cls = d[(d['TckrSymb']==stock_to_track)&(d['XpryDt']==expiry_str)&(d['FinInstrmNm'].str.contains('FUT'))]['ClsPric'].iloc[0]
-            d = d.dropna(subset=['StrkPric', 'OptnTp'])
-            d = d[(d['TckrSymb'] == stock_to_track) & (d['XpryDt'] == expiry_str)].copy()
-            d['total_traded_value'] = calculate_traded_value(d, selected_value_parameter)
-            total_val = d['total_traded_value'].sum()
-            collected_data.append((date.strftime('%d-%m-%Y'), total_val,daily_cls))
-            strike_data.append(d)
-            d = d[['StrkPric', 'OptnTp', 'total_traded_value']].copy()
-            d['date'] = date.strftime('%Y-%m-%d')
-            oi_change_data.append(d)
-        except:
-            continue
-
-    trend_df = pd.DataFrame(collected_data, columns=['date', 'total_traded_value','daily_close'])
+    # Fetch only NSE sessions, in parallel, and only the days not stored yet
+    try:
+        sessions = trading_days(selected_start_date, dt.date.today())
+    except ValueError as e:
+        # The start date is outside the precomputed NSE calendar
+        st.error(f"Cannot analyse from {selected_start_date}: {e}")
+        sidebar_panel()
+        st.stop()
+    backfill_progress = st.progress(0.0, text="Loading bhavcopies...")
+    def show_progress(done, total, result):
+        backfill_progress.progress(done / total, text=f"Loaded {done}/{total} days")
+    backfill_results = backfill(bhavcopy_store, sessions, progress=show_progress)
+    backfill_progress.empty()
+
+    failed_days = [r for r in backfill_results if r.status in ('failed', 'empty')]
+    if failed_days:
+        with st.expander(f"⚠️ {len(failed_days)} day(s) could not be loaded"):
+            st.dataframe(pd.DataFrame(failed_days, columns=['date', 'status', 'attempts', 'error']))
+
+    # Pre-aggregated per day; switching the metric only picks another column
+    loaded_days = [r.date for r in backfill_results if r.status not in ('failed', 'empty')]
+    aggregates = daily_aggregates.read(loaded_days, stock_to_track, expiry_str)
+
+    trend_df = trend(aggregates, selected_value_parameter)
+    trend_df['date'] = pd.to_datetime(trend_df['date']).dt.strftime('%d-%m-%Y')
     trend_df['total_traded_value'] = trend_df['total_traded_value'] / 1e7
 
     if not trend_df.empty:
@@ -142,119 +144,124 @@ with tab2:
             legend=dict(x=0, y=1.1, orientation='h')
         )
 
-        st.plotly_chart(fig_trend, use_container_width=True)
+        plotly_chart(fig_trend, use_container_width=True)
 
     else:
         st.warning("No data available for trend.")
 
-    if strike_data:
-        strike_df = pd.concat(strike_data)
-        strike_df['total_traded_value'] = strike_df['total_traded_value'] / 1e7
-        strike_df['TradDt'] = pd.to_datetime(strike_df['TradDt'])
-
-        fig_anim = px.bar(strike_df, x='StrkPric', y='total_traded_value', color='OptnTp',
-                          animation_frame=strike_df['TradDt'].dt.strftime('%d-%m-%Y'),
-                          barmode='group',
-                          title=f'{stock_to_track} - Strike vs Traded Value Over Time',
-                          labels={'StrkPric': 'Strike', 'total_traded_value': '₹ Cr'})
-        st.plotly_chart(fig_anim, use_container_width=True)
+    # Charts are clipped to the strikes around the latest futures close
+    atm = trend_df['daily_close'].iloc[-1] if not trend_df.empty else None
+    strike_df = strike_values(aggregates, selected_value_parameter)
+    oi_df = strike_df.rename(columns={'TradDt': 'date'})
+    if not strike_df.empty:
+        # At most MAX_FRAMES evenly spaced days of the window are animated
+        anim_df = sample_frames(clip_strikes(strike_df, center=atm), 'TradDt')
+        anim_df = anim_df.assign(
+            total_traded_value=(anim_df['total_traded_value'] / 1e7).round(2),
+            TradDt=day_labels(anim_df['TradDt']),
+        )
+        anim_title = f'{stock_to_track} - Strike vs Traded Value Over Time'
+        fig_anim = cached_figure(('strike_animation', anim_title), anim_df, lambda frame: px.bar(
+            frame, x='StrkPric', y='total_traded_value', color='OptnTp',
+            animation_frame='TradDt',
+            barmode='group',
+            title=anim_title,
+            labels={'StrkPric': 'Strike', 'total_traded_value': '₹ Cr'}))
+        plotly_chart(fig_anim, use_container_width=True)
     else:
         st.info("No strike-wise data available for animation.")
 
-       
-    oi_df = pd.concat(oi_change_data)
-    
-    # Pivot data: rows = date, columns = (Strike, Option Type), values = OI
-    pivoted_oi = oi_df.pivot_table(index='date', columns=['StrkPric', 'OptnTp'], values='total_traded_value')
-    pivoted_oi = pivoted_oi.sort_index()
-
-    oi_pct_change = pivoted_oi.pct_change() * 100
-    oi_pct_change = oi_pct_change.round(2)
+    # Dense date x strike cube, extended with new days only; the heatmaps
+    # get the same window of strikes
+    cube = get_cube((stock_to_track, expiry_str, selected_value_parameter), oi_df, date='date')
+    calls_change_T = cube.heatmap('CE', center=atm)
+    puts_change_T = cube.heatmap('PE', center=atm)
 
-        # Filter for Calls
-    calls_change = oi_pct_change.xs('CE', axis=1, level=1, drop_level=False)
-    calls_change_T = calls_change.T
-    calls_change_T.index = calls_change_T.index.get_level_values(0)  # Extract only StrkPric
-    
-    fig_calls = px.imshow(
-        calls_change_T,
-        aspect='auto',
-        color_continuous_scale='RdBu',
-        zmin=-100, zmax=100,
-        labels=dict(x="Date", y="Strike", color="% Change"),
-        title=f"{stock_to_track} - % Change in Traded Value (Calls)"
-    )
-    st.plotly_chart(fig_calls, use_container_width=True)
-    # Filter for Puts
-    puts_change = oi_pct_change.xs('PE', axis=1, level=1, drop_level=False)
-    puts_change_T = puts_change.T
-    puts_change_T.index = puts_change_T.index.get_level_values(0)  # Extract only StrkPric
-    
-    fig_puts = px.imshow(
-        puts_change_T,
-        aspect='auto',
-        color_continuous_scale='RdBu',
-        zmin=-100, zmax=100,
-        labels=dict(x="Date", y="Strike", color="% Change "),
-        title=f"{stock_to_track} - % Change in Traded Value (Puts)"
-    )
-    st.plotly_chart(fig_puts, use_container_width=True)
+    if calls_change_T.empty and puts_change_T.empty:
+        st.info("No strike-wise data available for heatmaps.")
+    else:
+        for side, change_T in (('Calls', calls_change_T), ('Puts', puts_change_T)):
+            heatmap_title = f"{stock_to_track} - % Change in Traded Value ({side})"
+            fig_heatmap = cached_figure(('strike_heatmap', heatmap_title), change_T, lambda frame: px.imshow(
+                frame,
+                aspect='auto',
+                color_continuous_scale='RdBu',
+                zmin=-100, zmax=100,
+                labels=dict(x="Date", y="Strike", color="% Change"),
+                title=heatmap_title
+            ))
+            plotly_chart(fig_heatmap, use_container_width=True)
+
+def top_traded_chart(top, column, side, color):
+    fig = px.bar(top, x='Symbol', y=column,
+                 title=f'Top 10 Stocks by {side} Traded Value (₹ Cr)',
+                 labels={column: '₹ Cr'}, color_discrete_sequence=[color])
+    plotly_chart(fig, use_container_width=True)
 
 with tab3:
     st.subheader("Top 10 Stocks by Traded Value in Calls & Puts (Live Option Chain)")
 
-    def get_ltp(stock):
-        try:
-            stock_full = stock.upper() + '.NS'
-            data = yf.Ticker(stock_full).get_info()
-            return data.get('currentPrice') or data.get('regularMarketPrice')
-        except Exception as e:
-            return None
-
-    def process_stock(stock):
-        try:
-            ltp = get_ltp(stock)
-            if ltp is None:
-                return None, None
-            data = derivatives.nse_live_option_chain(stock)
-            lot_size = data[data['CALLS_Ask_Qty'] != 0]['CALLS_Ask_Qty'].min()
-            lot_size = 1 if pd.isna(lot_size) or lot_size == 0 else lot_size
-            data['Lot_Size'] = lot_size
-            calls = data[data['Strike_Price'] <= ltp].copy()
-            puts = data[data['Strike_Price'] >= ltp].copy()
-            return calls, puts
-        except Exception as e:
-            return None, None
-
-    if st.button("Run Live Analysis"):
+    auto_refresh = st.toggle("Auto-refresh",
+                             help="Poll option chains in the background, most active symbols first, "
+                                  "and update the rankings as quotes change")
+    if auto_refresh:
+        refresh_interval = st.slider("Refresh every (seconds)", min_value=5, max_value=120, value=15)
+        refresher = get_live_refresher()
+        refresher.configure(stock_list, interval=refresh_interval)
+
+        # Only this fragment reruns on each refresh, not the whole page
+        @st.fragment(run_every=refresh_interval)
+        def live_rankings():
+            refresher.watch()
+            board = refresher.board.snapshot()
+            if not board.ticks:
+                st.info("Fetching the first batch of option chains...")
+                return
+            tick_ms = (board.last_tick_seconds or 0) * 1000
+            st.caption(
+                f"{board.symbols}/{len(stock_list)} symbols loaded, {board.ticks} refreshes, "
+                f"{board.changed_rows} rows changed, last refresh {tick_ms:.0f} ms"
+            )
+            if board.errors:
+                with st.expander(f"{len(board.errors)} symbols failing"):
+                    st.dataframe(pd.DataFrame(board.errors.items(), columns=['Symbol', 'error']), hide_index=True)
+            if not board.top['CALLS'].empty:
+                top_traded_chart(board.top['CALLS'], 'CALLS_Trade_Value', 'CALL', 'green')
+            if not board.top['PUTS'].empty:
+                top_traded_chart(board.top['PUTS'], 'PUTS_Trade_Value', 'PUT', 'red')
+            if board.updated_at:
+                updated = pd.Timestamp(board.updated_at, unit='s', tz='UTC').tz_convert('Asia/Kolkata')
+                st.caption(f"Updated at: {updated.strftime('%Y-%m-%d %H:%M:%S IST')}")
+
+        live_rankings()
+
+    elif st.button("Run Live Analysis"):
         with st.spinner("Fetching live option data..."):
-            stocks = stock_list
-            result_call, result_put = [], []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                results = list(executor.map(process_stock, stocks))
-            for calls, puts in results:
-                if calls is not None:
-                    result_call.append(calls)
-                if puts is not None:
-                    result_put.append(puts)
+            # Chains come through the shared fetch cache; LTP is the chain's underlying value
+            scan = get_scanner().scan(stock_list)
+            result_call = [scan.calls] if not scan.calls.empty else []
+            result_put = [scan.puts] if not scan.puts.empty else []
+
+            failed = scan.metrics[scan.metrics['status'] == 'error']
+            st.caption(
+                f"{len(scan.metrics) - len(failed)}/{len(scan.metrics)} symbols loaded, "
+                f"median latency {scan.metrics['latency'].median() * 1000:.0f} ms"
+            )
+            with st.expander(f"Scan metrics ({len(failed)} errors)"):
+                st.dataframe(scan.metrics.sort_values('latency', ascending=False), use_container_width=True)
 
             if result_call:
                 df_call = pd.concat(result_call)
-                df_call['CALLS_Trade_Value'] = df_call['CALLS_Volume'] * df_call['CALLS_LTP'] * df_call['Lot_Size']
+                df_call['CALLS_Trade_Value'] = trade_values(df_call, 'CALLS')
                 top_calls = df_call.groupby('Symbol')['CALLS_Trade_Value'].sum().sort_values(ascending=False).head(10).reset_index()
-                fig_call = px.bar(top_calls, x='Symbol', y='CALLS_Trade_Value',
-                                  title='Top 10 Stocks by CALL Traded Value (₹ Cr)',
-                                  labels={'CALLS_Trade_Value': '₹ Cr'}, color_discrete_sequence=['green'])
-                st.plotly_chart(fig_call, use_container_width=True)
+                top_traded_chart(top_calls, 'CALLS_Trade_Value', 'CALL', 'green')
 
             if result_put:
                 df_put = pd.concat(result_put)
-                df_put['PUTS_Trade_Value'] = df_put['PUTS_Volume'] * df_put['PUTS_LTP'] * df_put['Lot_Size']
+                df_put['PUTS_Trade_Value'] = trade_values(df_put, 'PUTS')
                 top_puts = df_put.groupby('Symbol')['PUTS_Trade_Value'].sum().sort_values(ascending=False).head(10).reset_index()
-                fig_put = px.bar(top_puts, x='Symbol', y='PUTS_Trade_Value',
-                                 title='Top 10 Stocks by PUT Traded Value (₹ Cr)',
-                                 labels={'PUTS_Trade_Value': '₹ Cr'}, color_discrete_sequence=['red'])
-                st.plotly_chart(fig_put, use_container_width=True)
+                top_traded_chart(top_puts, 'PUTS_Trade_Value', 'PUT', 'red')
+
+        st.caption(f"Updated at: {pd.Timestamp.now(tz='Asia/Kolkata').strftime('%Y-%m-%d %H:%M:%S IST')}")
 
-        ist = pytz.timezone('Asia/Kolkata')
-        st.caption(f"Updated at: {pd.Timestamp.now(tz=ist).strftime('%Y-%m-%d %H:%M:%S IST')}")
+sidebar_panel()
@@ -1,92 +1,33 @@
 import streamlit as st
 import pandas as pd
-import re
-import base64
-import io
-import plotly.express as px
+from core.bhavcopy_store import BhavcopyStore
+from core.box_log import parse_box_log
+from core.lazy import lazy_import
+from core.lot_sizes import get_registry
+from core.perf_panel import apply_session_settings, plotly_chart, sidebar_panel
+
+px = lazy_import('plotly.express')
 
 st.set_page_config(page_title="Box Performance Dashboard", layout="wide")
+apply_session_settings()
 st.title("📦 Box Performance Dashboard")
 
-# Helper Function: Extract Lot Size
-def get_lot_size_from_expiry(expiry_str):
-    try:
-        instrument = re.findall(r'[A-Z]+', expiry_str)[0]
-    except IndexError:
-        return None
-
-    lot_size_map = {
-        'NIFTY': 75,
-        'BANKNIFTY': 30,
-        'MIDCPNIFTY': 120,
-        'FINNIFTY': 65
-    }
-    return lot_size_map.get(instrument)
-
 # Main Data Parser
 def parse_data(file):
-    content = file.read()
-    decoded = io.StringIO(content.decode('utf-8'))
-    data = pd.read_csv(decoded, on_bad_lines='skip')
-    data.columns = ['date', 'status', 'type', 'message']
-    df = data[data['type'] == 'ALGOTRADE'].copy()
-
-    pattern = (
-        r"BOX\s+(\w+\d*)-(\d+)-(\d+)(CE|PE)\s+Strategy\s+Trade\s+Confirmed\s+Qty\s+([-+]?\d+)\s+@\s+([-+]?\d*\.\d+|\d+)\s+\[Parity\s+Was\s+([-+]?\d*\.\d+|\d+)"
-    )
-    df_extracted = df['message'].str.extract(pattern)
-    df_extracted.columns = ['expiry', 'itm_stk', 'counter', 'option_type', 'open_cls', 'traded_parity', 'asked_parity']
-    df = pd.concat([df, df_extracted], axis=1)
-
-    # Clean numeric data
-    for col in ['open_cls', 'itm_stk', 'counter']:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    for col in ['traded_parity', 'asked_parity']:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    df = df.dropna(subset=['expiry', 'open_cls', 'itm_stk', 'counter', 'traded_parity', 'asked_parity'])
-    df = df[df['asked_parity'] < 5000]
-
-    expiry_value = df['expiry'].iloc[0]
-    lot_size = get_lot_size_from_expiry(expiry_value)
-
-    if lot_size is None:
-        st.error(f"❌ Unknown instrument in expiry string: {expiry_value}")
-        return pd.DataFrame(), pd.DataFrame()
-
-    # Calculations
-    df['box_size'] = abs(df['itm_stk'] - df['counter'])
-    df['parity_diff'] = (df['traded_parity'] - df['asked_parity'])*abs(df['open_cls'])
-    df['pnl'] = df['parity_diff'] * lot_size 
-    df['wrong_right'] = df['traded_parity'] > df['asked_parity']
-    df['wrong_right'] = df['wrong_right'].map({True: 'right', False: 'wrong'})
-    df['gross_flow'] = df['traded_parity'] * abs(df['open_cls']) * lot_size
-
-    # Summary Table
-    summary = []
-    for i in sorted(df['box_size'].unique()):
-        df1 = df[df['box_size'] == i]
-        total = df1['open_cls'].abs().sum()
-        correct = df1[df1['wrong_right'] == 'right']['open_cls'].abs().sum()
-        wrong = df1[df1['wrong_right'] == 'wrong']['open_cls'].abs().sum()
-        pos_alpha = df1[df1['wrong_right'] == 'right']['parity_diff'].sum() * lot_size
-        neg_alpha = df1[df1['wrong_right'] == 'wrong']['parity_diff'].sum() * lot_size
-        net_alpha = pos_alpha + neg_alpha
-        gross_flow = df1['gross_flow'].sum()
-        summary.append((i, total, correct, wrong, pos_alpha, neg_alpha, net_alpha, gross_flow))
-
-    df_summary = pd.DataFrame(summary, columns=[
-        'box_size', 'total_trades', 'correct_trades', 'wrong_trades',
-        'positive_alpha', 'negative_alpha', 'net_alpha', 'gross_flow'
-    ])
-
-    return df, df_summary
+    # Lot sizes come from the stored bhavcopies, per instrument and trade date
+    registry = get_registry(BhavcopyStore())
+    # The log is streamed in chunks; only confirmed trades are kept
+    try:
+        return parse_box_log(file, registry)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
 # File Upload
 uploaded_file = st.file_uploader("📤 Upload Trade File (.txt)", type=['txt'])
 
 if uploaded_file:
-    df_traded, df_summary = parse_data(uploaded_file)
+    df_traded, df_summary, df_breakdown = parse_data(uploaded_file)
 
     if not df_traded.empty:
         # Tabs
@@ -94,13 +35,15 @@ if uploaded_file:
 
         # Tab 1: Summary
         with tab1:
-            exp = df_traded['expiry'].iloc[0]
+            exp = ', '.join(sorted(df_traded['expiry'].unique()))
             st.subheader(f"Summary Table for Expiry: `{exp}`")
+            selected_instrument = st.selectbox("Filter by Instrument (optional)", options=["All"] + sorted(df_summary['instrument'].unique()))
             selected_box = st.selectbox("Filter by Box Size (optional)", options=["All"] + sorted(df_summary['box_size'].unique()))
+            df_filtered = df_summary
+            if selected_instrument != "All":
+                df_filtered = df_filtered[df_filtered['instrument'] == selected_instrument]
             if selected_box != "All":
-                df_filtered = df_summary[df_summary['box_size'] == selected_box]
-            else:
-                df_filtered = df_summary
+                df_filtered = df_filtered[df_filtered['box_size'] == selected_box]
             st.dataframe(df_filtered, use_container_width=True)
 
             csv = df_summary.to_csv(index=False).encode('utf-8')
@@ -110,20 +53,28 @@ if uploaded_file:
         with tab2:
             st.subheader("Alpha Breakdown by Box Size")
             fig1 = px.bar(df_summary, x='box_size', y=['positive_alpha', 'negative_alpha'],
-                          barmode='group',
+                          barmode='group', facet_col='instrument',
                           labels={'value': 'Alpha', 'box_size': 'Box Size', 'variable': 'Alpha Type'})
-            st.plotly_chart(fig1, use_container_width=True)
+            plotly_chart(fig1, use_container_width=True)
 
             st.subheader("Gross Flow by Box Size")
             fig2 = px.bar(df_summary, x='box_size', y='gross_flow',
-                          title='Gross Flow by Box Size',
+                          title='Gross Flow by Box Size', facet_col='instrument',
                           text_auto=True)
-            st.plotly_chart(fig2, use_container_width=True)
+            plotly_chart(fig2, use_container_width=True)
+
+            st.subheader("Net Alpha by Hour")
+            # Rolled up from the parsed breakdown, the trades are not rescanned
+            df_hourly = df_breakdown.groupby(['instrument', 'hour', 'box_size'], as_index=False)['net_alpha'].sum()
+            fig_hourly = px.bar(df_hourly, x='hour', y='net_alpha', color=df_hourly['box_size'].astype(str),
+                                barmode='group', facet_col='instrument',
+                                labels={'hour': 'Hour of Day', 'net_alpha': 'Net Alpha', 'color': 'Box Size'})
+            plotly_chart(fig_hourly, use_container_width=True)
 
             st.subheader("Distribution of Traded Parity")
             fig3 = px.histogram(df_traded, x='traded_parity', nbins=30,
                                 title='Distribution of Traded Parity')
-            st.plotly_chart(fig3, use_container_width=True)
+            plotly_chart(fig3, use_container_width=True)
 
         # Tab 3: Raw Data
         with tab3:
@@ -131,3 +82,5 @@ if uploaded_file:
             st.dataframe(df_traded, use_container_width=True)
             raw_csv = df_traded.to_csv(index=False).encode('utf-8')
             st.download_button("📥 Download Raw Data CSV", raw_csv, "raw_trades.csv", "text/csv")
+
+sidebar_panel()